@@ -1,19 +1,89 @@
+import argparse
+import heapq
 import platform
 import socket
 import psutil
 import json
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import random
 import requests
 import subprocess
 import os
 import sys
 import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import freeze_support
+
+try:
+    import msgpack
+except ImportError:  # Uploads fall back to JSON
+    msgpack = None
 
 # === CONFIGURATION ===
 API_ENDPOINT = "https://specscorex.onrender.com/api/full-system-info"
+BATCH_ENDPOINT = API_ENDPOINT + "/batch"
+# Follow-up report of how long the traced upload took: <TRACES_ENDPOINT>/<trace_id>/upload
+TRACES_ENDPOINT = API_ENDPOINT.replace("/full-system-info", "/traces")
+TRACE_HEADER = "X-Trace-Id"
 SEND_TO_API = True  # Set to False for debug mode without sending
 
+# Failed uploads are kept here and replayed in one batch once the backend is reachable
+SPOOL_DIR = os.path.join(os.environ.get("LOCALAPPDATA") or tempfile.gettempdir(), "SpecScoreX", "spool")
+MAX_SPOOL_FILES = 50  # Oldest snapshots are dropped beyond this
+MAX_BATCH_SIZE = 100  # Matches the backend's per-batch limit, including the current snapshot
+# Snapshots the backend rejected, kept for inspection instead of being retried forever
+QUARANTINE_DIR = os.path.join(SPOOL_DIR, "rejected")
+MAX_REPLAY_FAILURES = 5  # A spooled snapshot the backend failed to store this often is quarantined
+STORED_STATUSES = {"stored", "unchanged", "duplicate"}  # Per-snapshot results that mean it got through
+
+# Exponential backoff with full jitter between upload attempts
+BACKOFF_BASE = 2.0
+BACKOFF_CAP = 60.0
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+# Answers of backends that predate the batch endpoint; spooled snapshots are then replayed one by one
+UNSUPPORTED_STATUS = {404, 405}
+use_batch = True
+
+# Uploads are MessagePack when msgpack is available; JSON is used against
+# backends that answer 415 Unsupported Media Type
+MSGPACK_MIMETYPE = "application/msgpack"
+use_msgpack = msgpack is not None
+
+# Heaviest processes reported per snapshot, by CPU and by resident memory
+TOP_PROCESSES = 10
+
+# Activity sampling: per-core CPU, per-disk and per-NIC rates over a short window,
+# kept in fixed-size ring buffers and uploaded as summaries rather than raw samples
+ACTIVITY_WINDOW_SECONDS = 3.0
+ACTIVITY_SAMPLE_INTERVAL = 0.1
+ACTIVITY_MAX_SAMPLES = 300  # Ring buffer length per series, bounds memory for long windows
+
+# Collection runs against an overall deadline. Each collector has its own budget
+# (capped by the time left); one that misses it is abandoned and the snapshot is
+# sent with whatever finished, so the agent reports within the deadline
+COLLECTION_DEADLINE_SECONDS = 20.0
+COLLECTOR_BUDGETS = {
+    "powershell_test": 5.0,
+    "powershell": 15.0,
+    "disks": 5.0,  # disk_usage can block on a dead network drive
+    "activity": ACTIVITY_WINDOW_SECONDS + 3.0,
+    "ip_address": 2.0,  # getfqdn can hang on a slow DNS server
+}
+
+# Benchmark mode (--benchmark): short, bounded micro-benchmarks uploaded with the specs
+BENCHMARK_VERSION = 1
+BENCHMARK_CPU_SECONDS = 2.0
+BENCHMARK_MEMORY_MB = 256
+BENCHMARK_MEMORY_SECONDS = 1.0
+BENCHMARK_DISK_MB = 256
+BENCHMARK_DISK_SECONDS = 5.0  # Per phase, so a slow HDD cannot stall the run
+BENCHMARK_IO_BLOCK = 4096
+
 # Robust PowerShell script without auto-elevation
 POWERSHELL_SCRIPT = '''
 
@@ -542,7 +612,73 @@ try {
 }
 '''
 
-def run_embedded_powershell_script():
+class CollectionRun:
+    """Collectors started on daemon threads, each bounded by its budget and the run's deadline.
+
+    A collector that misses its budget is abandoned: its thread finishes (or
+    hangs) in the background and whatever it returns later is discarded.
+    ``status`` records each collector's outcome and duration for the payload.
+    """
+
+    def __init__(self, deadline=COLLECTION_DEADLINE_SECONDS):
+        self.deadline_s = deadline
+        self.started = time.perf_counter()
+        self.deadline = self.started + deadline
+        self.status = {}
+        self._running = {}
+
+    def budget(self, name):
+        """Seconds ``name`` may take: its own budget, capped by the time left"""
+        return max(0.0, min(COLLECTOR_BUDGETS[name], self.deadline - time.perf_counter()))
+
+    def start(self, name, fn, *args):
+        budget = self.budget(name)
+        if budget <= 0:
+            self.status[name] = {"status": "skipped", "ms": 0}
+            return
+        outcome = {}
+
+        def target():
+            try:
+                outcome["result"] = fn(*args)
+            except Exception as e:
+                outcome["error"] = str(e)
+            outcome["ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+        started = time.perf_counter()
+        thread = threading.Thread(target=target, name=f"collector-{name}", daemon=True)
+        self._running[name] = (thread, outcome, started + budget, budget)
+        thread.start()
+
+    def result(self, name, default=None):
+        """Wait for ``name`` until its budget runs out; its result, or ``default``"""
+        if name not in self._running:
+            return default
+        thread, outcome, until, budget = self._running.pop(name)
+        thread.join(max(0.0, until - time.perf_counter()))
+        if thread.is_alive():
+            self.status[name] = {"status": "timeout", "ms": round(budget * 1000, 1)}
+            print(f"[!] {name} collection missed its {budget:.1f}s budget; sending without it.")
+            return default
+        result = outcome.get("result", default)
+        # Collectors report their own failures as {"error": ...}
+        error = outcome.get("error") or (result.get("error") if isinstance(result, dict) else None)
+        self.status[name] = {"status": "error", "ms": outcome["ms"], "error": error} if error \
+            else {"status": "ok", "ms": outcome["ms"]}
+        return default if "error" in outcome else result
+
+    def run(self, name, fn, *args):
+        self.start(name, fn, *args)
+        return self.result(name)
+
+    def summary(self):
+        return {
+            "deadline_s": self.deadline_s,
+            "elapsed_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "collectors": self.status
+        }
+
+def run_embedded_powershell_script(timeout=30):
     """Create temporary PowerShell script and run it with better error handling"""
     try:
         # Create temporary file
@@ -558,7 +694,7 @@ def run_embedded_powershell_script():
                 "-NoProfile", 
                 "-NonInteractive",
                 "-File", temp_script_path
-            ], capture_output=True, text=True, timeout=30)
+            ], capture_output=True, text=True, timeout=timeout)
             
             print(f"[DEBUG] PowerShell exit code: {result.returncode}")
             print(f"[DEBUG] PowerShell stdout: {result.stdout[:500]}...")
@@ -614,25 +750,216 @@ def get_ip_address():
     except Exception:
         return "127.0.0.1"
 
-def collect_python_system_info():
-    """Collect system information using Python"""
-    try:
-        disk_info = []
-        for partition in psutil.disk_partitions():
+def sample_process_cpu_times():
+    """First CPU sample for collect_top_processes: pid -> user + system seconds"""
+    sample = {}
+    for proc in psutil.process_iter(attrs=['pid', 'cpu_times']):
+        times = proc.info['cpu_times']
+        if times is not None:
+            sample[proc.info['pid']] = times.user + times.system
+    return sample, time.perf_counter()
+
+def collect_top_processes(first_sample, n=TOP_PROCESSES):
+    """Top ``n`` processes by CPU (delta since ``first_sample``) and by RSS.
+
+    One process_iter pass feeds two bounded min-heaps, so the cost grows with
+    the process count but nothing sorts the full list. Names are looked up
+    afterwards, only for the processes that made it into a heap.
+    """
+    started = time.perf_counter()
+    previous, sampled_at = first_sample
+    elapsed = max(started - sampled_at, 1e-3)
+    cpu_count = psutil.cpu_count(logical=True) or 1
+
+    top_cpu, top_memory = [], []
+    count = 0
+    for proc in psutil.process_iter(attrs=['pid', 'cpu_times', 'memory_info']):
+        info = proc.info
+        count += 1
+        rss = info['memory_info'].rss if info['memory_info'] is not None else 0
+        cpu = 0.0
+        if info['cpu_times'] is not None and info['pid'] in previous:
+            # A negative delta means the pid was reused; treat it as idle
+            delta = info['cpu_times'].user + info['cpu_times'].system - previous[info['pid']]
+            cpu = max(delta, 0.0) / elapsed / cpu_count * 100
+        for heap, key in ((top_cpu, cpu), (top_memory, rss)):
+            item = (key, info['pid'], cpu, rss)
+            if len(heap) < n:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+    names = {}
+    for _, pid, _, _ in top_cpu + top_memory:
+        if pid not in names:
             try:
-                usage = psutil.disk_usage(partition.mountpoint)
-                disk_info.append({
-                    "device": partition.device,
-                    "mountpoint": partition.mountpoint,
-                    "fstype": partition.fstype,
-                    "total_size": round(usage.total / (1024 ** 3), 2),
-                    "used": round(usage.used / (1024 ** 3), 2),
-                    "free": round(usage.free / (1024 ** 3), 2)
-                })
-            except Exception:
-                continue
+                names[pid] = psutil.Process(pid).name()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                names[pid] = ""
 
-        return {
+    def rows(heap):
+        return [{"pid": pid, "name": names[pid], "cpu_percent": round(cpu, 1), "rss_mb": round(rss / 1024 ** 2, 1)}
+                for _, pid, cpu, rss in sorted(heap, reverse=True)]
+
+    return {
+        "process_count": count,
+        "sample_interval_s": round(elapsed, 2),
+        "collection_ms": round((time.perf_counter() - started) * 1000, 1),
+        "top_cpu": rows(top_cpu),
+        "top_memory": rows(top_memory)
+    }
+
+def summarize_samples(samples):
+    """min/mean/p95/max of one ring buffer"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    p95 = ordered[max(0, -(-len(ordered) * 95 // 100) - 1)]
+    return {
+        "min": round(ordered[0], 1),
+        "mean": round(sum(ordered) / len(ordered), 1),
+        "p95": round(p95, 1),
+        "max": round(ordered[-1], 1)
+    }
+
+def sample_activity(window=ACTIVITY_WINDOW_SECONDS, interval=ACTIVITY_SAMPLE_INTERVAL):
+    """Sample per-core CPU and per-disk/per-NIC throughput for ``window`` seconds.
+
+    Each series is a ring buffer of per-interval values; only their summaries and
+    the whole-window rates are returned, so the payload does not grow with the window.
+    """
+    buffers = defaultdict(lambda: deque(maxlen=ACTIVITY_MAX_SAMPLES))
+
+    psutil.cpu_percent(percpu=True)  # Prime the per-core counters
+    first_disk = prev_disk = psutil.disk_io_counters(perdisk=True) or {}
+    first_net = prev_net = psutil.net_io_counters(pernic=True) or {}
+    started = prev_time = time.perf_counter()
+    next_tick = started
+
+    while True:
+        # Sleep to a fixed schedule so slow ticks do not stretch the window
+        next_tick += interval
+        time.sleep(max(0.0, next_tick - time.perf_counter()))
+        now = time.perf_counter()
+        elapsed = now - prev_time
+
+        cores = psutil.cpu_percent(percpu=True)
+        for core, percent in enumerate(cores):
+            buffers["cpu", core].append(percent)
+        if cores:
+            buffers["cpu_total"].append(sum(cores) / len(cores))
+
+        disk = psutil.disk_io_counters(perdisk=True) or {}
+        for name, counters in disk.items():
+            previous = prev_disk.get(name)
+            if previous is not None and elapsed > 0:
+                buffers["disk_read", name].append((counters.read_bytes - previous.read_bytes) / elapsed)
+                buffers["disk_write", name].append((counters.write_bytes - previous.write_bytes) / elapsed)
+
+        net = psutil.net_io_counters(pernic=True) or {}
+        for name, counters in net.items():
+            previous = prev_net.get(name)
+            if previous is not None and elapsed > 0:
+                buffers["net_recv", name].append((counters.bytes_recv - previous.bytes_recv) / elapsed)
+                buffers["net_sent", name].append((counters.bytes_sent - previous.bytes_sent) / elapsed)
+
+        prev_disk, prev_net, prev_time = disk, net, now
+        if now - started >= window:
+            break
+
+    duration = prev_time - started
+    per_core = [summarize_samples(buffers["cpu", core]) for core in range(len(cores))]
+    means = [summary["mean"] for summary in per_core if summary]
+
+    def kib(samples):
+        return summarize_samples([value / 1024 for value in samples])
+
+    disks = {}
+    for name, counters in prev_disk.items():
+        start = first_disk.get(name)
+        if start is None:
+            continue
+        read_bytes = counters.read_bytes - start.read_bytes
+        write_bytes = counters.write_bytes - start.write_bytes
+        if not (read_bytes or write_bytes):
+            continue  # Idle disks would only add zeros
+        disks[name] = {
+            "read_kib_s": kib(buffers["disk_read", name]),
+            "write_kib_s": kib(buffers["disk_write", name]),
+            "read_iops": round((counters.read_count - start.read_count) / duration, 1),
+            "write_iops": round((counters.write_count - start.write_count) / duration, 1)
+        }
+
+    nics = {}
+    for name, counters in prev_net.items():
+        start = first_net.get(name)
+        if start is None:
+            continue
+        if counters.bytes_recv == start.bytes_recv and counters.bytes_sent == start.bytes_sent:
+            continue  # Skips the many idle virtual adapters Windows reports
+        nics[name] = {
+            "recv_kib_s": kib(buffers["net_recv", name]),
+            "sent_kib_s": kib(buffers["net_sent", name])
+        }
+
+    return {
+        "window_s": round(duration, 2),
+        "samples": len(buffers["cpu_total"]),
+        "cpu": {
+            "total": summarize_samples(buffers["cpu_total"]),
+            "per_core": per_core,
+            # Spread between the busiest and idlest core, which one overall figure hides
+            "core_imbalance": round(max(means) - min(means), 1) if means else None
+        },
+        "disks": disks,
+        "nics": nics
+    }
+
+def collect_disk_info():
+    """Size and usage of every mounted partition, in GB"""
+    disk_info = []
+    for partition in psutil.disk_partitions():
+        try:
+            usage = psutil.disk_usage(partition.mountpoint)
+            disk_info.append({
+                "device": partition.device,
+                "mountpoint": partition.mountpoint,
+                "fstype": partition.fstype,
+                "total_size": round(usage.total / (1024 ** 3), 2),
+                "used": round(usage.used / (1024 ** 3), 2),
+                "free": round(usage.free / (1024 ** 3), 2)
+            })
+        except Exception:
+            continue
+    return disk_info
+
+def collect_activity():
+    """(top processes, activity) over one sampling window"""
+    # Bracket the activity window with the two process samples, so the
+    # top-N list adds no waiting of its own
+    process_sample = sample_process_cpu_times()
+    activity = sample_activity()
+    return collect_top_processes(process_sample), activity
+
+def collect_python_system_info(run):
+    """Collect system information using Python.
+
+    Identity and counters are read inline; the parts that can stall run as
+    collectors of ``run`` and are left out of the result if they miss their budget.
+    """
+    try:
+        run.start("disks", collect_disk_info)
+        run.start("activity", collect_activity)
+        run.start("ip_address", get_ip_address)
+
+        disk_info = run.result("disks", [])
+        processes, activity = run.result("activity", (None, None))
+        ip_address = run.result("ip_address", "127.0.0.1")
+        # Mean over the whole window rather than a one-second spot check
+        cpu_total = activity["cpu"]["total"] if activity else None
+        cpu_usage = cpu_total["mean"] if cpu_total else psutil.cpu_percent(interval=None)
+
+        info = {
             "timestamp": datetime.now().isoformat(),
             "system": {
                 "hostname": socket.gethostname(),
@@ -646,22 +973,152 @@ def collect_python_system_info():
             "hardware": {
                 "cpu_cores": psutil.cpu_count(logical=False),
                 "cpu_threads": psutil.cpu_count(logical=True),
-                "cpu_usage": psutil.cpu_percent(interval=1),
+                "cpu_usage": cpu_usage,
                 "total_ram": round(psutil.virtual_memory().total / (1024 ** 3), 2),
                 "available_ram": round(psutil.virtual_memory().available / (1024 ** 3), 2),
                 "disk_info": disk_info
             },
             "network": {
-                "ip_address": get_ip_address(),
+                "ip_address": ip_address,
                 "mac_address": ':'.join(['{:02x}'.format((uuid.getnode() >> ele) & 0xff)
                                         for ele in range(0, 2 * 6, 2)][::-1])
             }
         }
+        if activity:
+            info["processes"] = processes
+            info["activity"] = activity
+        return info
 
     except Exception as e:
         print("[!] Error collecting system info:", str(e))
         return {"error": f"System info collection failed: {str(e)}"}
 
+def _cpu_work(seconds):
+    """Fixed-size integer work units completed in ``seconds`` on one core"""
+    units = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        x = 0
+        for i in range(10000):
+            x = (x * 31 + i) & 0xFFFFFFFF
+        units += 1
+    return units
+
+def benchmark_cpu():
+    """Single-core and all-core throughput in work units per second"""
+    single = _cpu_work(BENCHMARK_CPU_SECONDS) / BENCHMARK_CPU_SECONDS
+
+    workers = psutil.cpu_count(logical=True) or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Start every worker before timing so process spawn is not measured
+        list(pool.map(_cpu_work, [0.05] * workers))
+        multi = sum(pool.map(_cpu_work, [BENCHMARK_CPU_SECONDS] * workers)) / BENCHMARK_CPU_SECONDS
+
+    return {
+        "single_core_score": round(single, 1),
+        "multi_core_score": round(multi, 1),
+        "workers": workers,
+        "scaling": round(multi / single, 2) if single else None
+    }
+
+def benchmark_memory():
+    """Copy bandwidth between two large buffers, in GB/s"""
+    size = BENCHMARK_MEMORY_MB * 1024 * 1024
+    source = bytearray(os.urandom(1024 * 1024)) * BENCHMARK_MEMORY_MB
+    target = bytearray(size)
+    source_view, target_view = memoryview(source), memoryview(target)
+
+    copied = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < BENCHMARK_MEMORY_SECONDS:
+        target_view[:] = source_view
+        copied += size
+    elapsed = time.perf_counter() - start
+    return {"copy_gbps": round(copied / elapsed / 1024 ** 3, 2), "buffer_mb": BENCHMARK_MEMORY_MB}
+
+def _drop_cache(fd):
+    # Linux only; elsewhere reads may partly come from the file cache and read faster
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+def benchmark_disk():
+    """Sequential and random 4 KiB I/O against a temp file on the system drive"""
+    chunk = os.urandom(1024 * 1024)
+    block = os.urandom(BENCHMARK_IO_BLOCK)
+    directory = tempfile.gettempdir()
+    flags = os.O_RDWR | getattr(os, "O_BINARY", 0)
+    handle, path = tempfile.mkstemp(prefix="specscorex-bench-", dir=directory)
+    os.close(handle)
+    fd = os.open(path, flags)
+    try:
+        # Sequential write, flushed to the device
+        written = 0
+        start = time.perf_counter()
+        while written < BENCHMARK_DISK_MB * 1024 * 1024 and time.perf_counter() - start < BENCHMARK_DISK_SECONDS:
+            written += os.write(fd, chunk)
+        os.fsync(fd)
+        seq_write = written / (time.perf_counter() - start) / 1024 ** 2
+
+        # Sequential read of what was written
+        _drop_cache(fd)
+        os.lseek(fd, 0, os.SEEK_SET)
+        read = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < BENCHMARK_DISK_SECONDS:
+            data = os.read(fd, len(chunk))
+            if not data:
+                break
+            read += len(data)
+        seq_read = read / (time.perf_counter() - start) / 1024 ** 2
+
+        blocks = max(1, written // BENCHMARK_IO_BLOCK)
+
+        # Random synchronous 4 KiB writes (each one flushed, as a database commit would)
+        operations = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < BENCHMARK_DISK_SECONDS / 2:
+            os.lseek(fd, random.randrange(blocks) * BENCHMARK_IO_BLOCK, os.SEEK_SET)
+            os.write(fd, block)
+            os.fsync(fd)
+            operations += 1
+        rand_write = operations / (time.perf_counter() - start)
+
+        # Random 4 KiB reads
+        _drop_cache(fd)
+        operations = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < BENCHMARK_DISK_SECONDS / 2:
+            os.lseek(fd, random.randrange(blocks) * BENCHMARK_IO_BLOCK, os.SEEK_SET)
+            os.read(fd, BENCHMARK_IO_BLOCK)
+            operations += 1
+        rand_read = operations / (time.perf_counter() - start)
+    finally:
+        os.close(fd)
+        os.unlink(path)
+
+    return {
+        "path": directory,
+        "file_mb": round(written / 1024 ** 2),
+        "seq_write_mbps": round(seq_write, 1),
+        "seq_read_mbps": round(seq_read, 1),
+        "rand_write_iops": round(rand_write),
+        "rand_read_iops": round(rand_read)
+    }
+
+def run_benchmarks():
+    """Run every benchmark; a failing one is reported without stopping the others"""
+    results = {"version": BENCHMARK_VERSION, "timestamp": datetime.now().isoformat()}
+    start = time.perf_counter()
+    for name, benchmark in (("cpu", benchmark_cpu), ("memory", benchmark_memory), ("disk", benchmark_disk)):
+        print(f"[*] Benchmarking {name}...")
+        try:
+            results[name] = benchmark()
+        except Exception as e:
+            print(f"[!] {name} benchmark failed: {e}")
+            results[name] = {"error": str(e)}
+    results["duration_s"] = round(time.perf_counter() - start, 1)
+    return results
+
 def merge_data(python_data, powershell_data):
     """Merge Python and PowerShell data"""
     return {
@@ -670,25 +1127,264 @@ def merge_data(python_data, powershell_data):
         "powershell_collected": powershell_data
     }
 
-def send_to_backend(data, retries=3):
-    """Send merged data to backend with retry support"""
-    headers = {'Content-Type': 'application/json'}
-    for attempt in range(1, retries + 1):
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt, retry_after=None):
+    """Full-jitter exponential backoff; a server Retry-After is a lower bound"""
+    delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+    if retry_after is not None:
+        # Spread agents over a short window after the server's hint instead of all at once
+        delay = min(retry_after, BACKOFF_CAP * 5) + random.uniform(0, BACKOFF_BASE)
+    return delay
+
+def load_spool():
+    """Spooled snapshots, oldest first, as (path, entry) pairs"""
+    try:
+        names = sorted(name for name in os.listdir(SPOOL_DIR) if name.endswith(".json"))
+    except FileNotFoundError:
+        return []
+
+    entries = []
+    for name in names[:MAX_BATCH_SIZE - 1]:
+        path = os.path.join(SPOOL_DIR, name)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entries.append((path, json.load(f)))
+        except (OSError, ValueError):
+            # Unreadable leftovers would block the spool forever
+            os.unlink(path)
+    return entries
+
+def write_spool_file(directory, snapshot):
+    """Atomically write a snapshot into ``directory``, dropping the oldest beyond MAX_SPOOL_FILES"""
+    os.makedirs(directory, exist_ok=True)
+    name = f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{snapshot['idempotency_key']}.json"
+    temp_path = os.path.join(directory, name + ".tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+    os.replace(temp_path, os.path.join(directory, name))
+
+    spooled = sorted(name for name in os.listdir(directory) if name.endswith(".json"))
+    for old_name in spooled[:-MAX_SPOOL_FILES]:
+        os.unlink(os.path.join(directory, old_name))
+    return min(len(spooled), MAX_SPOOL_FILES)
+
+def spool_snapshot(snapshot):
+    """Persist a snapshot that could not be uploaded, keeping the spool bounded"""
+    pending = write_spool_file(SPOOL_DIR, snapshot)
+    print(f"[*] Snapshot spooled to {SPOOL_DIR} ({pending} pending).")
+
+def quarantine_snapshot(snapshot, reason, path=None):
+    """Move a snapshot the backend will not accept out of the spool, noting why"""
+    write_spool_file(QUARANTINE_DIR, {**snapshot, "rejected": reason})
+    if path:
         try:
-            response = requests.post(API_ENDPOINT, json=data, headers=headers, timeout=10)
+            os.unlink(path)
+        except OSError:
+            pass
+    print(f"[!] Snapshot {snapshot.get('idempotency_key')} quarantined in {QUARANTINE_DIR}: {reason}")
+
+def rejection_reason(response):
+    return f"HTTP {response.status_code}: {response_text(response)[:200]}" if response is not None else "rejected"
+
+def note_replay_failure(path, entry):
+    """Count a spooled snapshot the backend failed to store; quarantine it once it keeps failing"""
+    failures = entry.get("replay_failures", 0) + 1
+    if failures >= MAX_REPLAY_FAILURES:
+        quarantine_snapshot(entry, f"not stored after {failures} replays", path)
+        return
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({**entry, "replay_failures": failures}, f)
+    os.replace(temp_path, path)
+
+def encode_body(body):
+    """(bytes, headers) for an upload, in MessagePack when enabled, else JSON"""
+    if use_msgpack:
+        return (msgpack.packb(body, use_bin_type=True),
+                {'Content-Type': MSGPACK_MIMETYPE, 'Accept': f'{MSGPACK_MIMETYPE}, application/json;q=0.9'})
+    return json.dumps(body).encode('utf-8'), {'Content-Type': 'application/json'}
+
+def response_body(response):
+    """Decoded server answer, MessagePack or JSON; None if it is neither"""
+    try:
+        if msgpack is not None and response.headers.get('Content-Type', '').startswith(MSGPACK_MIMETYPE):
+            return msgpack.unpackb(response.content, raw=False)
+        return response.json()
+    except ValueError:
+        return None
+
+def response_text(response):
+    """Server response for the console, decoding MessagePack answers"""
+    if msgpack is not None and response.headers.get('Content-Type', '').startswith(MSGPACK_MIMETYPE):
+        body = response_body(response)
+        if body is not None:
+            return json.dumps(body)
+    return response.text
+
+def report_upload(trace_id, timings):
+    """Tell the backend how long the traced upload took; best effort, one short attempt"""
+    payload, headers = encode_body(timings)
+    try:
+        requests.post(f"{TRACES_ENDPOINT}/{trace_id}/upload", data=payload, headers=headers, timeout=5)
+    except requests.exceptions.RequestException as e:
+        print(f"[!] Could not report upload timings: {e}")
+
+def post_upload(url, body, extra_headers, retries, trace_id=None):
+    """POST one upload with retry and backoff; returns (outcome, response).
+
+    The outcome is "ok", "unsupported" for a 404/405, "rejected" for any other
+    answer retrying will not change, or "failed" once the retries are used up.
+    """
+    global use_msgpack
+    if trace_id:
+        extra_headers = {**extra_headers, TRACE_HEADER: trace_id}
+
+    attempt = 1
+    while attempt <= retries:
+        retry_after = None
+        started = time.perf_counter()
+        payload, headers = encode_body(body)
+        serialized = time.perf_counter()
+        try:
+            response = requests.post(url, data=payload, headers={**headers, **extra_headers}, timeout=10)
             response.raise_for_status()
+            uploaded = time.perf_counter()
             print("[+] Data sent successfully.")
-            print("[Server Response]:", response.text)
-            return True
+            print("[Server Response]:", response_text(response))
+            if response.headers.get("Server-Timing"):
+                print("[Server Timing]:", response.headers["Server-Timing"])
+            if trace_id:
+                # Timings of the attempt that got through; a batch replay includes the spooled snapshots
+                report_upload(trace_id, {
+                    "serialize_ms": round((serialized - started) * 1000, 1),
+                    "upload_ms": round((uploaded - serialized) * 1000, 1),
+                    "bytes": len(payload),
+                    "attempts": attempt,
+                    "format": "msgpack" if use_msgpack else "json"
+                })
+            return "ok", response
         except requests.exceptions.RequestException as e:
             print(f"[!] Attempt {attempt} failed: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                print("[Server Response]:", e.response.text)
-    
-    print("[!] All attempts to send data failed.")
+            response = getattr(e, 'response', None)
+            if response is not None:
+                print("[Server Response]:", response_text(response))
+                if response.status_code == 415 and use_msgpack:
+                    # Older backend: resend as JSON straight away, without spending an attempt
+                    print("[*] Backend does not accept MessagePack; falling back to JSON.")
+                    use_msgpack = False
+                    continue
+                if response.status_code in UNSUPPORTED_STATUS:
+                    return "unsupported", response
+                if response.status_code not in RETRYABLE_STATUS:
+                    # The payload itself was rejected; retrying will not help
+                    print("[!] Upload rejected by the server.")
+                    return "rejected", response
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+
+        if attempt < retries:
+            delay = backoff_delay(attempt, retry_after)
+            print(f"[*] Retrying in {delay:.1f}s...")
+            time.sleep(delay)
+        attempt += 1
+    return "failed", None
+
+def settle_batch(spooled, snapshot, response):
+    """Drop the spooled snapshots the batch reply reports stored and keep the rest.
+
+    Returns whether the current snapshot was stored; if not, it is spooled.
+    """
+    body = response_body(response)
+    results = body.get("results") if isinstance(body, dict) else None
+    statuses = {result.get("idempotency_key"): result.get("status")
+                for result in results or [] if isinstance(result, dict)}
+    for path, entry in spooled:
+        if statuses.get(entry.get("idempotency_key")) in STORED_STATUSES:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        else:
+            note_replay_failure(path, entry)
+    if statuses.get(snapshot["idempotency_key"]) in STORED_STATUSES:
+        return True
+    print("[!] The backend did not store the current snapshot.")
+    spool_snapshot(snapshot)
+    return False
+
+def replay_singly(spooled):
+    """Replay spooled snapshots one request each, oldest first; False once the backend is unreachable"""
+    for path, entry in spooled:
+        outcome, response = post_upload(API_ENDPOINT, entry.get("payload"),
+                                        {'Idempotency-Key': entry.get("idempotency_key")}, retries=1)
+        if outcome == "failed":
+            return False
+        if outcome == "ok":
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        else:
+            quarantine_snapshot(entry, rejection_reason(response), path)
+    return True
+
+def send_to_backend(data, retries=3):
+    """Send merged data to backend with retry, backoff and offline spooling.
+
+    Snapshots that could not be delivered are spooled and replayed with the
+    next upload; ones the backend refuses are quarantined instead.
+    """
+    global use_batch
+    # Same key on every retry, so the backend can drop uploads it already accepted
+    snapshot = {"idempotency_key": str(uuid.uuid4()), "payload": data}
+    trace_id = (data.get("trace") or {}).get("trace_id")
+    spooled = load_spool()
+
+    if spooled and use_batch:
+        # Replay the backlog and the current snapshot together, oldest first
+        print(f"[*] Replaying {len(spooled)} spooled snapshot(s) with the current one.")
+        body = {"snapshots": [entry for _, entry in spooled] + [snapshot]}
+        outcome, response = post_upload(BATCH_ENDPOINT, body, {}, retries, trace_id)
+        if outcome == "ok":
+            return settle_batch(spooled, snapshot, response)
+        if outcome == "failed":
+            print("[!] All attempts to send data failed.")
+            spool_snapshot(snapshot)
+            return False
+        if outcome == "unsupported":
+            use_batch = False
+        # Let the backend judge each snapshot on its own instead
+        print("[*] Batch replay not accepted; replaying spooled snapshots one at a time.")
+
+    if spooled and not replay_singly(spooled):
+        print("[!] Backend unreachable while replaying the spool.")
+        spool_snapshot(snapshot)
+        return False
+
+    outcome, response = post_upload(API_ENDPOINT, data, {'Idempotency-Key': snapshot["idempotency_key"]},
+                                    retries, trace_id)
+    if outcome == "ok":
+        return True
+    if outcome == "failed":
+        print("[!] All attempts to send data failed.")
+        spool_snapshot(snapshot)
+    else:
+        quarantine_snapshot(snapshot, rejection_reason(response))
     return False
 
-def test_powershell_directly():
+def test_powershell_directly(timeout=10):
     """Test PowerShell execution directly for debugging"""
     print("[*] Testing PowerShell execution...")
     
@@ -716,7 +1412,7 @@ def test_powershell_directly():
             "-NoProfile", 
             "-NonInteractive",
             "-File", temp_script_path
-        ], capture_output=True, text=True, timeout=10)
+        ], capture_output=True, text=True, timeout=timeout)
         
         print(f"[DEBUG] Test exit code: {result.returncode}")
         print(f"[DEBUG] Test stdout: {result.stdout}")
@@ -735,16 +1431,43 @@ def test_powershell_directly():
         print(f"[!] PowerShell test error: {e}")
         return False
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="SpecScoreX system info agent")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Also run short CPU, memory and disk benchmarks (about 20 seconds)")
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    # Required for the benchmark's process pool in the PyInstaller build
+    freeze_support()
+    args = parse_args()
     print("[*] Starting system info agent...")
     
+    # Follows this snapshot from collection through upload to storage on the backend
+    trace = {"trace_id": uuid.uuid4().hex, "started_at": datetime.now(timezone.utc).isoformat(), "stages": {}}
+    print(f"[*] Trace id: {trace['trace_id']}")
+    run = CollectionRun()
+
     # Test PowerShell first
-    if not test_powershell_directly():
+    if not run.run("powershell_test", test_powershell_directly, run.budget("powershell_test")):
         print("[!] PowerShell test failed. Continuing with Python-only data...")
     
-    python_info = collect_python_system_info()
-    powershell_info = run_embedded_powershell_script()
+    # The PowerShell script runs alongside the Python collectors; its own
+    # timeout kills the process when the budget runs out
+    run.start("powershell", run_embedded_powershell_script, run.budget("powershell"))
+    started = time.perf_counter()
+    python_info = collect_python_system_info(run)
+    trace["stages"]["python_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    powershell_info = run.result("powershell", {"error": "PowerShell script execution timed out"})
     final_data = merge_data(python_info, powershell_info)
+    final_data["collection_status"] = run.summary()
+    trace["stages"]["powershell_ms"] = run.status.get("powershell", {}).get("ms")
+    trace["stages"]["collection_ms"] = final_data["collection_status"]["elapsed_ms"]
+    if args.benchmark:
+        started = time.perf_counter()
+        final_data["benchmark"] = run_benchmarks()
+        trace["stages"]["benchmark_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    final_data["trace"] = trace
 
     if SEND_TO_API:
         if send_to_backend(final_data):
@@ -0,0 +1,112 @@
+import json
+import os
+
+import pytest
+import requests
+
+import spec_collector as agent
+
+
+def _response(status, body=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers['Content-Type'] = 'application/json'
+    response._content = json.dumps(body or {}).encode('utf-8')
+    response.url = 'http://backend'
+    return response
+
+
+class FakeBackend:
+    """Stands in for requests.post: answers from a per-URL handler and records the requests"""
+
+    def __init__(self, handlers):
+        self.handlers = handlers
+        self.requests = []
+
+    def __call__(self, url, data=None, headers=None, timeout=None):
+        body = json.loads(data)
+        self.requests.append((url, body, headers))
+        handler = self.handlers.get(url, lambda body: _response(200))
+        return handler(body)
+
+
+@pytest.fixture
+def spool(tmp_path, monkeypatch):
+    monkeypatch.setattr(agent, 'SPOOL_DIR', str(tmp_path / 'spool'))
+    monkeypatch.setattr(agent, 'QUARANTINE_DIR', str(tmp_path / 'spool' / 'rejected'))
+    monkeypatch.setattr(agent, 'use_msgpack', False)
+    monkeypatch.setattr(agent, 'use_batch', True)
+    monkeypatch.setattr(agent.time, 'sleep', lambda seconds: None)
+    return tmp_path / 'spool'
+
+
+def _backend(monkeypatch, handlers):
+    backend = FakeBackend(handlers)
+    monkeypatch.setattr(agent.requests, 'post', backend)
+    return backend
+
+
+def _spooled_keys(directory):
+    if not directory.exists():
+        return []
+    return [json.loads(path.read_text())['idempotency_key'] for path in sorted(directory.glob('*.json'))]
+
+
+def test_unreachable_backend_spools_the_snapshot(spool, monkeypatch):
+    def down(body):
+        raise requests.exceptions.ConnectionError("refused")
+    _backend(monkeypatch, {agent.API_ENDPOINT: down})
+
+    assert agent.send_to_backend({'n': 1}, retries=2) is False
+    assert len(_spooled_keys(spool)) == 1
+
+
+def test_rejected_snapshot_is_quarantined_not_lost(spool, monkeypatch):
+    _backend(monkeypatch, {agent.API_ENDPOINT: lambda body: _response(422, {'error': 'bad payload'})})
+
+    assert agent.send_to_backend({'n': 1}) is False
+    assert _spooled_keys(spool) == []
+    quarantined = [json.loads(path.read_text()) for path in (spool / 'rejected').glob('*.json')]
+    assert quarantined[0]['payload'] == {'n': 1}
+    assert quarantined[0]['rejected'].startswith('HTTP 422')
+
+
+def test_batch_reply_only_clears_stored_snapshots(spool, monkeypatch):
+    agent.spool_snapshot({'idempotency_key': 'good', 'payload': {'n': 1}})
+    agent.spool_snapshot({'idempotency_key': 'bad', 'payload': {'n': 2}})
+
+    def batch(body):
+        return _response(200, {'results': [
+            {'idempotency_key': entry['idempotency_key'],
+             'status': 'error' if entry['idempotency_key'] == 'bad' else 'stored'}
+            for entry in body['snapshots']]})
+    _backend(monkeypatch, {agent.BATCH_ENDPOINT: batch})
+
+    assert agent.send_to_backend({'n': 3}) is True
+    assert _spooled_keys(spool) == ['bad']
+    assert json.loads(next(spool.glob('*.json')).read_text())['replay_failures'] == 1
+
+
+def test_snapshot_failing_every_replay_is_quarantined(spool, monkeypatch):
+    agent.spool_snapshot({'idempotency_key': 'bad', 'payload': {'n': 1},
+                          'replay_failures': agent.MAX_REPLAY_FAILURES - 1})
+    _backend(monkeypatch, {agent.BATCH_ENDPOINT: lambda body: _response(200, {'results': [
+        {'idempotency_key': 'bad', 'status': 'error'},
+        {'idempotency_key': body['snapshots'][-1]['idempotency_key'], 'status': 'stored'}]})})
+
+    assert agent.send_to_backend({'n': 2}) is True
+    assert _spooled_keys(spool) == []
+    assert _spooled_keys(spool / 'rejected') == ['bad']
+
+
+def test_backend_without_batch_endpoint_gets_single_uploads(spool, monkeypatch):
+    agent.spool_snapshot({'idempotency_key': 'old', 'payload': {'n': 1}})
+    backend = _backend(monkeypatch, {agent.BATCH_ENDPOINT: lambda body: _response(404)})
+
+    assert agent.send_to_backend({'n': 2}) is True
+    assert agent.use_batch is False
+    assert [(url, headers.get('Idempotency-Key')) for url, _, headers in backend.requests[1:]] == [
+        (agent.API_ENDPOINT, 'old'), (agent.API_ENDPOINT, backend.requests[-1][2]['Idempotency-Key'])]
+    assert backend.requests[-1][1] == {'n': 2}
+    assert _spooled_keys(spool) == []
+    assert not os.path.exists(agent.QUARANTINE_DIR)
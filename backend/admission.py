@@ -0,0 +1,184 @@
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # No flock on Windows; slots are then counted per process
+    fcntl = None
+
+BUCKET_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+# Idle buckets are deleted after this many refill periods; a missing bucket is a full one
+BUCKET_IDLE_PERIODS = 2
+BUCKET_PRUNE_EVERY = 1000
+
+# How often a queued request re-checks for a free slot
+SLOT_POLL_INTERVAL = 0.02
+
+
+class RateLimiter:
+    """Token buckets shared by every worker process through a small SQLite file.
+
+    Each key holds up to ``burst`` tokens and refills at ``rate`` tokens per
+    second. The state is disposable, so the file is written without fsync.
+    """
+
+    def __init__(self, path, rate, burst):
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self._local = threading.local()
+        self._calls = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(BUCKET_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        return conn
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def acquire(self, key, cost=1):
+        """Take ``cost`` tokens for ``key``; return 0 if allowed, else seconds until it would be"""
+        if self.rate <= 0:
+            return 0
+        now = time.time()
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                tokens = self.burst
+            else:
+                tokens = min(self.burst, row[0] + max(0.0, now - row[1]) * self.rate)
+
+            if tokens >= cost:
+                tokens -= cost
+                wait = 0
+            else:
+                wait = (cost - tokens) / self.rate
+            conn.execute(
+                "INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (key, tokens, now)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        self._calls += 1
+        if self._calls % BUCKET_PRUNE_EVERY == 0:
+            self.prune(now)
+        return wait
+
+    def prune(self, now=None):
+        """Drop buckets idle long enough to have refilled completely"""
+        now = now or time.time()
+        idle = BUCKET_IDLE_PERIODS * self.burst / self.rate
+        self.connection().execute("DELETE FROM buckets WHERE updated < ?", (now - idle,))
+
+
+class ConcurrencyLimiter:
+    """A fixed pool of slots shared by every worker process.
+
+    A slot is an exclusive flock on one of ``slots`` files, so a worker that
+    dies releases its slots with its file descriptors. Requests that find the
+    pool full wait up to ``queue_timeout`` seconds, and at most ``max_waiting``
+    of them per process, before being turned away.
+    """
+
+    def __init__(self, directory, name, slots, queue_timeout=0.5, max_waiting=32):
+        self.directory = directory
+        self.name = name
+        self.slots = slots
+        self.queue_timeout = queue_timeout
+        self.max_waiting = max_waiting
+        self._lock = threading.Lock()
+        self._held = set()
+        self._files = {}
+        self._pid = None
+        self._waiting = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def retry_after(self):
+        # Whole seconds, as the header requires; jitter keeps rejected clients from returning together
+        return math.ceil(max(self.queue_timeout, 1) + random.uniform(0, 1))
+
+    def _file(self, index):
+        # Descriptors opened before a fork would share their lock with the parent
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._files = {}
+            self._held = set()
+        handle = self._files.get(index)
+        if handle is None:
+            path = os.path.join(self.directory, f"{self.name}.{index}.slot")
+            handle = self._files[index] = open(path, 'a')
+        return handle
+
+    def try_acquire(self):
+        """Index of a free slot now held by the caller, or None if all are taken"""
+        with self._lock:
+            start = random.randrange(self.slots)
+            for offset in range(self.slots):
+                index = (start + offset) % self.slots
+                if index in self._held:
+                    continue
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(self._file(index).fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue
+                self._held.add(index)
+                return index
+        return None
+
+    def acquire(self):
+        """Wait up to queue_timeout for a slot; None if the pool stayed full"""
+        index = self.try_acquire()
+        if index is not None or self.queue_timeout <= 0:
+            return index
+
+        with self._lock:
+            if self._waiting >= self.max_waiting:
+                return None
+            self._waiting += 1
+        try:
+            deadline = time.monotonic() + self.queue_timeout
+            while time.monotonic() < deadline:
+                time.sleep(SLOT_POLL_INTERVAL * random.uniform(0.5, 1.5))
+                index = self.try_acquire()
+                if index is not None:
+                    return index
+            return None
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def release(self, index):
+        with self._lock:
+            if index not in self._held:
+                return
+            self._held.discard(index)
+            if fcntl is not None:
+                fcntl.flock(self._file(index).fileno(), fcntl.LOCK_UN)
+
@@ -0,0 +1,252 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+from collections import Counter
+
+ANOMALY_SCHEMA = """
+-- Exponentially weighted mean and variance of each metric, one row per host and metric
+CREATE TABLE IF NOT EXISTS metric_state (
+    host_id TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    observations INTEGER NOT NULL,
+    mean REAL NOT NULL,
+    variance REAL NOT NULL,
+    last_value REAL NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (host_id, metric)
+);
+
+-- Installed components as last seen, one row per host and component kind
+CREATE TABLE IF NOT EXISTS component_state (
+    host_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    components TEXT NOT NULL,
+    PRIMARY KEY (host_id, kind)
+);
+
+CREATE TABLE IF NOT EXISTS anomalies (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    host_id TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    detected_at REAL NOT NULL,
+    detail TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_anomalies_host ON anomalies (host_id, id);
+CREATE INDEX IF NOT EXISTS idx_anomalies_detected_at ON anomalies (detected_at, id);
+"""
+
+# Weight of the newest observation; ~1/alpha snapshots make up the baseline
+EWMA_ALPHA = 0.2
+# Observations a metric needs before deviations from it are flagged
+WARMUP_OBSERVATIONS = 5
+Z_THRESHOLD = 3.0
+
+# Smallest change worth flagging, in the metric's own unit, so a host that
+# never moves (variance ~0) is not flagged for a one-point wobble
+MIN_DELTA = {
+    'ram_usage_percent': 15.0,
+    'cpu_usage': 30.0,
+    'disk_usage_percent': 5.0,
+}
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def _as_list(value):
+    # PowerShell serializes a single item as an object rather than a one-item array
+    if isinstance(value, dict):
+        return [value]
+    return [item for item in value or [] if isinstance(item, dict)]
+
+
+def extract_metrics(view):
+    """metric name -> value for one SystemDataExtractor view"""
+    hardware = view.get('hardware', {})
+    memory = hardware.get('memory', {})
+    metrics = {}
+    if memory.get('total_ram'):
+        metrics['ram_usage_percent'] = memory.get('usage_percent')
+    metrics['cpu_usage'] = hardware.get('cpu', {}).get('usage')
+    for disk in view.get('storage', {}).get('logical_disks', []):
+        if disk.get('total_size'):
+            metrics[f"disk_usage_percent:{disk.get('mountpoint')}"] = disk.get('usage_percent')
+    return {name: float(value) for name, value in metrics.items() if isinstance(value, (int, float))}
+
+
+def extract_components(view):
+    """component kind -> sorted descriptions of what is installed"""
+    hardware = view.get('hardware', {})
+    modules = [
+        f"{module.get('Manufacturer', '').strip()} {round((module.get('Capacity') or 0) / 1024 ** 3, 1)} GB "
+        f"{module.get('Speed') or '?'} MHz".strip()
+        for module in _as_list(hardware.get('memory', {}).get('module_info'))
+    ]
+    gpus = [str(gpu.get('Name', '')).strip() for gpu in _as_list(hardware.get('graphics'))]
+    disks = [f"{disk.get('Model', '').strip()} {disk.get('SizeGB', '?')} GB"
+             for disk in _as_list(view.get('storage', {}).get('physical_disks'))]
+    cpu = hardware.get('cpu', {}).get('name')
+    components = {'memory_modules': modules, 'gpus': gpus, 'physical_disks': disks,
+                  'cpu': [cpu] if cpu and cpu != 'Unknown Processor' else []}
+    # A kind the agent did not report at all is unknown, not removed
+    return {kind: sorted(items) for kind, items in components.items() if items}
+
+
+def _metric_kind(metric):
+    return metric.partition(':')[0]
+
+
+class AnomalyDetector:
+    """Incremental per-host anomaly detection, run on every stored snapshot.
+
+    Each metric keeps an exponentially weighted mean and variance, and each
+    component kind keeps the last seen inventory. An observation reads and
+    rewrites only that host's rows, so its cost does not grow with history.
+    """
+
+    def __init__(self, path, alpha=EWMA_ALPHA, z_threshold=Z_THRESHOLD, warmup=WARMUP_OBSERVATIONS):
+        self.path = path
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.warmup = warmup
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(ANOMALY_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _update_metric(self, state, value):
+        """New (observations, mean, variance) and the anomaly detail, if any"""
+        if state is None:
+            return (1, value, 0.0), None
+        observations, mean, variance = state['observations'], state['mean'], state['variance']
+        deviation = value - mean
+        std = math.sqrt(variance)
+
+        anomaly = None
+        if observations >= self.warmup and abs(deviation) >= MIN_DELTA.get(_metric_kind(state['metric']), 0):
+            z = abs(deviation) / std if std else math.inf
+            if z >= self.z_threshold:
+                anomaly = {'value': value, 'expected': round(mean, 2), 'std': round(std, 2),
+                           'z': round(z, 1) if std else None,
+                           'direction': 'rise' if deviation > 0 else 'drop'}
+
+        increment = self.alpha * deviation
+        mean += increment
+        variance = (1 - self.alpha) * (variance + deviation * increment)
+        return (observations + 1, mean, variance), anomaly
+
+    def observe(self, host_id, view, observed_at):
+        """Fold one snapshot view into the host's state; return the anomalies it raised"""
+        metrics = extract_metrics(view)
+        components = extract_components(view)
+        found = []
+
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            states = {row['metric']: row for row in conn.execute(
+                "SELECT * FROM metric_state WHERE host_id = ?", (host_id,))}
+            for metric, value in metrics.items():
+                (observations, mean, variance), anomaly = self._update_metric(states.get(metric), value)
+                conn.execute(
+                    """INSERT INTO metric_state (host_id, metric, observations, mean, variance, last_value, updated)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT(host_id, metric) DO UPDATE SET
+                           observations = excluded.observations, mean = excluded.mean,
+                           variance = excluded.variance, last_value = excluded.last_value,
+                           updated = excluded.updated""",
+                    (host_id, metric, observations, mean, variance, value, observed_at)
+                )
+                if anomaly:
+                    found.append((metric, 'deviation', anomaly))
+
+            known = {row['kind']: json.loads(row['components']) for row in conn.execute(
+                "SELECT kind, components FROM component_state WHERE host_id = ?", (host_id,))}
+            for kind, items in components.items():
+                previous = known.get(kind)
+                if previous == items:
+                    continue
+                if previous is not None:
+                    removed = list((Counter(previous) - Counter(items)).elements())
+                    added = list((Counter(items) - Counter(previous)).elements())
+                    found.append((kind, 'component_change', {'removed': removed, 'added': added}))
+                conn.execute(
+                    "INSERT INTO component_state (host_id, kind, components) VALUES (?, ?, ?) "
+                    "ON CONFLICT(host_id, kind) DO UPDATE SET components = excluded.components",
+                    (host_id, kind, json.dumps(items))
+                )
+
+            conn.executemany(
+                "INSERT INTO anomalies (host_id, metric, kind, detected_at, detail) VALUES (?, ?, ?, ?, ?)",
+                [(host_id, metric, kind, observed_at, json.dumps(detail)) for metric, kind, detail in found]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return [{'metric': metric, 'kind': kind, **detail} for metric, kind, detail in found]
+
+    def recent(self, host_id=None, since=None, limit=DEFAULT_LIMIT):
+        """Newest anomalies first, for one host or the whole fleet"""
+        clauses, params = [], []
+        if host_id is not None:
+            clauses.append("host_id = ?")
+            params.append(host_id)
+        if since is not None:
+            clauses.append("detected_at >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self.connection().execute(
+            f"SELECT * FROM anomalies {where} ORDER BY id DESC LIMIT ?",
+            [*params, max(1, min(limit, MAX_LIMIT))]
+        ).fetchall()
+        return [{'id': row['id'], 'host_id': row['host_id'], 'metric': row['metric'], 'kind': row['kind'],
+                 'detected_at': row['detected_at'], **json.loads(row['detail'])} for row in rows]
+
+    def prune(self, before, limit):
+        """Delete up to ``limit`` anomalies detected before ``before``; returns how many"""
+        return self.connection().execute(
+            "DELETE FROM anomalies WHERE id IN (SELECT id FROM anomalies WHERE detected_at < ? ORDER BY id LIMIT ?)",
+            (before, limit)
+        ).rowcount
+
+    def forget_hosts(self, host_ids):
+        """Drop the baselines of hosts removed from the store"""
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table in ('metric_state', 'component_state'):
+                conn.executemany(f"DELETE FROM {table} WHERE host_id = ?", [(host_id,) for host_id in host_ids])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def baseline(self, host_id):
+        """Current per-metric state of a host"""
+        rows = self.connection().execute(
+            "SELECT metric, observations, mean, variance, last_value FROM metric_state WHERE host_id = ?",
+            (host_id,)
+        ).fetchall()
+        return {row['metric']: {'observations': row['observations'], 'mean': round(row['mean'], 2),
+                                'std': round(math.sqrt(row['variance']), 2), 'last_value': row['last_value']}
+                for row in rows}
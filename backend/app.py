@@ -1,147 +1,961 @@
-from flask import Flask, request, jsonify, render_template, redirect
-from flask import send_from_directory
+from flask import Flask, request, jsonify, redirect
+from flask import send_from_directory, send_file, Response, stream_with_context, url_for
+from jinja2 import FileSystemBytecodeCache
+from werkzeug.exceptions import BadRequest, HTTPException, UnsupportedMediaType
 
 from flask_cors import CORS
+import click
+import base64
+import functools
+import hashlib
+import hmac
 import json
 import sqlite3
 from datetime import datetime
 import logging
+import logging.handlers
+import mimetypes
 import os
+import threading
 from typing import Dict, Any
 
+from admission import ConcurrencyLimiter, RateLimiter
+from anomaly import AnomalyDetector
+from archive import SnapshotArchive
+from assets import AssetManifest
+from export import FORMATS as EXPORT_FORMATS, PARQUET_AVAILABLE, stream_export
+from ingest import content_hash
+from live import BroadcastHub, snapshot_id
+from maintenance import MaintenanceJob
+from pdf_export import PdfExportJobs
+from projection import parse_fields, project
+from quick_scan import quick_scan
+from rating_engine import rate_system
+from render_cache import RenderCache
+from rescore import RescoreJob
+from snapshot_index import SnapshotIndex
+from store import open_store, parse_search_args
+from tracing import TRACE_HEADER, StageTimer, TraceStore, trace_id_for
+from wire import NegotiatingJSONProvider, decode_body
+
 # Ensure logs directory exists
 os.makedirs("logs", exist_ok=True)
 
 app = Flask(__name__, 
             static_folder='static',
             template_folder='templates')
+
+# Persist compiled templates so restarted workers skip the Jinja compile step
+os.makedirs(os.path.join(app.instance_path, 'jinja_cache'), exist_ok=True)
+app.jinja_options = {
+    **app.jinja_options,
+    'bytecode_cache': FileSystemBytecodeCache(os.path.join(app.instance_path, 'jinja_cache'))
+}
+# jsonify() answers in MessagePack to clients that prefer it
+app.json = NegotiatingJSONProvider(app)
 CORS(app)
 
-# Load data from JSON file
-def load_data():
+DATA_FILE = 'data.json'
+LATEST_HOST = 'latest'
+
+# Rendered pages are cached per (template, host, snapshot version, template version)
+RENDER_CACHE_SIZE = int(os.environ.get('RENDER_CACHE_SIZE', 128))
+# Number of template events buffered per streamed chunk on a cache miss
+RENDER_STREAM_BUFFER = 16
+render_cache = RenderCache(RENDER_CACHE_SIZE)
+
+# Fingerprint and pre-compress static CSS/JS once at startup (also runnable as `python assets.py`)
+STATIC_MAX_AGE = 31536000
+assets = AssetManifest(app.static_folder)
+assets.build()
+
+@app.template_global()
+def asset_url(filename):
+    return url_for('static', filename=assets.url_path(filename))
+
+# Live report updates over Server-Sent Events
+LIVE_HEARTBEAT = int(os.environ.get('LIVE_HEARTBEAT', 15))
+# How often live streams look for snapshots other workers stored; with the shared
+# index this is a read of its change counter until something was published
+LIVE_POLL_INTERVAL = float(os.environ.get('LIVE_POLL_INTERVAL', 1))
+live_hub = BroadcastHub()
+
+# Per-host snapshots and their indexed search columns
+# SPECSCOREX_SHARDS > 1 splits the store into one SQLite file (and writer) per shard
+store = open_store(os.environ.get('SPECSCOREX_DB', os.path.join(app.instance_path, 'specscorex.db')),
+                   int(os.environ.get('SPECSCOREX_SHARDS', 1)))
+
+# Admission control, shared across gunicorn workers through files in the instance folder:
+# a token bucket per host on ingest, and separate slot pools so an ingest flood
+# cannot take the capacity reserved for report pages and read APIs
+INGEST_RATE_PER_MINUTE = float(os.environ.get('INGEST_RATE_PER_MINUTE', 6))
+INGEST_BURST = int(os.environ.get('INGEST_BURST', 10))
+INGEST_CONCURRENCY = int(os.environ.get('INGEST_CONCURRENCY', 4))
+READ_CONCURRENCY = int(os.environ.get('READ_CONCURRENCY', 16))
+# Streamed exports hold their slot for as long as the client takes to download,
+# so they get a pool of their own rather than tying up read slots
+EXPORT_CONCURRENCY = int(os.environ.get('EXPORT_CONCURRENCY', 2))
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', 0.5))
+admission_dir = os.path.join(app.instance_path, 'admission')
+ingest_limiter = RateLimiter(os.path.join(admission_dir, 'buckets.db'),
+                             INGEST_RATE_PER_MINUTE / 60, INGEST_BURST)
+ingest_slots = ConcurrencyLimiter(admission_dir, 'ingest', INGEST_CONCURRENCY, ADMISSION_QUEUE_TIMEOUT)
+read_slots = ConcurrencyLimiter(admission_dir, 'read', READ_CONCURRENCY, ADMISSION_QUEUE_TIMEOUT)
+export_slots = ConcurrencyLimiter(admission_dir, 'export', EXPORT_CONCURRENCY, ADMISSION_QUEUE_TIMEOUT)
+
+def too_many_requests(message, retry_after):
+    retry_after = max(1, int(retry_after + 0.999))
+    response = jsonify({"error": message, "retry_after": retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def admit(pool):
+    """Run the view only while holding a slot from ``pool``; answer 429 when saturated"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            index = pool.acquire()
+            if index is None:
+                return too_many_requests("Server is busy, try again later", pool.retry_after)
+            try:
+                response = app.make_response(view(*args, **kwargs))
+            except Exception:
+                pool.release(index)
+                raise
+            if response.is_streamed:
+                # Streamed bodies are produced after the view returns; hold the slot until then
+                response.call_on_close(lambda: pool.release(index))
+            else:
+                pool.release(index)
+            return response
+        return wrapper
+    return decorator
+
+def check_ingest_rate(host_id):
+    """429 response if this host has used up its upload budget, else None"""
+    key = host_id if host_id != 'Unknown' else f"addr:{request.remote_addr}"
+    wait = ingest_limiter.acquire(key)
+    if wait:
+        app.logger.warning(f"[WARN] Ingest rate limit hit for {key}")
+        return too_many_requests("Upload rate limit exceeded for this host", wait)
+    return None
+
+# Load data from JSON file, or a specific host's snapshot from the store
+def load_data(host=LATEST_HOST):
+    if host != LATEST_HOST:
+        return store.get_payload(host) or {}
     try:
-        with open('data.json', 'r') as file:
+        with open(DATA_FILE, 'r') as file:
             return json.load(file)
-    except FileNotFoundError:
+    except (FileNotFoundError, ValueError):
         return {}
 
-# Add static file route
-@app.route('/static/<path:filename>')
+def save_latest_data(data, version):
+    """Atomically replace DATA_FILE unless a newer upload is already there.
+
+    The file's mtime is set to ``version`` (ns), the version load_view
+    republishes it under, so both orderings agree.
+    """
+    temp_path = f"{DATA_FILE}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(data, f)
+    os.utime(temp_path, ns=(version, version))
+    try:
+        if os.stat(DATA_FILE).st_mtime_ns > version:
+            os.unlink(temp_path)
+            return
+    except FileNotFoundError:
+        pass
+    os.replace(temp_path, DATA_FILE)
+
+# Latest extracted view per host in a memory-mapped file shared by all gunicorn
+# workers, so they read one copy and all see an ingest as soon as it is published
+snapshot_index = SnapshotIndex(os.path.join(app.instance_path, 'snapshot_index.bin'))
+
+def load_view(host=LATEST_HOST, sections=None):
+    """Extracted view of a host's latest snapshot, filling the shared index on a miss.
+
+    ``sections`` is a hint: only those sections are decoded from the shared index,
+    or extracted when there is no index to fill. A miss may return the whole view.
+    """
+    entry = snapshot_index.get(host, sections)
+    if entry is not None:
+        return entry[1]
+
+    if host != LATEST_HOST:
+        entry = store.get_versioned_view(host)
+        if entry is None:
+            return None
+        version, view = entry
+    else:
+        try:
+            version = os.stat(DATA_FILE).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        data = load_data(host)
+        if not data:
+            return None
+        extractor = SystemDataExtractor(data)
+        if sections is not None and not snapshot_index.enabled:
+            return extractor.get_full_data(sections)
+        view = extractor.get_full_data()
+    snapshot_index.publish(host, version, view, if_newer=True)
+    return view
+
+# Sections left out of the content hash (ingest.VOLATILE_FIELDS): an unchanged upload does
+# not rewrite the stored view, so these are read from the host's newest archived upload
+VOLATILE_SECTIONS = ('processes', 'activity', 'collection')
+
+def with_fresh_sections(host, view, sections=VOLATILE_SECTIONS):
+    """``view`` with the volatile ``sections`` it holds replaced by those of the newest upload"""
+    wanted = [name for name in VOLATILE_SECTIONS if name in view and name in sections]
+    if not wanted:
+        return view
+    if host != LATEST_HOST:
+        host_id = host
+    elif 'system' in view:
+        host_id = view['system'].get('host_id')
+    else:
+        host_id = SystemDataExtractor(load_data()).get_host_id()
+    entry = archive.get(host_id) if host_id else None
+    if entry is None:
+        return view
+    extractor = SystemDataExtractor(entry[1])
+    return {**view, **{name: extractor.section(name) for name in wanted}}
+
+def snapshot_version(host=LATEST_HOST):
+    """Cheap version stamp of the stored snapshot, taken without reading it"""
+    version = snapshot_index.version(host)
+    if version is not None:
+        return version
+    if host != LATEST_HOST:
+        return store.get_version(host)
+    try:
+        stat = os.stat(DATA_FILE)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+# Every accepted raw snapshot, kept for auditing and for rebuilding the store
+archive = SnapshotArchive(os.path.join(app.instance_path, 'archive'),
+                          int(os.environ.get('ARCHIVE_SEGMENT_MB', 64)) * 1024 * 1024)
+
+# Per-host baselines of usage metrics and installed components, updated on every stored snapshot
+anomalies = AnomalyDetector(os.path.join(app.instance_path, 'anomaly.db'))
+
+# Stage timings of every upload, from the agent's collection to the backend's storage
+traces = TraceStore(os.path.join(app.instance_path, 'traces.db'))
+
+# Background PDF rendering; results are cached on disk by snapshot hash
+pdf_exports = PdfExportJobs(os.path.join(app.instance_path, 'exports'),
+                            int(os.environ.get('PDF_EXPORT_WORKERS', 0)) or None)
+
+def requested_host():
+    return request.args.get('host') or LATEST_HOST
+
+def template_version(template_name):
+    stat = os.stat(os.path.join(app.root_path, app.template_folder, template_name))
+    # Asset hashes are baked into the rendered HTML, so they version the page too
+    return (stat.st_mtime_ns, assets.version)
+
+def render_page(template_name, host=LATEST_HOST):
+    """Serve a page from the render cache, streaming and caching it on a miss"""
+    key = (template_name, host, snapshot_version(host), template_version(template_name))
+    html = render_cache.get(key)
+    if html is not None:
+        return Response(html, mimetype='text/html')
+
+    view = load_view(host)
+    if not view:
+        context = {name: {} for name in SystemDataExtractor.SECTIONS}
+        context['snapshot_id'] = None
+    else:
+        context = dict(view)
+        context['snapshot_id'] = snapshot_id(view)
+
+    # Stream so the browser receives <head> and the stylesheets before the body is rendered
+    template = app.jinja_env.get_template(template_name)
+    app.update_template_context(context)
+    stream = template.stream(context)
+    stream.enable_buffering(RENDER_STREAM_BUFFER)
+    return Response(stream_with_context(render_cache.stream(key, stream)), mimetype='text/html')
+
+# Static file route: fingerprinted assets get immutable caching and pre-compressed variants
 def static_files(filename):
-    return app.send_static_file(filename)
+    if not assets.is_fingerprinted(filename):
+        return app.send_static_file(filename)
+
+    variant, encoding = assets.negotiate(filename, request.accept_encodings)
+    response = send_from_directory(app.static_folder, variant,
+                                   mimetype=mimetypes.guess_type(filename)[0],
+                                   max_age=STATIC_MAX_AGE)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+        response.headers.pop('Content-Disposition', None)
+    response.headers['Cache-Control'] = f"public, max-age={STATIC_MAX_AGE}, immutable"
+    response.vary.add('Accept-Encoding')
+    return response
+
+# Flask registers its own view for /static first, so route it through ours
+app.view_functions['static'] = static_files
 
 @app.route('/')
+@admit(read_slots)
 def home():
-    data = load_data()
-    if not data:
-        return render_template('index.html', system={}, hardware={}, storage={}, network={}, motherboard={})
-    
-    extractor = SystemDataExtractor(data)
-    full_data = extractor.get_full_data()
-    
-    return render_template('index.html', 
-                         system=full_data['system'],
-                         hardware=full_data['hardware'],
-                         storage=full_data['storage'],
-                         network=full_data['network'],
-                         motherboard=full_data['motherboard'])
+    return render_page('index.html', requested_host())
 
 @app.errorhandler(404)
 def page_not_found(e):
     return redirect('/')
 
-# Setup logging to file
+# Setup logging to file; reopened when maintenance rotates it
+LOG_FILE = './logs/system_info.log'
 logging.basicConfig(
-    filename='./logs/system_info.log',
+    handlers=[logging.handlers.WatchedFileHandler(LOG_FILE)],
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+AGENT_BINARY = 'AgentX.exe'
+# Let a fronting nginx/Apache send the binary itself; gunicorn already uses sendfile(2) otherwise
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', '0') == '1'
+_agent_manifest_cache = {}
+
+def agent_manifest():
+    """SHA-256 manifest of the agent binary, recomputed only when the file changes"""
+    path = os.path.join(app.static_folder, AGENT_BINARY)
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _agent_manifest_cache.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(chunk)
+
+    manifest = {
+        'filename': AGENT_BINARY,
+        'size': stat.st_size,
+        'sha256': sha256.hexdigest(),
+        'modified': datetime.fromtimestamp(stat.st_mtime).isoformat()
+    }
+    _agent_manifest_cache[path] = (stamp, manifest)
+    return manifest
+
 @app.route('/full-system-info', methods=['GET'])
 def download_agent():
-    return send_from_directory("static", "AgentX.exe", as_attachment=True)
+    try:
+        manifest = agent_manifest()
+    except FileNotFoundError:
+        return jsonify({"error": "Agent binary not available"}), 404
 
-@app.route('/api/full-system-info', methods=['POST'])
-def receive_system_info():
+    # The content hash doubles as a strong ETag, so Range/If-Range resumes and
+    # If-None-Match revalidation are handled by send_file's conditional support
+    response = send_from_directory(app.static_folder, AGENT_BINARY, as_attachment=True,
+                                   etag=manifest['sha256'], conditional=True, max_age=0)
+    digest = base64.b64encode(bytes.fromhex(manifest['sha256'])).decode('ascii')
+    response.headers['Repr-Digest'] = f"sha-256=:{digest}:"
+    response.headers['X-Checksum-SHA256'] = manifest['sha256']
+    return response
+
+@app.route('/full-system-info.sha256', methods=['GET'])
+def download_agent_checksum():
     try:
-        data = request.get_json(force=True)
-        if not data:
-            return jsonify({"error": "No JSON payload received"}), 400
+        manifest = agent_manifest()
+    except FileNotFoundError:
+        return jsonify({"error": "Agent binary not available"}), 404
+    # sha256sum-compatible line
+    return Response(f"{manifest['sha256']}  {manifest['filename']}\n", mimetype='text/plain')
 
+@app.route('/api/agent/manifest', methods=['GET'])
+def get_agent_manifest():
+    try:
+        manifest = agent_manifest()
+    except FileNotFoundError:
+        return jsonify({"error": "Agent binary not available"}), 404
+    response = jsonify({**manifest, 'url': url_for('download_agent', _external=True)})
+    response.set_etag(manifest['sha256'])
+    return response.make_conditional(request)
+
+# Largest number of spooled snapshots an agent may replay in one request
+MAX_BATCH_SNAPSHOTS = 100
+
+def record_trace(trace_id, host_id, received, status, data, timer):
+    # Timings are diagnostics; failing to store them must not fail the upload
+    try:
+        traces.record(trace_id, host_id, received.timestamp(), status, data.get('trace'), timer.stages)
+    except sqlite3.Error as e:
+        app.logger.error(f"[ERROR] Failed to record trace {trace_id}: {str(e)}")
+
+def observe_anomalies(host_id, view, received, timestamp):
+    """Fold a snapshot into the host's baselines; a detector failure must not lose the upload"""
+    try:
+        found = anomalies.observe(host_id, view, received.timestamp())
+    except sqlite3.Error as e:
+        app.logger.error(f"[ERROR] Anomaly detection failed for host {host_id}: {str(e)}")
+        return []
+    for anomaly in found:
+        app.logger.warning(f"[{timestamp}] Anomaly on host {host_id}: {json.dumps(anomaly)}")
+    return found
+
+def ingest_snapshot(data, idempotency_key=None, timer=None, trace_header=None):
+    """Store one agent payload and return (status, host_id, response body)
+
+    Each stage is timed into ``timer`` and stored with the upload's trace.
+    """
+    timer = timer or StageTimer()
+    trace_id = trace_id_for(data, trace_header)
+    received = datetime.now()
+    timestamp = received.isoformat()
+    # Orders uploads of the latest snapshot across workers
+    latest_version = int(received.timestamp() * 1_000_000) * 1000
+
+    with timer.stage('dedup'):
+        extractor = SystemDataExtractor(data)
+        host_id = extractor.get_host_id()
+
+        # A retried upload (same key) or an unchanged snapshot only bumps last_seen
+        digest = content_hash(data)
+        if idempotency_key and store.has_ingest_key(host_id, idempotency_key):
+            status = 'duplicate'
+        elif store.get_content_hash(host_id) == digest:
+            status = 'unchanged'
+        else:
+            status = None
+    # The audit archive keeps every accepted upload, unchanged ones included
+    if status != 'duplicate':
+        with timer.stage('archive'):
+            archive.append(host_id, data, received.timestamp())
+    if status:
+        with timer.stage('persist'):
+            version = store.touch(host_id, timestamp, idempotency_key)
+        body = {"status": status, "host_id": host_id, "version": version, "last_seen": timestamp,
+                "trace_id": trace_id}
+        if status == 'unchanged':
+            # Only the snapshot write is skipped; the baselines still need every sample
+            with timer.stage('anomalies'):
+                body['anomalies'] = observe_anomalies(
+                    host_id, extractor.get_full_data(['hardware', 'storage']), received, timestamp)
+        app.logger.info(f"[{timestamp}] System Info {status} for host {host_id} (trace {trace_id})")
+        record_trace(trace_id, host_id, received, status, data, timer)
+        return status, host_id, body
+
+    with timer.stage('log'):
         # Log raw data
-        timestamp = datetime.now().isoformat()
-        app.logger.info(f"[{timestamp}] System Info Received:\n{json.dumps(data, indent=2)}")
+        app.logger.info(f"[{timestamp}] System Info Received (trace {trace_id}):\n{json.dumps(data, indent=2)}")
 
         # Save the data to a file
-        with open('data.json', 'w') as f:
-            json.dump(data, f)
+        save_latest_data(data, latest_version)
 
-        # Create extractor object
-        extractor = SystemDataExtractor(data)
+    with timer.stage('extract'):
         full_data = extractor.get_full_data()
+        rating = rate_system(full_data)
+
+    # Index it for fleet search
+    with timer.stage('persist'):
+        version = store.save_snapshot(host_id, data, full_data, rating, received_at=timestamp,
+                                      content_hash=digest, idempotency_key=idempotency_key)
+
+    # Compare against the host's baseline
+    with timer.stage('anomalies'):
+        found = observe_anomalies(host_id, full_data, received, timestamp)
+
+    with timer.stage('publish'):
+        # Publish to every worker's view of this host and of the latest upload
+        snapshot_index.publish(host_id, version, full_data)
+        snapshot_index.publish(LATEST_HOST, latest_version, full_data, if_newer=True)
+
+        # Push the changed sections to live report viewers of this host
+        live_hub.publish(host_id, full_data, version)
+
+    record_trace(trace_id, host_id, received, 'stored', data, timer)
+    return 'stored', host_id, {**full_data, 'rating': rating, 'anomalies': found, 'trace_id': trace_id}
+
+@app.route('/api/full-system-info', methods=['POST'])
+@admit(ingest_slots)
+def receive_system_info():
+    timer = StageTimer()
+    try:
+        with timer.stage('parse'):
+            data = decode_body(request)
+    except HTTPException as e:
+        return jsonify({"error": e.description}), e.code
+    try:
+        if not data:
+            return jsonify({"error": "No JSON payload received"}), 400
 
-        # Return structured data
-        return jsonify(full_data), 200
+        limited = check_ingest_rate(SystemDataExtractor(data).get_host_id())
+        if limited:
+            return limited
+
+        # Return structured data, with where the time went
+        _, _, body = ingest_snapshot(data, request.headers.get('Idempotency-Key'), timer,
+                                     request.headers.get(TRACE_HEADER))
+        response = jsonify(body)
+        response.headers[TRACE_HEADER] = body['trace_id']
+        response.headers['Server-Timing'] = timer.server_timing()
+        return response, 200
 
     except Exception as e:
         app.logger.error(f"[ERROR] Failed to process system info: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/full-system-info/batch', methods=['POST'])
+@admit(ingest_slots)
+def receive_system_info_batch():
+    """Replay of snapshots an agent spooled while the backend was unreachable, oldest first"""
+    try:
+        body = decode_body(request) or {}
+    except UnsupportedMediaType as e:
+        return jsonify({"error": e.description}), 415
+    except BadRequest:
+        body = {}
+    snapshots = body.get('snapshots') if isinstance(body, dict) else None
+    if not isinstance(snapshots, list) or not snapshots:
+        return jsonify({"error": "Expected a non-empty 'snapshots' list"}), 400
+    if len(snapshots) > MAX_BATCH_SNAPSHOTS:
+        return jsonify({"error": f"At most {MAX_BATCH_SNAPSHOTS} snapshots per batch"}), 413
+
+    # A replay costs the sending host one upload, however many snapshots it carries
+    latest = snapshots[-1].get('payload') if isinstance(snapshots[-1], dict) else None
+    limited = check_ingest_rate(SystemDataExtractor(latest if isinstance(latest, dict) else {}).get_host_id())
+    if limited:
+        return limited
+
+    results = []
+    for entry in snapshots:
+        entry = entry if isinstance(entry, dict) else {}
+        idempotency_key = entry.get('idempotency_key')
+        payload = entry.get('payload')
+        if not isinstance(payload, dict) or not payload:
+            results.append({"idempotency_key": idempotency_key, "status": "error", "error": "Missing payload"})
+            continue
+        try:
+            status, host_id, body = ingest_snapshot(payload, idempotency_key)
+            results.append({"idempotency_key": idempotency_key, "host_id": host_id, "status": status,
+                            "trace_id": body['trace_id']})
+        except Exception as e:
+            app.logger.error(f"[ERROR] Failed to process spooled system info: {str(e)}")
+            results.append({"idempotency_key": idempotency_key, "status": "error", "error": str(e)})
+
+    return jsonify({"results": results}), 200
+
+def refresh_live_hub(host):
+    """Publish the stored snapshot to this process's hub if another worker ingested it"""
+    if snapshot_index.enabled:
+        due = live_hub.refresh_due(host, LIVE_POLL_INTERVAL, snapshot_index.generation)
+    else:
+        due = live_hub.refresh_due(host, LIVE_HEARTBEAT)
+    if not due:
+        return
+    version = snapshot_version(host)
+    if version is None or live_hub.version(host) == version:
+        return
+    view = load_view(host)
+    if view and view.get('system', {}).get('host_id') == host:
+        live_hub.publish(host, view, version)
+
+@app.route('/api/hosts/<host_id>/stream', methods=['GET'])
+def stream_host_updates(host_id):
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('since')
+    stream = live_hub.stream(host_id, last_event_id, heartbeat=LIVE_HEARTBEAT, refresh=refresh_live_hub,
+                            poll=LIVE_POLL_INTERVAL)
+    response = Response(stream, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the event stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def parse_time_arg(name):
+    value = request.args.get(name)
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+@app.route('/api/hosts/<host_id>/history', methods=['GET'])
+@admit(read_slots)
+def get_host_history(host_id):
+    try:
+        since, until = parse_time_arg('since'), parse_time_arg('until')
+        limit = int(request.args.get('limit', 0)) or None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    timestamps = archive.history(host_id, since, until, limit)
+    return jsonify({
+        "host_id": host_id,
+        "snapshots": [datetime.fromtimestamp(ts).isoformat() for ts in timestamps]
+    })
+
+@app.route('/api/hosts/<host_id>/archive', methods=['GET'])
+@admit(read_slots)
+def get_archived_snapshot(host_id):
+    """Raw payload of the newest archived snapshot taken at or before ?at="""
+    try:
+        at = parse_time_arg('at')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    entry = archive.get(host_id, at)
+    if entry is None:
+        return jsonify({"error": "No archived snapshot"}), 404
+    archived_at, payload = entry
+    return jsonify({"host_id": host_id, "archived_at": datetime.fromtimestamp(archived_at).isoformat(),
+                    "payload": payload})
+
+def recent_anomalies(host_id=None):
+    """Anomalies selected by ?since= and ?limit=; raises ValueError on bad arguments"""
+    results = anomalies.recent(host_id, parse_time_arg('since'), int(request.args.get('limit', 50)))
+    for anomaly in results:
+        anomaly['detected_at'] = datetime.fromtimestamp(anomaly['detected_at']).isoformat()
+    return results
+
+@app.route('/api/anomalies', methods=['GET'])
+@admit(read_slots)
+def get_anomalies():
+    """Newest anomalies across the fleet"""
+    try:
+        return jsonify({"anomalies": recent_anomalies()})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route('/api/hosts/<host_id>/anomalies', methods=['GET'])
+@admit(read_slots)
+def get_host_anomalies(host_id):
+    """Newest anomalies of one host plus the baselines they were measured against"""
+    try:
+        results = recent_anomalies(host_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"host_id": host_id, "anomalies": results, "baseline": anomalies.baseline(host_id)})
+
+def recent_traces(host_id=None):
+    """Traces selected by ?since= and ?limit=; raises ValueError on bad arguments"""
+    results = traces.recent(host_id, parse_time_arg('since'), int(request.args.get('limit', 50)))
+    for trace in results:
+        trace['received_at'] = datetime.fromtimestamp(trace['received_at']).isoformat()
+    return results
+
+@app.route('/api/traces', methods=['GET'])
+@admit(read_slots)
+def get_traces():
+    """Newest upload traces across the fleet"""
+    try:
+        return jsonify({"traces": recent_traces()})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route('/api/hosts/<host_id>/traces', methods=['GET'])
+@admit(read_slots)
+def get_host_traces(host_id):
+    """Newest upload traces of one host, to tell slow collection from slow upload or processing"""
+    try:
+        return jsonify({"host_id": host_id, "traces": recent_traces(host_id)})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route('/api/traces/<trace_id>', methods=['GET'])
+@admit(read_slots)
+def get_trace(trace_id):
+    trace = traces.get(trace_id)
+    if trace is None:
+        return jsonify({"error": "Unknown trace"}), 404
+    trace['received_at'] = datetime.fromtimestamp(trace['received_at']).isoformat()
+    return jsonify(trace)
+
+@app.route('/api/traces/<trace_id>/upload', methods=['POST'])
+@admit(ingest_slots)
+def report_trace_upload(trace_id):
+    """The agent's follow-up: how long serializing and delivering the traced upload took"""
+    try:
+        report = decode_body(request)
+    except HTTPException as e:
+        return jsonify({"error": e.description}), e.code
+    if not isinstance(report, dict):
+        return jsonify({"error": "Expected an object of timings"}), 400
+    if not traces.record_upload(trace_id, report):
+        return jsonify({"error": "Unknown trace"}), 404
+    return jsonify({"trace_id": trace_id}), 200
+
+@app.route('/api/hosts/<host_id>/processes', methods=['GET'])
+@admit(read_slots)
+def get_host_processes(host_id):
+    """Top processes of the snapshot taken at or before ?at=, unchanged uploads included"""
+    try:
+        at = parse_time_arg('at')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    entry = archive.get(host_id, at)
+    if entry is None:
+        return jsonify({"error": "No archived snapshot"}), 404
+    archived_at, payload = entry
+    return jsonify({"host_id": host_id, "archived_at": datetime.fromtimestamp(archived_at).isoformat(),
+                    **SystemDataExtractor(payload).section('processes')})
+
+@app.route('/api/hosts/search', methods=['GET'])
+@admit(read_slots)
+def search_hosts():
+    try:
+        filters, sort, limit, cursor = parse_search_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    hosts, next_cursor = store.search(filters, sort, limit, cursor)
+    return jsonify({"hosts": hosts, "count": len(hosts), "next_cursor": next_cursor})
+
+@app.route('/api/hosts/stats', methods=['GET'])
+@admit(read_slots)
+def host_stats():
+    """Fleet aggregates over the hosts matching the search filters"""
+    try:
+        filters, _, _, _ = parse_search_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(store.fleet_stats(filters))
+
+@app.route('/api/export', methods=['GET'])
+@admit(export_slots)
+def export_hosts():
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"Unsupported format '{fmt}'; use one of {', '.join(EXPORT_FORMATS)}"}), 400
+    if fmt == 'parquet' and not PARQUET_AVAILABLE:
+        return jsonify({"error": "Parquet export requires pyarrow on the server"}), 501
+    try:
+        filters, sort, _, _ = parse_search_args(request.args, extra=('format',))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Rows are pulled from the store page by page while the response is being sent
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    response = Response(stream_export(store.iter_views(filters, sort), fmt), mimetype=mimetype)
+    filename = f"specscorex-fleet-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{extension}"
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+@app.route('/api/reports/pdf', methods=['POST'])
+@admit(read_slots)
+def create_pdf_export():
+    body = request.get_json(silent=True) or {}
+    host_id = body.get('host_id') or request.args.get('host')
+    if host_id:
+        view = store.get_view(host_id)
+        if view is None:
+            return jsonify({"error": f"Unknown host '{host_id}'"}), 404
+        records = [(host_id, view.get('system', {}).get('hostname'), view, rate_system(view))]
+    else:
+        # Bulk export of every host matching the search filters, one pool task per host.
+        # Only the emptiness check runs here; hosts are read and rated on the job's feeder thread
+        try:
+            filters, sort, _, _ = parse_search_args(request.args, extra=('host',))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if not store.search(filters, sort, limit=1)[0]:
+            return jsonify({"error": "No hosts match the export"}), 404
+        records = ((summary['host_id'], summary['hostname'], view, rate_system(view))
+                   for summary, view in store.iter_views(filters, sort))
+
+    job_id = pdf_exports.submit(records)
+    return jsonify({
+        "job_id": job_id,
+        "status_url": url_for('get_pdf_export', job_id=job_id)
+    }), 202
+
+@app.route('/api/reports/pdf/<job_id>', methods=['GET'])
+def get_pdf_export(job_id):
+    status = pdf_exports.status(job_id)
+    if status is None:
+        return jsonify({"error": "Unknown export job"}), 404
+    if status['status'] == 'done':
+        status['download_url'] = url_for('download_pdf_export', job_id=job_id)
+    return jsonify(status)
+
+@app.route('/api/reports/pdf/<job_id>/download', methods=['GET'])
+def download_pdf_export(job_id):
+    status = pdf_exports.status(job_id)
+    if status is None:
+        return jsonify({"error": "Unknown export job"}), 404
+    # The file is built by the job's feeder; this only serves it once written
+    result = pdf_exports.result(job_id) if status['status'] == 'done' else None
+    if result is None:
+        return jsonify(status), 409
+
+    path, download_name = result
+    return send_file(path, as_attachment=True, download_name=download_name, conditional=True)
+
+# Admin endpoints are disabled unless set; `flask rescore` works without it
+ADMIN_TOKEN = os.environ.get('SPECSCOREX_ADMIN_TOKEN')
+
+def admin_required(view):
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            return jsonify({"error": "Admin endpoints are disabled; set SPECSCOREX_ADMIN_TOKEN"}), 403
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {ADMIN_TOKEN}"):
+            return jsonify({"error": "Admin token required"}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+def run_rescore_job(job):
+    try:
+        RescoreJob(store).run(job)
+        app.logger.info(f"Rescore job {job['job_id']} finished")
+    except Exception as e:
+        app.logger.error(f"[ERROR] Rescore job {job['job_id']} failed: {str(e)}")
+
+@app.route('/api/admin/rescore', methods=['POST'])
+@admin_required
+def start_rescore():
+    """Recompute stored scores made by an older rating model, resuming an interrupted job"""
+    job = RescoreJob(store).claim(restart=request.args.get('restart') == '1')
+    if job is None:
+        return jsonify({"error": "A rescore job is already running", "job": store.get_rescore_job()}), 409
+    threading.Thread(target=run_rescore_job, args=(job,), daemon=True).start()
+    return jsonify({"job": job, "status_url": url_for('get_rescore_status')}), 202
+
+@app.route('/api/admin/rescore', methods=['GET'])
+@admin_required
+def get_rescore_status():
+    job = store.get_rescore_job(request.args.get('job_id'))
+    if job is None:
+        return jsonify({"error": "No rescore job"}), 404
+    return jsonify({"job": job})
+
+# Browser Quick Scan results are identical for identical hints, so let browsers and CDNs cache them
+SCAN_MAX_AGE = 3600
+
+@app.route('/api/scan', methods=['GET', 'POST'])
+@admit(read_slots)
+def scan():
+    """Quick Scan: rate the hints a browser can see (JSON body or query string)"""
+    hints = (request.get_json(silent=True) if request.method == 'POST' else request.args) or {}
+    if not isinstance(hints, dict):
+        return jsonify({"error": "Expected a JSON object of hints"}), 400
+    if not hints.get('userAgent'):
+        hints = {**hints, 'userAgent': request.headers.get('User-Agent')}
+    result = quick_scan(hints)
+    response = jsonify(result)
+    response.set_etag(result['fingerprint'])
+    if request.method == 'GET':
+        response.cache_control.public = True
+        response.cache_control.max_age = SCAN_MAX_AGE
+    return response.make_conditional(request)
+
+def requested_fields():
+    """Projection tree from ?fields=a.b,c, or None for everything; raises ValueError"""
+    value = request.args.get('fields')
+    return parse_fields(value) if value is not None else None
+
+def section_response(section):
+    """One view section, trimmed to ?fields= (paths relative to the section)"""
+    try:
+        fields = requested_fields()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    host = requested_host()
+    view = load_view(host, [section])
+    if not view:
+        return jsonify({"error": "No data available"}), 404
+    view = with_fresh_sections(host, view, [section])
+    return jsonify(project(view[section], fields))
+
 # API endpoints for AJAX calls
+@app.route('/api/view', methods=['GET'])
+@admit(read_slots)
+def get_view():
+    """Any subset of the view, e.g. ?fields=hardware.cpu.usage,storage.logical_disks.usage_percent"""
+    try:
+        fields = requested_fields()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    sections = list(fields) if fields else None
+    unknown = [name for name in sections or [] if name not in SystemDataExtractor.SECTIONS]
+    if unknown:
+        return jsonify({"error": f"Unknown section '{unknown[0]}'"}), 400
+
+    host = requested_host()
+    view = load_view(host, sections)
+    if not view:
+        return jsonify({"error": "No data available"}), 404
+    return jsonify(project(with_fresh_sections(host, view), fields))
+
 @app.route('/api/system', methods=['GET'])
+@admit(read_slots)
 def get_system_info():
-    data = load_data()
-    if not data:
-        return jsonify({"error": "No data available"}), 404
-    
-    extractor = SystemDataExtractor(data)
-    return jsonify(extractor.get_system_overview())
+    return section_response('system')
 
 @app.route('/api/hardware', methods=['GET'])
+@admit(read_slots)
 def get_hardware_info():
-    data = load_data()
-    if not data:
-        return jsonify({"error": "No data available"}), 404
-    
-    extractor = SystemDataExtractor(data)
-    return jsonify(extractor.get_hardware_info())
+    return section_response('hardware')
 
 @app.route('/api/storage', methods=['GET'])
+@admit(read_slots)
 def get_storage_info():
-    data = load_data()
-    if not data:
-        return jsonify({"error": "No data available"}), 404
-    
-    extractor = SystemDataExtractor(data)
-    return jsonify(extractor.get_storage_info())
+    return section_response('storage')
 
 @app.route('/api/network', methods=['GET'])
+@admit(read_slots)
 def get_network_info():
-    data = load_data()
-    if not data:
-        return jsonify({"error": "No data available"}), 404
-    
-    extractor = SystemDataExtractor(data)
-    return jsonify(extractor.get_network_info())
+    return section_response('network')
+
+@app.route('/api/benchmark', methods=['GET'])
+@admit(read_slots)
+def get_benchmark_info():
+    return section_response('benchmark')
+
+@app.route('/api/processes', methods=['GET'])
+@admit(read_slots)
+def get_process_info():
+    return section_response('processes')
+
+@app.route('/api/activity', methods=['GET'])
+@admit(read_slots)
+def get_activity_info():
+    return section_response('activity')
+
+@app.route('/api/collection', methods=['GET'])
+@admit(read_slots)
+def get_collection_info():
+    return section_response('collection')
 
 @app.route('/api/motherboard', methods=['GET'])
+@admit(read_slots)
 def get_motherboard_info():
-    data = load_data()
-    if not data:
-        return jsonify({"error": "No data available"}), 404
-    
-    extractor = SystemDataExtractor(data)
-    return jsonify(extractor.get_motherboard_info())
+    return section_response('motherboard')
 
 class SystemDataExtractor:
+    # Section name -> method extracting it; sections are computed on first use and memoized
+    SECTIONS = {
+        'system': 'get_system_overview',
+        'hardware': 'get_hardware_info',
+        'storage': 'get_storage_info',
+        'network': 'get_network_info',
+        'motherboard': 'get_motherboard_info',
+        'benchmark': 'get_benchmark_info',
+        'processes': 'get_process_info',
+        'activity': 'get_activity_info',
+        'collection': 'get_collection_info'
+    }
+
     def __init__(self, json_data):
         self.data = json_data
+        self._sections = {}
+
+    def section(self, name):
+        if name not in self._sections:
+            self._sections[name] = getattr(self, self.SECTIONS[name])()
+        return self._sections[name]
+
+    def get_host_id(self):
+        system_data = self.data.get('python_collected', {}).get('system', {})
+        return str(system_data.get('host_id') or system_data.get('hostname') or 'Unknown')
 
     def get_system_overview(self):
         python_data = self.data.get('python_collected', {})
         system_data = python_data.get('system', {})
         
         return {
+            'host_id': self.get_host_id(),
             'hostname': system_data.get('hostname', 'Unknown'),
             'os': f"{system_data.get('os', 'Unknown')} {system_data.get('os_release', '')}",
             'os_version': system_data.get('os_version', 'Unknown'),
@@ -210,7 +1024,12 @@ class SystemDataExtractor:
     def get_network_info(self):
         python_network = self.data.get('python_collected', {}).get('network', {})
         powershell_network = self.data.get('powershell_collected', {}).get('network', {})
-        adapters = powershell_network.get('adapters', {})
+        adapters = powershell_network.get('adapters') or {}
+        if isinstance(adapters, list):
+            # Several IP-enabled adapters arrive as an array; report the one carrying the primary IP
+            primary_ip = python_network.get('ip_address')
+            adapters = next((adapter for adapter in adapters if primary_ip in (adapter.get('IPAddress') or [])),
+                            adapters[0] if adapters else {})
 
         return {
             'primary_ip': python_network.get('ip_address', 'Unknown'),
@@ -236,32 +1055,117 @@ class SystemDataExtractor:
             'battery': power_info.get('battery', {})
         }
 
-    def get_full_data(self):
+    def get_benchmark_info(self):
+        # Only present when the agent ran with --benchmark
+        benchmark = self.data.get('benchmark') or {}
+        return {
+            'version': benchmark.get('version'),
+            'timestamp': benchmark.get('timestamp'),
+            'duration_s': benchmark.get('duration_s'),
+            'cpu': benchmark.get('cpu', {}),
+            'memory': benchmark.get('memory', {}),
+            'disk': benchmark.get('disk', {})
+        }
+
+    def get_process_info(self):
+        processes = self.data.get('python_collected', {}).get('processes', {})
+        return {
+            'process_count': processes.get('process_count'),
+            'sample_interval_s': processes.get('sample_interval_s'),
+            'top_cpu': processes.get('top_cpu', []),
+            'top_memory': processes.get('top_memory', [])
+        }
+
+    def get_activity_info(self):
+        # Summaries of the agent's sampling window (min/mean/p95/max), not raw samples
+        activity = self.data.get('python_collected', {}).get('activity', {})
+        return {
+            'window_s': activity.get('window_s'),
+            'samples': activity.get('samples'),
+            'cpu': activity.get('cpu', {}),
+            'disks': activity.get('disks', {}),
+            'nics': activity.get('nics', {})
+        }
+
+    def get_collection_info(self):
+        # Per-collector outcome of the agent's deadline-bound run; older agents send none
+        collection = self.data.get('collection_status') or {}
+        collectors = collection.get('collectors', {})
         return {
-            'system': self.get_system_overview(),
-            'hardware': self.get_hardware_info(),
-            'storage': self.get_storage_info(),
-            'network': self.get_network_info(),
-            'motherboard': self.get_motherboard_info()
+            'deadline_s': collection.get('deadline_s'),
+            'elapsed_ms': collection.get('elapsed_ms'),
+            'collectors': collectors,
+            'incomplete': sorted(name for name, status in collectors.items() if status.get('status') != 'ok')
         }
 
+    def get_full_data(self, sections=None):
+        return {name: self.section(name) for name in (sections or self.SECTIONS)}
+
+# Retention in days per data class (0 keeps forever); see maintenance.DEFAULT_RETENTION
+maintenance = MaintenanceJob(
+    os.path.join(app.instance_path, 'maintenance'), store, archive, anomalies, snapshot_index,
+    extract_view=lambda payload: SystemDataExtractor(payload).get_full_data(['hardware', 'storage']),
+    exports_directory=pdf_exports.directory, log_path=LOG_FILE, traces=traces,
+    retention={name: int(os.environ[f'RETAIN_{name.upper()}_DAYS'])
+               for name in ('raw', 'history', 'views', 'logs') if f'RETAIN_{name.upper()}_DAYS' in os.environ}
+)
+MAINTENANCE_INTERVAL_HOURS = float(os.environ.get('MAINTENANCE_INTERVAL_HOURS', 24))
+
+@app.before_request
+def start_maintenance():
+    # Started with the first request rather than on import, so CLI commands do not run it
+    if MAINTENANCE_INTERVAL_HOURS > 0:
+        maintenance.start(MAINTENANCE_INTERVAL_HOURS * 3600,
+                          on_done=lambda report: app.logger.info(f"Maintenance run: {json.dumps(report)}"),
+                          on_error=lambda e: app.logger.error(f"[ERROR] Maintenance run failed: {str(e)}"))
+
+@app.route('/api/hosts/<host_id>/rollups', methods=['GET'])
+@admit(read_slots)
+def get_host_rollups(host_id):
+    """Daily usage aggregates of a host, kept after its raw snapshots expire"""
+    return jsonify({"host_id": host_id, "days": maintenance.get_rollups(host_id, request.args.get('since'))})
+
 @app.route('/report')
+@admit(read_slots)
 def report_page():
-    data = load_data()
-    if not data:
-        return render_template('report_template.html', system={}, hardware={}, storage={}, network={}, motherboard={})
-    
-    extractor = SystemDataExtractor(data)
-    full_data = extractor.get_full_data()
-
-    return render_template(
-        'report_template.html',
-        system=full_data['system'],
-        hardware=full_data['hardware'],
-        storage=full_data['storage'],
-        network=full_data['network'],
-        motherboard=full_data['motherboard']
-    )
+    return render_page('report_template.html', requested_host())
+
+@app.cli.command('rebuild-store')
+def rebuild_store():
+    """Replay the snapshot archive into the store, e.g. after the derived columns change"""
+    count = 0
+    for host_id, archived_at, payload in archive.replay():
+        full_data = SystemDataExtractor(payload).get_full_data()
+        version = store.save_snapshot(host_id, payload, full_data, rate_system(full_data),
+                                      received_at=datetime.fromtimestamp(archived_at).isoformat(),
+                                      content_hash=content_hash(payload))
+        snapshot_index.publish(host_id, version, full_data)
+        count += 1
+    print(f"Replayed {count} archived snapshots")
+
+@app.cli.command('maintenance')
+@click.option('--full-vacuum', is_flag=True,
+              help='Rewrite the databases once so space can be reclaimed incrementally afterwards')
+def run_maintenance(full_vacuum):
+    """Apply retention, roll up expiring history and reclaim space now"""
+    if full_vacuum:
+        maintenance.full_vacuum()
+    print(json.dumps(maintenance.run(), indent=2))
+
+@app.cli.command('rescore')
+@click.option('--chunk-size', default=500, show_default=True, help='Hosts read and written per transaction')
+@click.option('--workers', default=0, help='Scoring processes (default: half the CPUs)')
+@click.option('--restart', is_flag=True, help='Start over instead of resuming an interrupted job')
+def rescore(chunk_size, workers, restart):
+    """Recompute stored scores after RATING_MODEL_VERSION changes"""
+    job_runner = RescoreJob(store, chunk_size, workers or None)
+    job = job_runner.claim(restart)
+    if job is None:
+        raise click.ClickException("A rescore job is already running")
+    print(f"Rescore job {job['job_id']}: {job['total']} hosts, resuming after '{job['last_host_id']}'")
+    job = job_runner.run(job, progress=lambda state: print(
+        f"  {state['scanned']} scanned, {state['rescored']} rescored", end='\r'))
+    print(f"\nRescored {job['rescored']} of {job['scanned']} hosts")
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,500 @@
+import bisect
+import hashlib
+import io
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import ExitStack, contextmanager
+
+try:
+    import fcntl
+except ImportError:  # No flock on Windows; appends are then serialised per process
+    fcntl = None
+
+# Segment record: body length, crc32 of host + body, timestamp, host length, then host and body
+RECORD = struct.Struct('<IIdH')
+# Index entry: host hash, timestamp, record offset, record length. Sealed segments keep
+# their entries sorted by (host hash, timestamp) for bisect; the active one in append order.
+ENTRY = struct.Struct('<QdQI')
+
+MANIFEST = 'manifest.json'
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _host_hash(host):
+    return int.from_bytes(hashlib.blake2b(host.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _write_atomic(path, data):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def _fsync_directory(path):
+    """Make new and renamed files in ``path`` durable; a no-op where directories cannot be opened"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class _SortedEntries:
+    """Sequence view over a sealed index file, so bisect can search it in place"""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.count = len(buffer) // ENTRY.size
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        return ENTRY.unpack_from(self.buffer, i * ENTRY.size)
+
+
+class SnapshotArchive:
+    """Append-only, segmented log of every raw snapshot.
+
+    Appends go to the active segment and its unsorted index, both O(1). Once
+    the segment reaches ``segment_bytes`` it is sealed: its index is rewritten
+    sorted by (host, timestamp), so lookups bisect a memory-mapped file in
+    O(log n) per segment. manifest.json lists the segments in log order and is
+    replaced atomically on rollover and compaction.
+
+    Only sealed, immutable files are memory-mapped; the active segment grows
+    and can be truncated by recovery, so it is read with plain file reads.
+    """
+
+    def __init__(self, directory, segment_bytes=SEGMENT_MAX_BYTES):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._maps = {}
+        self._manifest_cache = (None, None)
+        os.makedirs(directory, exist_ok=True)
+        self._lock_fd = os.open(os.path.join(directory, 'append.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+        with self._locked():
+            if not os.path.exists(self._path(MANIFEST)):
+                self._start_segment({'next_id': 1, 'sealed': []})
+            self._recover()
+
+    # ── Files ────────────────────────────────────────────────────────
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _log_path(self, segment_id):
+        return self._path(f"segment-{segment_id:06d}.log")
+
+    def _index_path(self, segment_id, sealed=True):
+        return self._path(f"segment-{segment_id:06d}.{'idx' if sealed else 'active'}")
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is None:
+            with self._lock:
+                yield
+            return
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def manifest(self):
+        """Current manifest, re-read only when another process has replaced it"""
+        path = self._path(MANIFEST)
+        stamp = os.stat(path).st_mtime_ns
+        cached_stamp, manifest = self._manifest_cache
+        if cached_stamp != stamp:
+            with open(path, 'rb') as f:
+                manifest = json.load(f)
+            self._manifest_cache = (stamp, manifest)
+            self._drop_stale_maps(manifest)
+        return manifest
+
+    def _drop_stale_maps(self, manifest):
+        """Drop mappings of segments another process compacted away, so their disk space is freed"""
+        live = {manifest['active']} | {meta['id'] for meta in manifest['sealed']}
+        stale = [path for path in list(self._maps)
+                 if int(os.path.basename(path)[len('segment-'):].split('.')[0]) not in live]
+        self._forget(*stale)
+
+    def _save_manifest(self, manifest):
+        _write_atomic(self._path(MANIFEST), json.dumps(manifest, indent=2).encode('utf-8'))
+
+    def _start_segment(self, manifest):
+        segment_id = manifest['next_id']
+        open(self._log_path(segment_id), 'ab').close()
+        open(self._index_path(segment_id, sealed=False), 'ab').close()
+        manifest = {**manifest, 'next_id': segment_id + 1, 'active': segment_id}
+        self._save_manifest(manifest)
+        return manifest
+
+    def _mapped(self, path):
+        """Read-only mapping of a sealed segment file"""
+        with self._lock:
+            mapped = self._maps.get(path)
+            if mapped is None:
+                with open(path, 'rb') as f:
+                    if os.fstat(f.fileno()).st_size == 0:
+                        return b''
+                    mapped = self._maps[path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return mapped
+
+    def _forget(self, *paths):
+        """Drop cached mappings; they are not closed, as a running replay or get()
+        may still hold one, and are unmapped once the last reader lets go"""
+        with self._lock:
+            for path in paths:
+                self._maps.pop(path, None)
+
+    # ── Records ──────────────────────────────────────────────────────
+
+    @staticmethod
+    def _encode(host, body, timestamp):
+        host_bytes = host.encode('utf-8')
+        header = RECORD.pack(len(body), zlib.crc32(host_bytes + body), timestamp, len(host_bytes))
+        return header + host_bytes + body
+
+    @staticmethod
+    def _decode(buffer, offset):
+        """(host, timestamp, body bytes, record length) at ``offset``, or None if torn or corrupt"""
+        if offset + RECORD.size > len(buffer):
+            return None
+        body_length, crc, timestamp, host_length = RECORD.unpack_from(buffer, offset)
+        start = offset + RECORD.size
+        end = start + host_length + body_length
+        if end > len(buffer):
+            return None
+        host_bytes = buffer[start:start + host_length]
+        body = buffer[start + host_length:end]
+        if zlib.crc32(host_bytes + body) != crc:
+            return None
+        return host_bytes.decode('utf-8'), timestamp, body, end - offset
+
+    @classmethod
+    def _read_record(cls, f, offset):
+        """Like _decode, from an open segment file; a short read counts as torn"""
+        f.seek(offset)
+        header = f.read(RECORD.size)
+        if len(header) < RECORD.size:
+            return None
+        body_length, _, _, host_length = RECORD.unpack(header)
+        return cls._decode(header + f.read(host_length + body_length), 0)
+
+    @classmethod
+    def _record_at(cls, log, offset):
+        """Record at ``offset`` of a sealed log's mapping or an open active log"""
+        if isinstance(log, io.IOBase):
+            return cls._read_record(log, offset)
+        return cls._decode(log, offset)
+
+    def _records(self, log, start=0):
+        """Valid records of a log from ``start``, stopping at the first torn one"""
+        offset = start
+        while True:
+            record = self._record_at(log, offset)
+            if record is None:
+                return
+            yield offset, record
+            offset += record[3]
+
+    def _scan(self, segment_id, start=0, sealed=True):
+        if sealed:
+            yield from self._records(self._mapped(self._log_path(segment_id)), start)
+            return
+        with open(self._log_path(segment_id), 'rb') as f:
+            yield from self._records(f, start)
+
+    def _indexed_end(self, segment_id):
+        """End of the last indexed record of the active segment"""
+        with open(self._index_path(segment_id, sealed=False), 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < ENTRY.size:
+                return 0
+            f.seek(size - size % ENTRY.size - ENTRY.size)
+            _, _, offset, length = ENTRY.unpack(f.read(ENTRY.size))
+        return offset + length
+
+    def _recover(self):
+        """Index records the last writer appended but did not index, and drop a torn tail"""
+        segment_id = self.manifest()['active']
+        index_path = self._index_path(segment_id, sealed=False)
+        with open(index_path, 'rb') as f:
+            data = f.read()
+        data = data[:len(data) - len(data) % ENTRY.size]
+        indexed_end = max((offset + length for _, _, offset, length
+                           in ENTRY.iter_unpack(data)), default=0)
+
+        missing = bytearray()
+        end = indexed_end
+        for offset, (host, timestamp, _, length) in self._scan(segment_id, indexed_end, sealed=False):
+            missing += ENTRY.pack(_host_hash(host), timestamp, offset, length)
+            end = offset + length
+        _write_atomic(index_path, bytes(data) + bytes(missing))
+        if os.path.getsize(self._log_path(segment_id)) > end:
+            os.truncate(self._log_path(segment_id), end)
+
+    # ── Writing ──────────────────────────────────────────────────────
+
+    def append(self, host, payload, timestamp=None):
+        """Append one raw snapshot; returns (segment id, offset)"""
+        timestamp = timestamp if timestamp is not None else time.time()
+        body = json.dumps(payload, separators=(',', ':'), default=str).encode('utf-8')
+        record = self._encode(host, body, timestamp)
+        with self._locked():
+            manifest = self.manifest()
+            segment_id = manifest['active']
+            with open(self._log_path(segment_id), 'ab') as f:
+                offset = os.fstat(f.fileno()).st_size
+                if offset != self._indexed_end(segment_id):
+                    # A writer died mid-append; repair before the torn bytes get buried
+                    self._recover()
+                    offset = os.fstat(f.fileno()).st_size
+                f.write(record)
+            # The record is written first; a crash before this line is repaired by _recover
+            with open(self._index_path(segment_id, sealed=False), 'ab') as f:
+                f.write(ENTRY.pack(_host_hash(host), timestamp, offset, len(record)))
+            if offset + len(record) >= self.segment_bytes:
+                self._seal(manifest)
+        return segment_id, offset
+
+    def _sealed_meta(self, segment_id, entries):
+        return {
+            'id': segment_id,
+            'records': len(entries),
+            'first_ts': min((entry[1] for entry in entries), default=None),
+            'last_ts': max((entry[1] for entry in entries), default=None),
+            'bytes': os.path.getsize(self._log_path(segment_id))
+        }
+
+    def _write_sorted_index(self, segment_id, entries):
+        entries = sorted(entries, key=lambda entry: (entry[0], entry[1], entry[2]))
+        _write_atomic(self._index_path(segment_id), b''.join(ENTRY.pack(*entry) for entry in entries))
+        return entries
+
+    def _seal(self, manifest):
+        """Roll over: sort the active index, then start a new segment; caller holds the lock"""
+        segment_id = manifest['active']
+        active_index = self._index_path(segment_id, sealed=False)
+        with open(active_index, 'rb') as f:
+            entries = list(ENTRY.iter_unpack(f.read()))
+        entries = self._write_sorted_index(segment_id, entries)
+        sealed = manifest['sealed'] + [self._sealed_meta(segment_id, entries)]
+        self._start_segment({**manifest, 'sealed': sealed})
+        os.unlink(active_index)
+
+    def rollover(self):
+        """Seal the active segment now, e.g. before archiving it elsewhere"""
+        with self._locked():
+            manifest = self.manifest()
+            if os.path.getsize(self._log_path(manifest['active'])):
+                self._seal(manifest)
+
+    # ── Reading ──────────────────────────────────────────────────────
+
+    def _active_entries(self, segment_id):
+        # The active index is bounded by the segment size; sort a copy for bisect
+        with open(self._index_path(segment_id, sealed=False), 'rb') as f:
+            data = f.read()
+        data = data[:len(data) - len(data) % ENTRY.size]
+        return sorted(ENTRY.iter_unpack(data), key=lambda entry: (entry[0], entry[1], entry[2]))
+
+    @contextmanager
+    def _opened_segments(self):
+        """(sealed meta or None for the active segment, log, index entries) in log order.
+
+        Every segment is opened up front and held until the caller is done, so a
+        rollover or compaction that removes files meanwhile cannot pull them
+        from under a running get() or replay().
+        """
+        for attempt in range(3):
+            manifest = self.manifest()
+            with ExitStack() as stack:
+                try:
+                    segments = [(meta, self._mapped(self._log_path(meta['id'])),
+                                 _SortedEntries(self._mapped(self._index_path(meta['id']))))
+                                for meta in manifest['sealed']]
+                    active = manifest['active']
+                    log = stack.enter_context(open(self._log_path(active), 'rb'))
+                    segments.append((None, log, self._active_entries(active)))
+                except FileNotFoundError:
+                    # Removed after we read the manifest, which has been replaced since
+                    if attempt == 2:
+                        raise
+                    continue
+                yield segments
+                return
+
+    def get(self, host, at=None):
+        """(timestamp, payload) of the newest snapshot of ``host`` taken at or before ``at``"""
+        at = at if at is not None else math.inf
+        wanted = _host_hash(host)
+        with self._opened_segments() as segments:
+            for meta, log, entries in reversed(segments):
+                if meta and meta['first_ts'] is not None and meta['first_ts'] > at:
+                    continue
+                i = bisect.bisect_right(entries, (wanted, at, math.inf)) - 1
+                while i >= 0 and entries[i][0] == wanted:
+                    _, timestamp, offset, _ = entries[i]
+                    record = self._record_at(log, offset)
+                    if record is not None and record[0] == host:
+                        return timestamp, json.loads(record[2])
+                    i -= 1
+        return None
+
+    def history(self, host, since=None, until=None, limit=None):
+        """Timestamps of archived snapshots of ``host``, oldest first"""
+        since = since if since is not None else -math.inf
+        until = until if until is not None else math.inf
+        wanted = _host_hash(host)
+        timestamps = []
+        with self._opened_segments() as segments:
+            for _, _, entries in segments:
+                low = bisect.bisect_left(entries, (wanted, since))
+                high = bisect.bisect_right(entries, (wanted, until, math.inf))
+                timestamps.extend(entries[i][1] for i in range(low, high))
+        timestamps.sort()
+        return timestamps[:limit] if limit else timestamps
+
+    def replay(self, since=None, until=None):
+        """Yield (host, timestamp, payload) for every archived snapshot in [since, until), in append order"""
+        with self._opened_segments() as segments:
+            for meta, log, _ in segments:
+                if meta and meta['records'] and ((since is not None and meta['last_ts'] < since)
+                                                 or (until is not None and meta['first_ts'] >= until)):
+                    continue
+                for _, (host, timestamp, body, _) in self._records(log):
+                    if (since is None or timestamp >= since) and (until is None or timestamp < until):
+                        yield host, timestamp, json.loads(body)
+
+    # ── Compaction ───────────────────────────────────────────────────
+
+    def compact(self, before=None):
+        """Reclaim the space of snapshots older than ``before``.
+
+        Only sealed segments holding such snapshots are touched: wholly expired
+        ones are dropped unread, and runs of partly expired ones are rewritten
+        without them, merged up to the segment size. Without ``before`` every
+        sealed segment is merged. Sealed segments are immutable, so the rewrite
+        runs without the append lock; only the manifest swap takes it. Returns
+        None if another process is already compacting.
+        """
+        compact_fd = os.open(self._path('compact.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(compact_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return None
+            return self._compact(before)
+        finally:
+            os.close(compact_fd)
+
+    def _compact(self, before):
+        old = self.manifest()['sealed']
+        expired = {meta['id'] for meta in old
+                   if before is None or (meta['records'] and meta['first_ts'] < before)}
+        if not expired:
+            return {'segments_before': len(old), 'segments_after': len(old), 'records_dropped': 0}
+
+        with self._locked():
+            # Reserve ids for the output so concurrent rollovers cannot reuse them; a segment
+            # can overshoot the size limit by one record, so merging may need one extra each
+            manifest = self.manifest()
+            next_id = manifest['next_id']
+            self._save_manifest({**manifest, 'next_id': next_id + 2 * len(expired)})
+
+        sealed, written, dropped = [], 0, 0
+        log, entries, segment_id = None, [], None
+
+        def finish():
+            nonlocal written
+            log.flush()
+            os.fsync(log.fileno())
+            log.close()
+            sealed.append(self._sealed_meta(segment_id, self._write_sorted_index(segment_id, entries)))
+            written += 1
+
+        for meta in old:
+            if meta['id'] not in expired:
+                # Kept as is; close the current output so log order is preserved
+                if log is not None:
+                    finish()
+                    log = None
+                sealed.append(meta)
+                continue
+            if before is not None and meta['last_ts'] < before:
+                dropped += meta['records']
+                continue
+            for _, (host, timestamp, body, _) in self._scan(meta['id']):
+                if before is not None and timestamp < before:
+                    dropped += 1
+                    continue
+                record = self._encode(host, body, timestamp)
+                if log is not None and log.tell() + len(record) > self.segment_bytes:
+                    finish()
+                    log = None
+                if log is None:
+                    segment_id, entries = next_id + written, []
+                    log = open(self._log_path(segment_id), 'wb')
+                entries.append((_host_hash(host), timestamp, log.tell(), len(record)))
+                log.write(record)
+        if log is not None:
+            finish()
+        # The new segments must be on disk before the manifest points at them
+        _fsync_directory(self.directory)
+
+        with self._locked():
+            manifest = self.manifest()
+            # Keep segments sealed while we were compacting
+            newer = manifest['sealed'][len(old):]
+            self._save_manifest({**manifest, 'sealed': sealed + newer})
+        _fsync_directory(self.directory)
+
+        for segment_id in expired:
+            self._forget(self._log_path(segment_id), self._index_path(segment_id))
+            os.unlink(self._log_path(segment_id))
+            os.unlink(self._index_path(segment_id))
+        return {'segments_before': len(old), 'segments_after': len(sealed), 'records_dropped': dropped}
+
+    def stats(self):
+        manifest = self.manifest()
+        active = manifest['active']
+        with open(self._index_path(active, sealed=False), 'rb') as f:
+            active_records = len(f.read()) // ENTRY.size
+        return {
+            'segments': len(manifest['sealed']) + 1,
+            'records': sum(meta['records'] for meta in manifest['sealed']) + active_records,
+            'bytes': sum(meta['bytes'] for meta in manifest['sealed'])
+                     + os.path.getsize(self._log_path(active))
+        }
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or compact the snapshot archive")
+    parser.add_argument('directory', nargs='?', default=os.path.join('instance', 'archive'))
+    parser.add_argument('--compact-days', type=float,
+                        help="Compact sealed segments, dropping snapshots older than this many days")
+    args = parser.parse_args()
+
+    archive = SnapshotArchive(args.directory)
+    if args.compact_days is not None:
+        print(archive.compact(time.time() - args.compact_days * 86400))
+    print(archive.stats())
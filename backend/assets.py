@@ -0,0 +1,104 @@
+import gzip
+import hashlib
+import json
+import os
+import sys
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip siblings are always written
+    brotli = None
+
+FINGERPRINT_EXTENSIONS = ('.css', '.js')
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Preferred order when the client accepts several encodings
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _write_atomic(path, content):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+class AssetManifest:
+    """Content-hashed copies of the static CSS/JS with pre-compressed siblings.
+
+    ``build()`` writes ``static/dist/<dir>/<name>.<hash><ext>`` plus ``.gz`` and
+    (when Brotli is installed) ``.br`` variants, so the files can be served with
+    immutable cache headers and without compressing on every request.
+    """
+
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self.dist_folder = os.path.join(static_folder, DIST_DIR)
+        self.files = {}
+        self.version = None
+
+    def build(self):
+        files = {}
+        for root, dirs, names in os.walk(self.static_folder):
+            if os.path.abspath(root) == os.path.abspath(self.static_folder) and DIST_DIR in dirs:
+                dirs.remove(DIST_DIR)
+            for name in sorted(names):
+                if not name.endswith(FINGERPRINT_EXTENSIONS):
+                    continue
+                source = os.path.join(root, name)
+                logical = os.path.relpath(source, self.static_folder).replace(os.sep, '/')
+                files[logical] = self._fingerprint(source, logical)
+
+        os.makedirs(self.dist_folder, exist_ok=True)
+        _write_atomic(os.path.join(self.dist_folder, MANIFEST_NAME),
+                      json.dumps(files, indent=2, sort_keys=True).encode('utf-8'))
+        self.files = files
+        self.version = hashlib.sha256(json.dumps(files, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+        return files
+
+    def _fingerprint(self, source, logical):
+        with open(source, 'rb') as f:
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        stem, ext = os.path.splitext(logical)
+        fingerprinted = f"{DIST_DIR}/{stem}.{digest}{ext}"
+        target = os.path.join(self.static_folder, *fingerprinted.split('/'))
+
+        # Hashed names never change content, so existing outputs are reused as-is
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            _write_atomic(target, content)
+        if not os.path.exists(target + '.gz'):
+            compressed = gzip.compress(content, compresslevel=9, mtime=0)
+            if len(compressed) < len(content):
+                _write_atomic(target + '.gz', compressed)
+        if brotli is not None and not os.path.exists(target + '.br'):
+            compressed = brotli.compress(content, quality=11)
+            if len(compressed) < len(content):
+                _write_atomic(target + '.br', compressed)
+        return fingerprinted
+
+    def url_path(self, filename):
+        """Fingerprinted path for a logical static filename, if one was built"""
+        return self.files.get(filename, filename)
+
+    def is_fingerprinted(self, filename):
+        return filename.startswith(DIST_DIR + '/') and not filename.endswith(MANIFEST_NAME)
+
+    def negotiate(self, filename, accept_encodings):
+        """Pick the best pre-compressed variant of ``filename`` the client accepts"""
+        for encoding, suffix in ENCODINGS:
+            if accept_encodings.quality(encoding) > 0:
+                variant = filename + suffix
+                if os.path.isfile(os.path.join(self.static_folder, *variant.split('/'))):
+                    return variant, encoding
+        return filename, None
+
+
+if __name__ == '__main__':
+    # Build step: python assets.py [static_folder]
+    folder = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    manifest = AssetManifest(folder)
+    for logical, fingerprinted in manifest.build().items():
+        print(f"{logical} -> {fingerprinted}")
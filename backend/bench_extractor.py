@@ -0,0 +1,96 @@
+"""Micro-benchmarks of the SystemDataExtractor methods over a synthetic payload corpus.
+
+    python bench_extractor.py --count 5000 --repeat 5
+    python bench_extractor.py --corpus payloads.jsonl --json > before.json
+
+Each method runs on a fresh extractor per payload, so memoized sections are
+measured cold. Exceptions are counted per method rather than aborting the
+run; flask_system_monitor's extractor expects complete payloads and fails
+on most edge cases.
+"""
+import argparse
+import json
+import time
+from collections import Counter
+
+from payload_corpus import generate_corpus
+
+MONITOR_METHODS = ['get_system_overview', 'get_hardware_info', 'get_storage_info', 'get_network_info',
+                   'get_motherboard_info']
+
+
+def load_extractors(names):
+    """name -> (extractor class, methods to time)"""
+    extractors = {}
+    if 'app' in names:
+        # Importing app opens the instance databases, as running it would
+        from app import SystemDataExtractor as AppExtractor
+        extractors['app'] = (AppExtractor, ['get_host_id', *AppExtractor.SECTIONS.values(), 'get_full_data'])
+    if 'monitor' in names:
+        from flask_system_monitor import SystemDataExtractor as MonitorExtractor
+        extractors['monitor'] = (MonitorExtractor, MONITOR_METHODS)
+    return extractors
+
+
+def bench_method(extractor_class, method, payloads, repeat):
+    """Best-of-``repeat`` time per call, with the exceptions raised on the first pass"""
+    errors = Counter()
+    best = None
+    for attempt in range(repeat):
+        started = time.perf_counter()
+        for payload in payloads:
+            try:
+                getattr(extractor_class(payload), method)()
+            except Exception as e:
+                if attempt == 0:
+                    errors[type(e).__name__] += 1
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        'method': method,
+        'us_per_call': round(best / len(payloads) * 1e6, 2),
+        'calls_per_s': round(len(payloads) / best) if best else None,
+        'errors': sum(errors.values()),
+        'error_types': dict(errors)
+    }
+
+
+def run(extractors, payloads, repeat):
+    return {name: [bench_method(extractor_class, method, payloads, repeat) for method in methods]
+            for name, (extractor_class, methods) in extractors.items()}
+
+
+def print_table(results, count):
+    print(f"{count} payloads, best of repeats; errors counted on the first pass\n")
+    for name, rows in results.items():
+        print(f"[{name}]")
+        print(f"  {'method':<24}{'us/call':>10}{'calls/s':>12}{'errors':>8}  error types")
+        for row in rows:
+            types = ', '.join(f"{kind} x{n}" for kind, n in row['error_types'].items())
+            print(f"  {row['method']:<24}{row['us_per_call']:>10}{row['calls_per_s']:>12}{row['errors']:>8}  {types}")
+        print()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the extractor methods over a payload corpus")
+    parser.add_argument('--count', type=int, default=2000, help="Payloads to generate")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--edge-rate', type=float, default=0.2)
+    parser.add_argument('--corpus', help="JSON lines file from payload_corpus.py instead of generating one")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--extractor', choices=['app', 'monitor', 'all'], default='all')
+    parser.add_argument('--json', action='store_true', help="Print results as JSON, e.g. to diff two runs")
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus) as f:
+            corpus = [json.loads(line) for line in f if line.strip()]
+    else:
+        corpus = list(generate_corpus(args.count, args.seed, args.edge_rate))
+
+    names = ['app', 'monitor'] if args.extractor == 'all' else [args.extractor]
+    results = run(load_extractors(names), corpus, args.repeat)
+    if args.json:
+        print(json.dumps({'payloads': len(corpus), 'repeat': args.repeat, 'results': results}, indent=2))
+    else:
+        print_table(results, len(corpus))
@@ -0,0 +1,216 @@
+import csv
+import io
+import json
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = None
+    pq = None
+
+PARQUET_AVAILABLE = pq is not None
+
+CSV_FLUSH_ROWS = 500
+# Leading characters that make spreadsheet apps read a cell as a formula
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+PARQUET_ROW_GROUP_SIZE = 10000
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _first(value):
+    values = _as_list(value)
+    return values[0] if values and isinstance(values[0], dict) else {}
+
+
+def _join(values):
+    return '; '.join(str(value) for value in _as_list(values) if value not in (None, ''))
+
+
+def _disk_total(view, key):
+    return round(sum(disk.get(key, 0) for disk in view.get('storage', {}).get('logical_disks', [])), 2)
+
+
+# Stable export schema: (column, type, getter(summary, view)).
+# Append new columns at the end so existing spreadsheets and queries keep working.
+EXPORT_COLUMNS = [
+    ('host_id', 'string', lambda s, v: s['host_id']),
+    ('hostname', 'string', lambda s, v: s['hostname']),
+    ('last_seen', 'string', lambda s, v: s['last_seen']),
+    ('snapshot_version', 'int', lambda s, v: s['version']),
+    ('collected_at', 'string', lambda s, v: v.get('system', {}).get('timestamp')),
+    ('os', 'string', lambda s, v: v.get('system', {}).get('os')),
+    ('os_version', 'string', lambda s, v: v.get('system', {}).get('os_version')),
+    ('architecture', 'string', lambda s, v: v.get('system', {}).get('architecture')),
+    ('cpu_name', 'string', lambda s, v: v.get('hardware', {}).get('cpu', {}).get('name')),
+    ('cpu_cores', 'int', lambda s, v: v.get('hardware', {}).get('cpu', {}).get('cores')),
+    ('cpu_threads', 'int', lambda s, v: v.get('hardware', {}).get('cpu', {}).get('threads')),
+    ('cpu_max_clock_mhz', 'int', lambda s, v: v.get('hardware', {}).get('cpu', {}).get('max_clock_speed')),
+    ('cpu_usage', 'float', lambda s, v: v.get('hardware', {}).get('cpu', {}).get('usage')),
+    ('ram_total_gb', 'float', lambda s, v: v.get('hardware', {}).get('memory', {}).get('total_ram')),
+    ('ram_available_gb', 'float', lambda s, v: v.get('hardware', {}).get('memory', {}).get('available_ram')),
+    ('ram_used_gb', 'float', lambda s, v: v.get('hardware', {}).get('memory', {}).get('used_ram')),
+    ('ram_usage_percent', 'float', lambda s, v: v.get('hardware', {}).get('memory', {}).get('usage_percent')),
+    ('gpu_count', 'int', lambda s, v: len(_as_list(v.get('hardware', {}).get('graphics')))),
+    ('gpu_names', 'string', lambda s, v: s['gpu_model']),
+    ('gpu_max_vram_gb', 'float', lambda s, v: max(
+        (gpu.get('AdapterRAMGB') or 0 for gpu in _as_list(v.get('hardware', {}).get('graphics'))
+         if isinstance(gpu, dict)), default=0)),
+    ('disk_count', 'int', lambda s, v: len(v.get('storage', {}).get('logical_disks', []))),
+    ('disk_total_gb', 'float', lambda s, v: _disk_total(v, 'total_size')),
+    ('disk_used_gb', 'float', lambda s, v: _disk_total(v, 'used')),
+    ('disk_free_gb', 'float', lambda s, v: _disk_total(v, 'free')),
+    ('disk_max_usage_percent', 'float', lambda s, v: s['max_disk_usage']),
+    ('physical_disk_models', 'string', lambda s, v: _join(
+        disk.get('Model') for disk in _as_list(v.get('storage', {}).get('physical_disks'))
+        if isinstance(disk, dict))),
+    ('primary_ip', 'string', lambda s, v: v.get('network', {}).get('primary_ip')),
+    ('primary_mac', 'string', lambda s, v: v.get('network', {}).get('primary_mac')),
+    ('network_adapter', 'string', lambda s, v: v.get('network', {}).get('adapter_info', {}).get('description')),
+    ('motherboard_manufacturer', 'string', lambda s, v: _first(v.get('motherboard', {}).get('motherboard')).get('Manufacturer')),
+    ('motherboard_product', 'string', lambda s, v: _first(v.get('motherboard', {}).get('motherboard')).get('Product')),
+    ('bios_version', 'string', lambda s, v: _first(v.get('motherboard', {}).get('bios')).get('SMBIOSBIOSVersion')),
+    ('score', 'float', lambda s, v: s['score']),
+    ('grade', 'string', lambda s, v: s['grade']),
+    ('bench_cpu_single', 'float', lambda s, v: v.get('benchmark', {}).get('cpu', {}).get('single_core_score')),
+    ('bench_cpu_multi', 'float', lambda s, v: v.get('benchmark', {}).get('cpu', {}).get('multi_core_score')),
+    ('bench_memory_gbps', 'float', lambda s, v: v.get('benchmark', {}).get('memory', {}).get('copy_gbps')),
+    ('bench_disk_seq_write_mbps', 'float', lambda s, v: v.get('benchmark', {}).get('disk', {}).get('seq_write_mbps')),
+    ('bench_disk_rand_write_iops', 'float', lambda s, v: v.get('benchmark', {}).get('disk', {}).get('rand_write_iops'))
+]
+
+COLUMN_NAMES = [name for name, _, _ in EXPORT_COLUMNS]
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet')
+}
+
+
+def _coerce(kind, value):
+    if value is None or value == '':
+        return None
+    try:
+        if kind == 'int':
+            return int(value)
+        if kind == 'float':
+            return float(value)
+    except (TypeError, ValueError):
+        return None
+    return str(value) if kind == 'string' else value
+
+
+def flatten(summary, view):
+    """One export row for a host, following EXPORT_COLUMNS"""
+    row = {}
+    for name, kind, getter in EXPORT_COLUMNS:
+        try:
+            value = getter(summary, view)
+        except (AttributeError, TypeError, KeyError):
+            value = None
+        row[name] = _coerce(kind, value)
+    return row
+
+
+def iter_rows(records):
+    for summary, view in records:
+        yield flatten(summary, view)
+
+
+def _csv_safe(value):
+    """Agent-supplied text quoted with ' if a spreadsheet would evaluate it, e.g. '=HYPERLINK(...)'"""
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUMN_NAMES)
+    writer.writeheader()
+    for count, row in enumerate(rows, 1):
+        writer.writerow({name: _csv_safe(value) for name, value in row.items()})
+        if count % CSV_FLUSH_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, separators=(',', ':')) + '\n'
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to a generator"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _parquet_schema():
+    types = {'string': pa.string(), 'int': pa.int64(), 'float': pa.float64()}
+    return pa.schema([(name, types[kind]) for name, kind, _ in EXPORT_COLUMNS])
+
+
+def stream_parquet(rows, row_group_size=PARQUET_ROW_GROUP_SIZE):
+    """Write rows as Parquet, one row group at a time, yielding bytes as they are produced"""
+    if pq is None:
+        raise RuntimeError("Parquet export requires pyarrow")
+
+    schema = _parquet_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    try:
+        columns = {name: [] for name in COLUMN_NAMES}
+        pending = 0
+        for row in rows:
+            for name in COLUMN_NAMES:
+                columns[name].append(row[name])
+            pending += 1
+            if pending == row_group_size:
+                writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+                columns = {name: [] for name in COLUMN_NAMES}
+                pending = 0
+                yield sink.drain()
+        if pending:
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def stream_export(records, fmt):
+    """Byte/str chunks of the export in ``fmt`` for (summary, view) records"""
+    rows = iter_rows(records)
+    if fmt == 'csv':
+        return stream_csv(rows)
+    if fmt == 'ndjson':
+        return stream_ndjson(rows)
+    if fmt == 'parquet':
+        return stream_parquet(rows)
+    raise ValueError(f"Unsupported export format '{fmt}'")
@@ -0,0 +1,61 @@
+import copy
+import hashlib
+import json
+
+# Fields that change on every agent run without the machine changing; '*' matches list items
+VOLATILE_FIELDS = [
+    ('python_collected', 'timestamp'),
+    ('powershell_collected', 'timestamp'),
+    # Diagnostics of the moment; kept in the archive for every upload
+    ('python_collected', 'processes'),
+    ('python_collected', 'activity'),
+    ('collection_status',),
+    ('trace',),
+]
+
+# Fields rounded to a bucket size before hashing, so jitter does not count as a change
+BUCKETED_FIELDS = {
+    ('python_collected', 'hardware', 'cpu_usage'): 10,
+    ('python_collected', 'hardware', 'available_ram'): 0.5,
+    ('python_collected', 'hardware', 'disk_info', '*', 'used'): 1,
+    ('python_collected', 'hardware', 'disk_info', '*', 'free'): 1,
+    ('powershell_collected', 'storage', 'logical_disks', '*', 'FreeGB'): 1,
+}
+
+
+def _apply(node, path, action):
+    if not path:
+        return
+    key, rest = path[0], path[1:]
+    if key == '*':
+        children = node if isinstance(node, list) else [node] if isinstance(node, dict) else []
+        for child in children:
+            _apply(child, rest, action)
+    elif isinstance(node, dict) and key in node:
+        if rest:
+            _apply(node[key], rest, action)
+        else:
+            action(node, key)
+
+
+def _drop(node, key):
+    del node[key]
+
+
+def _bucket(step):
+    def action(node, key):
+        value = node[key]
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            node[key] = round(value / step) * step
+    return action
+
+
+def content_hash(payload):
+    """SHA-256 of the payload with volatile fields removed and jittery metrics bucketed"""
+    canonical = copy.deepcopy(payload)
+    for path in VOLATILE_FIELDS:
+        _apply(canonical, path, _drop)
+    for path, step in BUCKETED_FIELDS.items():
+        _apply(canonical, path, _bucket(step))
+    encoded = json.dumps(canonical, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
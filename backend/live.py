@@ -0,0 +1,196 @@
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+
+
+def snapshot_id(sections):
+    """Stable id of a set of extracted sections, used as the SSE event id"""
+    canonical = json.dumps(sections, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def diff_sections(old, new):
+    """(changed, removed) between two snapshots.
+
+    ``changed`` holds the changed sections, narrowed to the changed keys of
+    each section; ``removed`` lists, per section, the keys that disappeared
+    from it. A key whose new value is ``None`` is changed, not removed.
+    """
+    changes = {}
+    removed = {}
+    for name, section in new.items():
+        previous = old.get(name) if old else None
+        if previous == section:
+            continue
+        if isinstance(previous, dict) and isinstance(section, dict):
+            changed = {key: value for key, value in section.items()
+                       if key not in previous or previous[key] != value}
+            if changed:
+                changes[name] = changed
+            gone = [key for key in previous if key not in section]
+            if gone:
+                removed[name] = gone
+        else:
+            changes[name] = section
+    return changes, removed
+
+
+def format_event(event, data, event_id=None):
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'), default=str)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+class _HostChannel:
+    def __init__(self, lock, history):
+        self.condition = threading.Condition(lock)
+        self.subscribers = 0
+        self.seq = 0
+        self.sections = None
+        self.snapshot_id = None
+        # Store version of ``sections``, and when (at which store stamp) subscribers last checked for a newer one
+        self.version = None
+        self.refreshed = None
+        self.refreshed_stamp = None
+        # Recent (snapshot id, sections) pairs, so reconnecting clients get a diff
+        self.history = deque(maxlen=history)
+
+
+class BroadcastHub:
+    """Per-host fan-out of snapshot diffs to Server-Sent Event streams.
+
+    Subscribers hold no queue of their own: each one only remembers the last
+    sequence number it sent and waits on the host's condition, so an idle
+    viewer costs one parked thread (or greenlet) and nothing per publish.
+
+    Only hosts someone is watching have a channel: publishing to any other
+    host is a no-op, and a channel with its sections and history is dropped
+    when its last subscriber disconnects.
+    """
+
+    def __init__(self, history=8):
+        self.history = history
+        self._lock = threading.Lock()
+        self._channels = {}
+
+    def _subscribe(self, host):
+        with self._lock:
+            channel = self._channels.get(host)
+            if channel is None:
+                channel = self._channels[host] = _HostChannel(self._lock, self.history)
+            channel.subscribers += 1
+            return channel
+
+    def _unsubscribe(self, host, channel):
+        with self._lock:
+            channel.subscribers -= 1
+            if not channel.subscribers and self._channels.get(host) is channel:
+                del self._channels[host]
+
+    def current_id(self, host):
+        with self._lock:
+            channel = self._channels.get(host)
+            return channel.snapshot_id if channel else None
+
+    def version(self, host):
+        """Store version of the snapshot last published for ``host``, if it is watched"""
+        with self._lock:
+            channel = self._channels.get(host)
+            return channel.version if channel else None
+
+    def refresh_due(self, host, interval, stamp=None):
+        """True at most once per ``interval`` for a watched host, so its viewers share one refresh.
+
+        With a ``stamp`` (e.g. a change counter of the shared store), a refresh
+        is only due once the stamp has moved since the last one.
+        """
+        now = time.monotonic()
+        with self._lock:
+            channel = self._channels.get(host)
+            if channel is None or (channel.refreshed is not None and now - channel.refreshed < interval):
+                return False
+            if stamp is not None and stamp == channel.refreshed_stamp:
+                return False
+            channel.refreshed = now
+            channel.refreshed_stamp = stamp
+            return True
+
+    def publish(self, host, sections, version=None):
+        """Record a new snapshot for a watched ``host`` and wake its subscribers if anything changed"""
+        new_id = snapshot_id(sections)
+        with self._lock:
+            channel = self._channels.get(host)
+            if channel is None:
+                return None
+            if version is not None:
+                channel.version = version
+            if channel.snapshot_id == new_id:
+                return None
+            diff = diff_sections(channel.sections, sections)
+            channel.seq += 1
+            channel.sections = sections
+            channel.snapshot_id = new_id
+            channel.history.append((new_id, sections))
+            channel.condition.notify_all()
+            return diff
+
+    def _changes_since(self, channel, known_id):
+        if known_id == channel.snapshot_id:
+            return {}, {}
+        for old_id, old_sections in channel.history:
+            if old_id == known_id:
+                return diff_sections(old_sections, channel.sections)
+        # Unknown or expired id: send everything
+        return dict(channel.sections), {}
+
+    def stream(self, host, last_event_id=None, heartbeat=15, refresh=None, poll=None):
+        """Generator of SSE frames for ``host``.
+
+        ``refresh`` is called on subscribing, to fill a new channel, and every
+        ``poll`` seconds (default: every heartbeat) while no snapshot arrives,
+        so a process that did not receive the ingest itself can pick up
+        snapshots published elsewhere.
+        """
+        channel = self._subscribe(host)
+        try:
+            if refresh is not None:
+                refresh(host)
+            yield from self._frames(host, channel, last_event_id, heartbeat, refresh, poll or heartbeat)
+        finally:
+            # Runs when the client disconnects and the server closes the generator
+            self._unsubscribe(host, channel)
+
+    def _frames(self, host, channel, last_event_id, heartbeat, refresh, poll):
+        known_id = last_event_id
+        seen_seq = -1
+        yield f"retry: {heartbeat * 1000}\n\n"
+        last_frame = time.monotonic()
+        while True:
+            with self._lock:
+                if channel.seq == seen_seq:
+                    channel.condition.wait(poll)
+                if channel.seq != seen_seq and channel.sections is not None:
+                    seen_seq = channel.seq
+                    changes, removed = self._changes_since(channel, known_id)
+                    known_id = channel.snapshot_id
+                    data = {'host': host, 'changed': changes, 'removed': removed}
+                    event = format_event('snapshot', data, known_id) if changes or removed else None
+                else:
+                    seen_seq = channel.seq
+                    event = None
+
+            if event:
+                yield event
+                last_frame = time.monotonic()
+                continue
+            if refresh is not None:
+                refresh(host)
+            if time.monotonic() - last_frame >= heartbeat:
+                # Comment frame keeps proxies from closing the idle connection
+                yield f": keep-alive {int(time.time())}\n\n"
+                last_frame = time.monotonic()
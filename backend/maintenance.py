@@ -0,0 +1,346 @@
+import glob
+import gzip
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+from anomaly import extract_metrics
+
+try:
+    import fcntl
+except ImportError:  # No flock on Windows; runs are then not coordinated between processes
+    fcntl = None
+
+ROLLUP_SCHEMA = """
+-- Daily per-host aggregates of archived snapshots, kept after the raw payloads expire
+CREATE TABLE IF NOT EXISTS host_rollups (
+    host_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    snapshots INTEGER NOT NULL,
+    cpu_usage_sum REAL NOT NULL,
+    cpu_usage_max REAL NOT NULL,
+    ram_samples INTEGER NOT NULL,
+    ram_usage_sum REAL NOT NULL,
+    ram_usage_max REAL,
+    disk_usage_max REAL,
+    PRIMARY KEY (host_id, day)
+);
+
+CREATE INDEX IF NOT EXISTS idx_host_rollups_day ON host_rollups (day);
+
+CREATE TABLE IF NOT EXISTS maintenance_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Days each class of data is kept; 0 keeps it forever
+DEFAULT_RETENTION = {
+    'raw': 30,       # Archived agent payloads, rolled up into daily aggregates first, and upload traces
+    'history': 365,  # Daily rollups and detected anomalies
+    'views': 180,    # Hosts not seen since, with their stored views, and rendered PDF exports
+    'logs': 14       # Rotated logs/system_info.log files
+}
+# Idempotency keys only need to outlive an agent's retries
+INGEST_KEY_DAYS = 7
+
+# Rows per delete transaction, and the pause between them so ingest can take the write lock
+DELETE_BATCH_SIZE = 500
+BATCH_PAUSE = 0.05
+# Free pages handed back to the file system per database and run
+VACUUM_PAGES = 2000
+# Days of archive rolled up per pass, bounding the aggregates held in memory
+ROLLUP_DAYS_PER_PASS = 7
+
+# How often the background thread checks whether a run is due
+POLL_INTERVAL = 300
+
+
+def _day_start(timestamp):
+    """UTC midnight at or before ``timestamp``"""
+    day = datetime.fromtimestamp(timestamp, timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return day.timestamp()
+
+
+def incremental_vacuum(conn, pages):
+    """Return up to ``pages`` free pages to the file system; returns how many were freed"""
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        return 0  # Created before incremental vacuum; needs one full VACUUM first
+    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    # Each step frees one page, and execute() only steps once; executescript() runs it to the end
+    conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+    return before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+class MaintenanceJob:
+    """Retention, rollup and space reclaim for everything the backend accumulates.
+
+    A run rolls expiring archive days into per-host daily aggregates before
+    compacting them away, expires hosts, anomalies, rollups, upload traces,
+    idempotency keys, PDF exports and rotated logs, and returns freed database
+    pages a bounded number at a time. Deletes are done in small transactions so uploads are
+    never blocked for long. Runs are coordinated between processes through a
+    lock file and the time of the last run.
+    """
+
+    def __init__(self, directory, store, archive, anomalies, snapshot_index, extract_view,
+                 exports_directory=None, log_path=None, retention=None, traces=None):
+        self.directory = directory
+        self.store = store
+        self.archive = archive
+        self.anomalies = anomalies
+        self.snapshot_index = snapshot_index
+        # Raw payload -> view with at least the 'hardware' and 'storage' sections
+        self.extract_view = extract_view
+        self.exports_directory = exports_directory
+        self.log_path = log_path
+        self.traces = traces
+        self.retention = {**DEFAULT_RETENTION, **(retention or {})}
+        self._local = threading.local()
+        self._thread = None
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(ROLLUP_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(os.path.join(self.directory, 'rollups.db'), timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _get_state(self, key):
+        row = self.connection().execute("SELECT value FROM maintenance_state WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else None
+
+    def _set_state(self, conn, key, value):
+        conn.execute("INSERT INTO maintenance_state (key, value) VALUES (?, ?) "
+                     "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, str(value)))
+
+    def _cutoff(self, data_class, now):
+        days = self.retention[data_class]
+        return now - days * 86400 if days else None
+
+    # ── Rollups ──────────────────────────────────────────────────────
+
+    def rollup(self, until):
+        """Aggregate archived snapshots of every whole day before ``until`` not rolled up yet.
+
+        Passes cover whole days and replace their rows, so a pass interrupted
+        by a crash is simply redone.
+        """
+        until = _day_start(until)
+        watermark = self._get_state('rollup_watermark')
+        start = float(watermark) if watermark else None
+        if start is None:
+            first = next(self.archive.replay(until=until), None)
+            if first is None:
+                return 0
+            start = _day_start(first[1])
+
+        days = 0
+        while start < until:
+            end = min(until, start + ROLLUP_DAYS_PER_PASS * 86400)
+            rollups = {}
+            for host, timestamp, payload in self.archive.replay(start, end):
+                metrics = extract_metrics(self.extract_view(payload))
+                day = datetime.fromtimestamp(timestamp, timezone.utc).date().isoformat()
+                row = rollups.setdefault((host, day), [0, 0.0, 0.0, 0, 0.0, None, None])
+                cpu = metrics.get('cpu_usage', 0.0)
+                row[0] += 1
+                row[1] += cpu
+                row[2] = max(row[2], cpu)
+                if 'ram_usage_percent' in metrics:
+                    row[3] += 1
+                    row[4] += metrics['ram_usage_percent']
+                    row[5] = max(row[5] or 0.0, metrics['ram_usage_percent'])
+                disks = [value for name, value in metrics.items() if name.startswith('disk_usage_percent:')]
+                if disks:
+                    row[6] = max(row[6] or 0.0, max(disks))
+
+            with self.connection() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO host_rollups (host_id, day, snapshots, cpu_usage_sum, cpu_usage_max, "
+                    "ram_samples, ram_usage_sum, ram_usage_max, disk_usage_max) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(host, day, *row) for (host, day), row in rollups.items()]
+                )
+                self._set_state(conn, 'rollup_watermark', end)
+            days += round((end - start) / 86400)
+            start = end
+        return days
+
+    def get_rollups(self, host_id, since=None):
+        """Daily aggregates of a host, oldest first"""
+        rows = self.connection().execute(
+            "SELECT * FROM host_rollups WHERE host_id = ? AND day >= ? ORDER BY day",
+            (host_id, since or '')
+        ).fetchall()
+        return [{
+            'day': row['day'],
+            'snapshots': row['snapshots'],
+            'cpu_usage_mean': round(row['cpu_usage_sum'] / row['snapshots'], 1),
+            'cpu_usage_max': row['cpu_usage_max'],
+            'ram_usage_mean': round(row['ram_usage_sum'] / row['ram_samples'], 1) if row['ram_samples'] else None,
+            'ram_usage_max': row['ram_usage_max'],
+            'disk_usage_max': row['disk_usage_max']
+        } for row in rows]
+
+    # ── Expiry ───────────────────────────────────────────────────────
+
+    def _in_batches(self, delete):
+        """Call ``delete()`` until it removes nothing; returns the total removed"""
+        total = 0
+        while True:
+            removed = delete()
+            if not removed:
+                return total
+            total += removed
+            time.sleep(BATCH_PAUSE)
+
+    def expire_hosts(self, before):
+        before = datetime.fromtimestamp(before).isoformat()
+        removed = []
+        while True:
+            host_ids = self.store.delete_stale_hosts(before, DELETE_BATCH_SIZE)
+            if not host_ids:
+                break
+            self.anomalies.forget_hosts(host_ids)
+            removed.extend(host_ids)
+            time.sleep(BATCH_PAUSE)
+        # One rewrite of the shared index for the whole run
+        self.snapshot_index.remove(removed)
+        return len(removed)
+
+    def expire_rollups(self, before):
+        day = datetime.fromtimestamp(before, timezone.utc).date().isoformat()
+
+        def delete():
+            with self.connection() as conn:
+                return conn.execute(
+                    "DELETE FROM host_rollups WHERE rowid IN (SELECT rowid FROM host_rollups WHERE day < ? LIMIT ?)",
+                    (day, DELETE_BATCH_SIZE)
+                ).rowcount
+        return self._in_batches(delete)
+
+    def expire_files(self, pattern, before):
+        removed = 0
+        for path in glob.glob(pattern):
+            try:
+                if os.path.getmtime(path) < before:
+                    os.unlink(path)
+                    removed += 1
+            except FileNotFoundError:
+                continue  # Removed by another process meanwhile
+        return removed
+
+    def rotate_log(self, now):
+        """Move the log aside and gzip it; workers reopen the path on their next write"""
+        if not self.log_path or not os.path.exists(self.log_path) or not os.path.getsize(self.log_path):
+            return None
+        rotated = f"{self.log_path}.{datetime.fromtimestamp(now).strftime('%Y%m%d-%H%M%S')}"
+        os.replace(self.log_path, rotated)
+        with open(rotated, 'rb') as source, gzip.open(rotated + '.gz', 'wb') as target:
+            shutil.copyfileobj(source, target)
+        os.unlink(rotated)
+        return rotated + '.gz'
+
+    # ── Runs ─────────────────────────────────────────────────────────
+
+    def run(self, now=None):
+        """One full maintenance pass; returns what it did"""
+        now = now or time.time()
+        report = {}
+
+        raw_cutoff = self._cutoff('raw', now)
+        if raw_cutoff is not None:
+            report['rollup_days'] = self.rollup(raw_cutoff)
+            # Only drop what the rollup has covered
+            watermark = self._get_state('rollup_watermark')
+            if watermark:
+                report['archive'] = self.archive.compact(float(watermark))
+            if self.traces:
+                report['traces_deleted'] = self._in_batches(
+                    lambda: self.traces.prune(raw_cutoff, DELETE_BATCH_SIZE))
+
+        history_cutoff = self._cutoff('history', now)
+        if history_cutoff is not None:
+            report['rollups_deleted'] = self.expire_rollups(history_cutoff)
+            report['anomalies_deleted'] = self._in_batches(
+                lambda: self.anomalies.prune(history_cutoff, DELETE_BATCH_SIZE))
+
+        views_cutoff = self._cutoff('views', now)
+        if views_cutoff is not None:
+            report['hosts_deleted'] = self.expire_hosts(views_cutoff)
+            if self.exports_directory:
+                report['exports_deleted'] = self.expire_files(
+                    os.path.join(self.exports_directory, '*.pdf*'), views_cutoff) + self.expire_files(
+                    os.path.join(self.exports_directory, 'jobs', '*'), views_cutoff)
+
+        key_cutoff = datetime.fromtimestamp(now - INGEST_KEY_DAYS * 86400).isoformat()
+        report['ingest_keys_deleted'] = self._in_batches(
+            lambda: self.store.prune_ingest_keys(key_cutoff, DELETE_BATCH_SIZE))
+
+        report['log_rotated'] = self.rotate_log(now)
+        logs_cutoff = self._cutoff('logs', now)
+        if logs_cutoff is not None and self.log_path:
+            report['logs_deleted'] = self.expire_files(f"{self.log_path}.*.gz", logs_cutoff)
+
+        report['pages_freed'] = sum(incremental_vacuum(conn, VACUUM_PAGES) for conn in self.connections())
+
+        with self.connection() as conn:
+            self._set_state(conn, 'last_run', now)
+        return report
+
+    def connections(self):
+        """Every database the job keeps small"""
+        extra = [self.traces.connection()] if self.traces else []
+        return self.store.connections() + [self.anomalies.connection(), self.connection()] + extra
+
+    def full_vacuum(self):
+        """Rewrite every database once so later runs can reclaim space incrementally"""
+        for conn in self.connections():
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+
+    def run_if_due(self, interval):
+        """Run unless another process is running or has run within ``interval`` seconds"""
+        lock_fd = os.open(os.path.join(self.directory, 'maintenance.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return None
+            last_run = self._get_state('last_run')
+            if last_run and time.time() - float(last_run) < interval:
+                return None
+            return self.run()
+        finally:
+            os.close(lock_fd)
+
+    def start(self, interval, on_done=None, on_error=None):
+        """Run every ``interval`` seconds on a daemon thread, in whichever worker gets there first"""
+        def loop():
+            while True:
+                try:
+                    report = self.run_if_due(interval)
+                    if report is not None and on_done:
+                        on_done(report)
+                except Exception as e:
+                    if on_error:
+                        on_error(e)
+                time.sleep(min(POLL_INTERVAL, interval))
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=loop, name='maintenance', daemon=True)
+            self._thread.start()
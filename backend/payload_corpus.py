@@ -0,0 +1,215 @@
+import argparse
+import json
+import random
+import sys
+from datetime import datetime, timedelta
+
+# (name, cores, threads, max clock MHz) as Win32_Processor reports them, trailing spaces included
+CPUS = [
+    ("AMD Ryzen 5 4600H with Radeon Graphics ", 6, 12, 3000),
+    ("AMD Ryzen 7 5800X 8-Core Processor             ", 8, 16, 3800),
+    ("AMD Ryzen 9 7950X 16-Core Processor            ", 16, 32, 4500),
+    ("Intel(R) Core(TM) i5-11400H @ 2.70GHz", 6, 12, 2688),
+    ("Intel(R) Core(TM) i7-12700K", 12, 20, 3610),
+    ("Intel(R) Core(TM) i3-10110U CPU @ 2.10GHz", 2, 4, 2592),
+    ("Intel(R) Celeron(R) N4020 CPU @ 1.10GHz", 2, 2, 1101),
+]
+
+# (name, AdapterRAMGB); AdapterRAM is a uint32, so Windows caps it at 4 GB
+GPUS = [
+    ("AMD Radeon(TM) Graphics", 0.5),
+    ("NVIDIA GeForce GTX 1650", 4),
+    ("NVIDIA GeForce RTX 3060", 4),
+    ("NVIDIA GeForce RTX 4090", 4),
+    ("Intel(R) UHD Graphics", 1),
+    ("Intel(R) Iris(R) Xe Graphics", 1),
+    ("Microsoft Basic Display Adapter", 0),
+    ("Parsec Virtual Display Adapter", 0),
+]
+
+# (model, InterfaceType, SizeGB)
+PHYSICAL_DISKS = [
+    ("ST1000LM035-1RK172", "IDE", 931.51),
+    ("Samsung SSD 970 EVO Plus 1TB", "SCSI", 931.51),
+    ("WDC WD20EZAZ-00GGJB0", "IDE", 1863.01),
+    ("KINGSTON SA400S37240G", "IDE", 223.57),
+    ("NVMe Micron 2210 512GB", "SCSI", 476.94),
+    ("Generic- SD/MMC USB Device", "USB", 0),
+]
+
+NICS = [
+    "Realtek 8822CE Wireless LAN 802.11ac PCI-E NIC",
+    "Intel(R) Ethernet Connection (7) I219-V",
+    "Intel(R) Wi-Fi 6 AX201 160MHz",
+    "Hyper-V Virtual Ethernet Adapter",
+    "VirtualBox Host-Only Ethernet Adapter",
+    "TAP-Windows Adapter V9",
+]
+
+MEMORY_VENDORS = ["Kingston", "Samsung", "Micron", "SK Hynix", "Corsair", "Unknown"]
+BOARDS = [("LENOVO", "LNVNB161216"), ("ASUSTeK COMPUTER INC.", "ROG STRIX B550-F GAMING"),
+          ("Dell Inc.", "0X8DXD"), ("HP", "8603"), ("Micro-Star International Co., Ltd.", "MAG B660M")]
+OS_RELEASES = [("10", "10.0.19045", "Microsoft Windows 10 Pro"), ("11", "10.0.22631", "Microsoft Windows 11 Home"),
+               ("11", "10.0.26100", "Microsoft Windows 11 Pro")]
+
+# Edge cases seen in production payloads
+EDGE_CASES = (
+    'single_object',       # Every PowerShell list has one item, so it is serialized as a bare object
+    'missing_powershell',  # Older agents omit powershell_collected entirely
+    'powershell_error',    # The script failed; only an error message was sent
+    'zero_byte_disk',      # A card reader or empty optical drive reports a 0 GB volume
+    'many_devices',        # Workstations and VMs with many GPUs, NICs and disks
+    'no_battery',          # Desktops: Win32_Battery returns nothing, serialized as null
+)
+
+
+def _ps_list(items):
+    """ConvertTo-Json output for a pipeline result: null, a bare object, or an array"""
+    if not items:
+        return None
+    return items[0] if len(items) == 1 else items
+
+
+def _mac(rng):
+    return ':'.join(f'{rng.randrange(256):02x}' for _ in range(6))
+
+
+def _ip(rng):
+    return f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}"
+
+
+def generate_payload(rng, edge_cases=()):
+    """One agent upload with the given EDGE_CASES applied"""
+    edge_cases = set(edge_cases)
+    many = 'many_devices' in edge_cases
+    single = 'single_object' in edge_cases
+
+    def count(low, high, many_count):
+        return 1 if single else many_count if many else rng.randint(low, high)
+
+    collected_at = datetime(2025, 1, 1) + timedelta(seconds=rng.randrange(365 * 86400))
+    cpu_name, cores, threads, clock = rng.choice(CPUS)
+    release, version, caption = rng.choice(OS_RELEASES)
+    node = rng.getrandbits(47)
+
+    modules = [{"Capacity": rng.choice([4, 8, 16, 32]) * 1024 ** 3, "Manufacturer": rng.choice(MEMORY_VENDORS),
+                "Speed": rng.choice([2400, 2666, 3200, 4800, 5600])} for _ in range(count(1, 4, 8))]
+    total_ram = round(sum(module["Capacity"] for module in modules) / 1024 ** 3 * 0.96, 2)
+
+    letters = "CDEFGHIJKLMNOPQRSTUVWXYZ"
+    python_disks, logical_disks = [], []
+    for index in range(count(1, 3, 12)):
+        size = round(rng.uniform(100, 2000), 2)
+        if 'zero_byte_disk' in edge_cases and index == 0:
+            size = 0
+        used = round(size * rng.uniform(0.05, 0.98), 2)
+        device = f"{letters[index]}:\\"
+        python_disks.append({"device": device, "mountpoint": device, "fstype": "NTFS" if size else "",
+                             "total_size": size, "used": used, "free": round(size - used, 2)})
+        logical_disks.append({"DeviceID": device[:2], "VolumeName": rng.choice(["", "Windows", "Data", "Games"]),
+                              "SizeGB": size, "FreeGB": round(size - used, 2)})
+    if 'zero_byte_disk' in edge_cases and not single:
+        python_disks.append({"device": "Z:\\", "mountpoint": "Z:\\", "fstype": "", "total_size": 0,
+                             "used": 0, "free": 0})
+
+    physical = [dict(zip(("Model", "InterfaceType", "SizeGB"), rng.choice(PHYSICAL_DISKS)))
+                for _ in range(count(1, 2, 12))]
+    gpus = [{"Name": name, "DriverVersion": f"{rng.randint(26, 32)}.{rng.randint(0, 21)}.{rng.randint(1000, 99999)}",
+             "AdapterRAMGB": vram} for name, vram in (rng.choice(GPUS) for _ in range(count(1, 2, 8)))]
+    adapters = [{"Description": rng.choice(NICS), "MACAddress": _mac(rng).upper(), "IPAddress": [_ip(rng)],
+                 "DefaultIPGateway": [_ip(rng)], "DNSServerSearchOrder": [_ip(rng), _ip(rng)]}
+                for _ in range(count(1, 2, 16))]
+    battery = [] if 'no_battery' in edge_cases else [{
+        "Name": "Primary", "EstimatedChargeRemaining": rng.randint(5, 100), "BatteryStatus": 2,
+        "DesignVoltage": 11550}]
+    manufacturer, product = rng.choice(BOARDS)
+
+    payload = {
+        "agent_source": "SpecScoreX Agent",
+        "python_collected": {
+            "timestamp": collected_at.isoformat(),
+            "system": {
+                "hostname": f"DESKTOP-{rng.getrandbits(28):07X}",
+                "os": "Windows",
+                "os_version": version,
+                "os_release": release,
+                "architecture": "AMD64",
+                "processor": "AMD64 Family 23 Model 96 Stepping 1, AuthenticAMD",
+                "host_id": str(node)
+            },
+            "hardware": {
+                "cpu_cores": cores,
+                "cpu_threads": threads,
+                "cpu_usage": round(rng.uniform(0, 100), 1),
+                "total_ram": total_ram,
+                "available_ram": round(total_ram * rng.uniform(0.05, 0.8), 2),
+                "disk_info": python_disks
+            },
+            "network": {
+                "ip_address": adapters[0]["IPAddress"][0],
+                "mac_address": ':'.join(f'{(node >> shift) & 0xff:02x}' for shift in range(40, -8, -8))
+            }
+        },
+        "powershell_collected": {
+            "timestamp": collected_at.strftime("%Y-%m-%dT%H:%M:%S"),
+            "system": {
+                "operating_system": {"Caption": caption, "Version": version, "OSArchitecture": "64-bit",
+                                     "BuildNumber": version.rsplit('.', 1)[-1],
+                                     "LastBootUpTime": f"/Date({int(collected_at.timestamp() * 1000) - 3600000})/",
+                                     "InstallDate": "/Date(1672531200000)/"},
+                "computer_system": {"Manufacturer": manufacturer, "Model": product, "Name": "DESKTOP",
+                                    "TotalPhysicalMemory": int(total_ram * 1024 ** 3), "SystemType": "x64-based PC"},
+                "processors": {"Name": cpu_name, "NumberOfCores": cores, "NumberOfLogicalProcessors": threads,
+                               "MaxClockSpeed": clock},
+                "memory_modules": _ps_list(modules),
+                "bios": {"Manufacturer": manufacturer, "SMBIOSBIOSVersion": f"V{rng.randint(1, 9)}.{rng.randint(0, 99)}",
+                         "ReleaseDate": "/Date(1640995200000)/"},
+                "motherboard": {"Manufacturer": manufacturer, "Product": product,
+                                "SerialNumber": f"{rng.getrandbits(32):08X}"}
+            },
+            "storage": {"logical_disks": _ps_list(logical_disks), "physical_disks": _ps_list(physical)},
+            "graphics": {"gpus": _ps_list(gpus)},
+            "network": {"adapters": _ps_list(adapters)},
+            "power": {"battery": _ps_list(battery)}
+        }
+    }
+
+    if 'missing_powershell' in edge_cases:
+        del payload["powershell_collected"]
+    elif 'powershell_error' in edge_cases:
+        payload["powershell_collected"] = {"error": "PowerShell script execution timed out"}
+    return payload
+
+
+def generate_corpus(count, seed=0, edge_rate=0.2):
+    """Yield ``count`` payloads; each has a chance of ``edge_rate`` of carrying one or two edge cases.
+
+    The same seed always yields the same corpus.
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        edge_cases = rng.sample(EDGE_CASES, rng.randint(1, 2)) if rng.random() < edge_rate else ()
+        yield generate_payload(rng, edge_cases)
+
+
+def edge_case_corpus(seed=0):
+    """One payload per edge case, for checking an extractor against each in isolation"""
+    rng = random.Random(seed)
+    return {case: generate_payload(rng, (case,)) for case in EDGE_CASES}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Write a seeded corpus of synthetic agent payloads as JSON lines")
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--edge-rate', type=float, default=0.2, help="Share of payloads with edge cases")
+    parser.add_argument('--output', help="File to write (default: stdout)")
+    args = parser.parse_args()
+
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        for payload in generate_corpus(args.count, args.seed, args.edge_rate):
+            out.write(json.dumps(payload) + '\n')
+    finally:
+        if args.output:
+            out.close()
@@ -0,0 +1,427 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import textwrap
+import threading
+import time
+import uuid
+import zipfile
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+# Bump when the layout changes so cached PDFs are not reused
+PDF_RENDERER_VERSION = 1
+
+# Renders a job keeps in flight per pool worker; the feeder waits for one to
+# finish before reading the next host, so no more views than this are held
+FEED_WINDOW_PER_WORKER = 2
+# Renders lost with a dead worker are resubmitted this often before they count as failed
+RENDER_RETRIES = 1
+# A running job's manifest is rewritten this often; one not rewritten for
+# FEEDER_STALE_AFTER seconds belongs to a process that died
+MANIFEST_FLUSH_SECONDS = 2
+FEEDER_STALE_AFTER = 120
+
+PAGE_WIDTH = 595  # A4 in points
+PAGE_HEIGHT = 842
+MARGIN = 50
+
+# Same thresholds the report template colours disks with
+USAGE_COLOURS = [
+    (85, (0.86, 0.21, 0.27)),
+    (70, (1.0, 0.76, 0.03)),
+    (0, (0.16, 0.65, 0.27))
+]
+
+
+def _escape(text):
+    text = str(text).replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    # Standard PDF fonts only cover Latin-1
+    return text.encode('latin-1', 'replace').decode('latin-1')
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+class PdfCanvas:
+    """Minimal pure-Python PDF writer: Helvetica text, filled rectangles and automatic paging"""
+
+    def __init__(self):
+        self.pages = []
+        self._new_page()
+
+    def _new_page(self):
+        self.ops = []
+        self.pages.append(self.ops)
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def ensure(self, height):
+        if self.y - height < MARGIN:
+            self._new_page()
+
+    def text(self, x, y, text, size=10, bold=False):
+        font = 'F2' if bold else 'F1'
+        self.ops.append(f"BT /{font} {size} Tf {x:.2f} {y:.2f} Td ({_escape(text)}) Tj ET")
+
+    def rect(self, x, y, width, height, rgb):
+        r, g, b = rgb
+        self.ops.append(f"{r:.3f} {g:.3f} {b:.3f} rg {x:.2f} {y:.2f} {width:.2f} {height:.2f} re f 0 g")
+
+    def line(self, text, size=10, bold=False, indent=0, gap=4):
+        # Helvetica averages roughly half the font size per character
+        width = int((PAGE_WIDTH - 2 * MARGIN - indent) / (size * 0.5))
+        for chunk in textwrap.wrap(str(text), width) or ['']:
+            self.ensure(size + gap)
+            self.y -= size
+            self.text(MARGIN + indent, self.y, chunk, size, bold)
+            self.y -= gap
+
+    def heading(self, text):
+        self.ensure(40)
+        self.y -= 12
+        self.line(text, size=14, bold=True)
+        self.rect(MARGIN, self.y, PAGE_WIDTH - 2 * MARGIN, 1, (0.4, 0.49, 0.92))
+        self.y -= 6
+
+    def key_values(self, pairs, indent=0):
+        for key, value in pairs:
+            self.line(f"{key}: {value if value not in (None, '') else 'Unknown'}", indent=indent)
+
+    def usage_bar(self, percent, indent=0):
+        self.ensure(14)
+        width = PAGE_WIDTH - 2 * MARGIN - indent
+        percent = max(0, min(100, percent or 0))
+        colour = next(rgb for threshold, rgb in USAGE_COLOURS if percent > threshold or threshold == 0)
+        self.y -= 10
+        self.rect(MARGIN + indent, self.y, width, 8, (0.9, 0.9, 0.9))
+        self.rect(MARGIN + indent, self.y, width * percent / 100, 8, colour)
+        self.y -= 6
+
+    def to_bytes(self, title):
+        objects = []
+
+        def add(body):
+            objects.append(body)
+            return len(objects)
+
+        catalog = add(None)
+        pages = add(None)
+        regular = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        bold = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+        info = add(f"<< /Title ({_escape(title)}) /Producer (SpecScoreX) >>".encode('latin-1'))
+
+        kids = []
+        for ops in self.pages:
+            stream = zlib.compress('\n'.join(ops).encode('latin-1'))
+            content = add(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream")
+            kids.append(add(
+                f"<< /Type /Page /Parent {pages} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                f"/Resources << /Font << /F1 {regular} 0 R /F2 {bold} 0 R >> >> /Contents {content} 0 R >>"
+                .encode('latin-1')
+            ))
+        objects[catalog - 1] = f"<< /Type /Catalog /Pages {pages} 0 R >>".encode('latin-1')
+        objects[pages - 1] = (
+            f"<< /Type /Pages /Kids [{' '.join(f'{kid} 0 R' for kid in kids)}] /Count {len(kids)} >>"
+            .encode('latin-1')
+        )
+
+        output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(len(output))
+            output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+        xref = len(output)
+        output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+        for offset in offsets:
+            output += b"%010d 00000 n \n" % offset
+        output += (b"trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                   % (len(objects) + 1, catalog, info, xref))
+        return bytes(output)
+
+
+def render_report_pdf(view, rating=None):
+    """Render the report_template.html sections of one host as a PDF document"""
+    system = view.get('system', {})
+    hardware = view.get('hardware', {})
+    cpu = hardware.get('cpu', {})
+    memory = hardware.get('memory', {})
+    storage = view.get('storage', {})
+    network = view.get('network', {})
+    motherboard = view.get('motherboard', {})
+    rating = rating or {}
+
+    pdf = PdfCanvas()
+    pdf.line("SpecScoreX System Report", size=20, bold=True, gap=8)
+    pdf.line(system.get('hostname', 'Unknown Host'), size=16, bold=True)
+    pdf.line(f"{system.get('os', 'Unknown OS')} {system.get('architecture', '')}")
+    pdf.line(f"Snapshot taken: {system.get('timestamp', 'Unknown')}")
+    if rating.get('score') is not None:
+        pdf.line(f"Score: {rating['score']} / 10 ({rating.get('grade', '')})", size=12, bold=True)
+
+    pdf.heading("CPU")
+    pdf.key_values([
+        ('Processor', cpu.get('name')),
+        ('Cores / Threads', f"{cpu.get('cores', 0)} / {cpu.get('threads', 0)}"),
+        ('Max clock', f"{cpu.get('max_clock_speed', 0)} MHz"),
+        ('Usage', f"{cpu.get('usage', 0)}%")
+    ])
+    pdf.usage_bar(cpu.get('usage'))
+
+    pdf.heading("Memory")
+    pdf.key_values([
+        ('Total', f"{memory.get('total_ram', 0)} GB"),
+        ('Used', f"{memory.get('used_ram', 0)} GB"),
+        ('Available', f"{memory.get('available_ram', 0)} GB"),
+        ('Usage', f"{memory.get('usage_percent', 0)}%")
+    ])
+    pdf.usage_bar(memory.get('usage_percent'))
+    for module in _as_list(memory.get('module_info')):
+        if isinstance(module, dict):
+            capacity = round((module.get('Capacity') or 0) / 1024 ** 3, 1)
+            pdf.line(f"{module.get('Manufacturer', 'Unknown')} {capacity} GB @ {module.get('Speed', '?')} MHz", indent=12)
+
+    pdf.heading("Graphics")
+    gpus = [gpu for gpu in _as_list(hardware.get('graphics')) if isinstance(gpu, dict)]
+    for gpu in gpus:
+        pdf.line(gpu.get('Name', 'Unknown GPU'), bold=True)
+        pdf.key_values([('VRAM', f"{gpu.get('AdapterRAMGB', 0)} GB"), ('Driver', gpu.get('DriverVersion'))], indent=12)
+    if not gpus:
+        pdf.line("No graphics information available")
+
+    pdf.heading("Storage")
+    for disk in storage.get('logical_disks', []):
+        pdf.line(f"{disk.get('device')} ({disk.get('filesystem')}): {disk.get('used', 0)} GB / "
+                 f"{disk.get('total_size', 0)} GB used, {disk.get('free', 0)} GB free "
+                 f"({disk.get('usage_percent', 0)}%)")
+        pdf.usage_bar(disk.get('usage_percent'))
+    for disk in _as_list(storage.get('physical_disks')):
+        if isinstance(disk, dict):
+            pdf.line(f"{disk.get('Model', 'Unknown')} - {disk.get('InterfaceType', '?')}, {disk.get('SizeGB', 0)} GB", indent=12)
+
+    pdf.heading("Network")
+    adapter = network.get('adapter_info', {})
+    pdf.key_values([
+        ('IP address', network.get('primary_ip')),
+        ('MAC address', network.get('primary_mac')),
+        ('Adapter', adapter.get('description')),
+        ('Gateway', ', '.join(_as_list(adapter.get('gateway')))),
+        ('DNS servers', ', '.join(_as_list(adapter.get('dns_servers'))))
+    ])
+
+    pdf.heading("Motherboard & BIOS")
+    board = next(iter(_as_list(motherboard.get('motherboard'))), {}) or {}
+    bios = next(iter(_as_list(motherboard.get('bios'))), {}) or {}
+    pdf.key_values([
+        ('Board', f"{board.get('Manufacturer', 'Unknown')} {board.get('Product', '')}"),
+        ('BIOS', f"{bios.get('Manufacturer', 'Unknown')} {bios.get('SMBIOSBIOSVersion', '')}")
+    ])
+
+    if rating.get('suggestions'):
+        pdf.heading("Recommendations")
+        for suggestion in rating['suggestions']:
+            pdf.line(f"- {suggestion}")
+
+    return pdf.to_bytes(f"System report - {system.get('hostname', 'Unknown')}")
+
+
+def snapshot_hash(view, rating=None):
+    canonical = json.dumps([PDF_RENDERER_VERSION, view, rating], sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _write_atomic(path, content):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def render_to_file(view, rating, path):
+    """Process-pool task: render one report and store it under its snapshot hash"""
+    try:
+        _write_atomic(path, render_report_pdf(view, rating))
+    except Exception as e:
+        _write_atomic(path + '.error', str(e).encode('utf-8'))
+        raise
+    return path
+
+
+class PdfExportJobs:
+    """Asynchronous PDF exports rendered by a bounded local process pool.
+
+    PDFs are cached on disk by snapshot hash and job manifests live next to
+    them, so any gunicorn worker can report a job's status or serve its file.
+    Each job is fed to the pool by a background thread of the worker that
+    accepted it, a bounded window of renders at a time.
+    """
+
+    def __init__(self, directory, max_workers=None):
+        self.directory = directory
+        self.jobs_directory = os.path.join(directory, 'jobs')
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) // 2)
+        self._pool = None
+        self._lock = threading.Lock()
+        os.makedirs(self.jobs_directory, exist_ok=True)
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            # Spawned workers only import this module, never the Flask app
+            self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def pdf_path(self, digest):
+        return os.path.join(self.directory, f"{digest}.pdf")
+
+    def _manifest_path(self, job_id):
+        return os.path.join(self.jobs_directory, f"{job_id}.json")
+
+    def _save(self, manifest):
+        manifest['updated_at'] = time.time()
+        _write_atomic(self._manifest_path(manifest['job_id']), json.dumps(manifest).encode('utf-8'))
+
+    def submit(self, records):
+        """Start a job for (host_id, hostname, view, rating) records and return its id at once.
+
+        ``records`` may be lazy; it is consumed on the feeder thread.
+        """
+        job_id = uuid.uuid4().hex
+        manifest = {'job_id': job_id, 'created_at': datetime.now().isoformat(), 'feeding': True, 'items': []}
+        self._save(manifest)
+        threading.Thread(target=self._feed, args=(manifest, records), name=f"pdf-export-{job_id[:8]}",
+                         daemon=True).start()
+        return job_id
+
+    def _render(self, view, rating, path):
+        with self._lock:
+            try:
+                return self.pool.submit(render_to_file, view, rating, path), self._pool
+            except BrokenProcessPool:
+                # A worker died while the pool was idle; start a fresh one
+                self._pool.shutdown(wait=False)
+                self._pool = None
+                return self.pool.submit(render_to_file, view, rating, path), self._pool
+
+    def _collect(self, in_flight):
+        """Wait for at least one render, recording failures the task itself could not"""
+        done, _ = wait(in_flight, timeout=MANIFEST_FLUSH_SECONDS, return_when=FIRST_COMPLETED)
+        for future in done:
+            path, pool, args, attempt = in_flight.pop(future)
+            error = future.exception()
+            if error is None:
+                continue
+            if isinstance(error, BrokenProcessPool):
+                # A worker was killed; later renders get a fresh pool
+                with self._lock:
+                    if self._pool is pool:
+                        self._pool = None
+                pool.shutdown(wait=False)
+                if attempt < RENDER_RETRIES:
+                    future, pool = self._render(*args, path)
+                    in_flight[future] = (path, pool, args, attempt + 1)
+                    continue
+            # A failing render leaves its own .error file; a dead worker does not
+            if not os.path.exists(path + '.error'):
+                _write_atomic(path + '.error', f"{type(error).__name__}: {error}".encode('utf-8'))
+
+    def _feed(self, manifest, records):
+        window = self.max_workers * FEED_WINDOW_PER_WORKER
+        in_flight = {}
+        try:
+            for host_id, hostname, view, rating in records:
+                digest = snapshot_hash(view, rating)
+                manifest['items'].append({'host_id': host_id, 'hostname': hostname, 'hash': digest})
+                path = self.pdf_path(digest)
+                if not os.path.exists(path):
+                    # Retry snapshots whose previous render failed
+                    if os.path.exists(path + '.error'):
+                        os.unlink(path + '.error')
+                    while len(in_flight) >= window:
+                        self._collect(in_flight)
+                        self._save(manifest)
+                    future, pool = self._render(view, rating, path)
+                    in_flight[future] = (path, pool, (view, rating), 0)
+                if time.time() - manifest['updated_at'] >= MANIFEST_FLUSH_SECONDS:
+                    self._save(manifest)
+            while in_flight:
+                self._collect(in_flight)
+                self._save(manifest)
+        except Exception as e:
+            # Renders still in flight finish on their own; the job has failed either way
+            manifest['error'] = f"Export stopped: {e}"
+        if 'error' not in manifest and len(manifest['items']) != 1:
+            try:
+                self._write_archive(manifest)
+            except OSError as e:
+                manifest['error'] = f"Could not build the archive: {e}"
+        manifest['feeding'] = False
+        self._save(manifest)
+
+    def _write_archive(self, manifest):
+        """Zip a bulk job's PDFs once all of them rendered; the job reads as running until then"""
+        items = manifest['items']
+        if not all(os.path.exists(self.pdf_path(item['hash'])) for item in items):
+            return
+        path, _ = self._result(manifest)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_STORED) as zf:
+            for item in items:
+                zf.write(self.pdf_path(item['hash']), f"report-{item['host_id']}.pdf")
+                if time.time() - manifest['updated_at'] >= MANIFEST_FLUSH_SECONDS:
+                    self._save(manifest)
+        os.replace(tmp_path, path)
+
+    def load(self, job_id):
+        try:
+            with open(self._manifest_path(job_id)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def status(self, job_id):
+        manifest = self.load(job_id)
+        if manifest is None:
+            return None
+        done = sum(os.path.exists(self.pdf_path(item['hash'])) for item in manifest['items'])
+        failed = [item['host_id'] for item in manifest['items']
+                  if os.path.exists(self.pdf_path(item['hash']) + '.error')]
+        error = manifest.get('error')
+        feeding = manifest.get('feeding', False)
+        if feeding and time.time() - manifest.get('updated_at', 0) > FEEDER_STALE_AFTER:
+            error, feeding = error or "Export worker stopped before the job finished", False
+        if failed or error:
+            state = 'failed'
+        elif feeding:
+            state = 'running'
+        elif done == len(manifest['items']) and os.path.exists(self._result(manifest)[0]):
+            state = 'done'
+        else:
+            # Fed and waited for, yet missing: removed since, e.g. by retention
+            state, error = 'failed', "Rendered reports are no longer available"
+        status = {'job_id': job_id, 'status': state, 'total': len(manifest['items']), 'completed': done,
+                  'failed': failed, 'created_at': manifest['created_at']}
+        if error:
+            status['error'] = error
+        return status
+
+    def _result(self, manifest):
+        items = manifest['items']
+        if len(items) == 1:
+            return self.pdf_path(items[0]['hash']), f"report-{items[0]['hostname'] or items[0]['host_id']}.pdf"
+        job_id = manifest['job_id']
+        return os.path.join(self.jobs_directory, f"{job_id}.zip"), f"reports-{job_id[:8]}.zip"
+
+    def result(self, job_id):
+        """(path, download name) of a finished job's file, the PDF itself or a zip
+        for bulk jobs; None until the job's feeder has written it"""
+        manifest = self.load(job_id)
+        if manifest is None or manifest.get('feeding') or manifest.get('error'):
+            return None
+        path, download_name = self._result(manifest)
+        return (path, download_name) if os.path.exists(path) else None
@@ -0,0 +1,49 @@
+_MISSING = object()
+
+
+def parse_fields(value):
+    """Turn 'hardware.cpu.usage,storage' into {'hardware': {'cpu': {'usage': None}}, 'storage': None}.
+
+    None marks a fully selected subtree; a shorter path wins over a longer one.
+    """
+    tree = {}
+    for path in value.split(','):
+        path = path.strip()
+        if not path:
+            continue
+        parts = path.split('.')
+        if not all(parts):
+            raise ValueError(f"Invalid field path '{path}'")
+        node = tree
+        for part in parts[:-1]:
+            child = node.setdefault(part, {})
+            if child is None:
+                break  # An ancestor is already selected in full
+            node = child
+        else:
+            node[parts[-1]] = None
+    if not tree:
+        raise ValueError("No fields requested")
+    return tree
+
+
+def _project(data, tree):
+    if tree is None:
+        return data
+    if isinstance(data, list):
+        return [item for item in (_project(item, tree) for item in data) if item is not _MISSING]
+    if not isinstance(data, dict):
+        return _MISSING  # Sub-fields asked of a scalar
+    projected = {}
+    for key, subtree in tree.items():
+        if key in data:
+            value = _project(data[key], subtree)
+            if value is not _MISSING:
+                projected[key] = value
+    return projected
+
+
+def project(data, tree):
+    """Keep only the fields selected by ``tree``; lists apply it to each item"""
+    projected = _project(data, tree)
+    return None if projected is _MISSING else projected
@@ -0,0 +1,118 @@
+import functools
+import hashlib
+import json
+import math
+import re
+
+from rating_engine import RATING_MODEL_VERSION, score_features
+
+SCAN_CACHE_SIZE = 4096
+
+# Browsers do not expose the clock speed; rate the CPU as a mid-range part would be
+ASSUMED_CLOCK_MHZ = 3000
+# navigator.deviceMemory is rounded to a power of two and capped at 8 GB
+DEVICE_MEMORY_BUCKETS = (0.25, 0.5, 1, 2, 4, 8)
+# Firefox and Safari do not report it at all; rate RAM as a typical machine would be
+ASSUMED_RAM_GB = 8
+
+# Rough dedicated VRAM by GPU family, matched against the WebGL renderer string in order
+GPU_VRAM_GB = [
+    (r'swiftshader|llvmpipe|software|microsoft basic render', 0),
+    (r'rtx\s*40[89]0|rx\s*7900', 16),
+    (r'rtx\s*[234]0\d0|rx\s*[67]\d00', 8),
+    (r'gtx\s*16\d0|gtx\s*10[78]0|rx\s*5\d00', 6),
+    (r'gtx|rx\s*[45]\d0|radeon\s*pro', 4),
+    (r'apple\s*m\d', 8),
+    (r'radeon|arc\s*a\d', 2),
+    (r'iris|uhd|hd graphics|mali|adreno|powervr|apple gpu', 0.5),
+]
+
+PLATFORMS = [
+    (r'android', 'Android'),
+    (r'iphone|ipad|ios', 'iOS'),
+    (r'windows', 'Windows'),
+    (r'mac os|macintosh', 'macOS'),
+    (r'cros', 'ChromeOS'),
+    (r'linux', 'Linux'),
+]
+
+
+def _number(value):
+    """``value`` as a finite float, or None; NaN and infinity are not hints"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def normalize_gpu(renderer):
+    """Strip ANGLE wrappers and driver details so one GPU model maps to one string"""
+    renderer = renderer.strip() if isinstance(renderer, str) else ''
+    match = re.match(r'ANGLE \((.*)\)$', renderer)
+    if match:
+        parts = [part.strip() for part in match.group(1).split(',')]
+        renderer = parts[1] if len(parts) > 1 else parts[0]
+    renderer = re.sub(r'\s+(Direct3D|vs_|ps_|OpenGL|Metal|\(0x).*$', '', renderer)
+    renderer = re.sub(r'/PCIe/SSE2|\s+\(TM\)|\(R\)|\(TM\)', '', renderer)
+    return re.sub(r'\s+', ' ', renderer).strip()[:80]
+
+
+def normalize_hints(raw):
+    """Canonical hints: only what affects the score, at the precision browsers report it"""
+    cores = _number(raw.get('hardwareConcurrency'))
+    memory = _number(raw.get('deviceMemory'))
+    user_agent = raw.get('userAgent')
+    user_agent = user_agent.lower() if isinstance(user_agent, str) else ''
+    return {
+        'cores': max(1, min(256, int(cores))) if cores else None,
+        'device_memory': min(DEVICE_MEMORY_BUCKETS, key=lambda bucket: abs(bucket - memory)) if memory else None,
+        'gpu': normalize_gpu(raw.get('webglRenderer')),
+        'platform': next((name for pattern, name in PLATFORMS if re.search(pattern, user_agent)), 'Unknown')
+    }
+
+
+def fingerprint(hints):
+    """Stable id of a result; changes with the hints or the rating model"""
+    encoded = json.dumps([hints, RATING_MODEL_VERSION], sort_keys=True).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:32]
+
+
+def estimate_vram(gpu):
+    lowered = gpu.lower()
+    for pattern, vram in GPU_VRAM_GB:
+        if re.search(pattern, lowered):
+            return vram
+    return 0
+
+
+# Keyed on the features alone, so e.g. every 8-thread/8 GB/RTX 3060 browser shares one entry.
+# Results are shared between callers and must not be modified.
+@functools.lru_cache(maxsize=SCAN_CACHE_SIZE)
+def _score(cores, device_memory, vram):
+    features = {
+        'cpu_cores': cores or 0,
+        'cpu_threads': cores or 0,
+        'cpu_clock_mhz': ASSUMED_CLOCK_MHZ if cores else 0,
+        'total_ram': device_memory or ASSUMED_RAM_GB,
+        'gpu_vram': vram,
+        # Storage is invisible to the browser; rate it neutrally
+        'has_ssd': False,
+        'has_disks': False,
+        'max_disk_usage': 0
+    }
+    return score_features(features)
+
+
+def quick_scan(raw):
+    """Rate a system from browser hints; identical hints are served from the LRU cache"""
+    hints = normalize_hints(raw)
+    return {
+        'fingerprint': fingerprint(hints),
+        'hints': hints,
+        'rating': _score(hints['cores'], hints['device_memory'], estimate_vram(hints['gpu'])),
+        # The clock speed and disks are not visible, and deviceMemory is missing or stops at 8 GB
+        'estimated': ['cpu_clock_mhz', 'gpu_vram', 'storage'] + (
+            ['total_ram'] if hints['device_memory'] in (None, DEVICE_MEMORY_BUCKETS[-1]) else [])
+    }
+
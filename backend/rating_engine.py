@@ -0,0 +1,201 @@
+import math
+
+# Bump whenever the scoring below changes so stored scores can be recomputed
+RATING_MODEL_VERSION = 2
+
+# Component weights, summing to 1
+WEIGHTS = {
+    'cpu': 0.35,
+    'memory': 0.25,
+    'graphics': 0.25,
+    'storage': 0.15
+}
+
+GRADES = [
+    (8.5, 'Excellent'),
+    (7.0, 'Good'),
+    (5.0, 'Average'),
+    (0.0, 'Poor')
+]
+
+# Same threshold the report colours red
+DISK_USAGE_CRITICAL = 85
+
+SSD_MARKERS = ('ssd', 'nvme', 'solid state')
+
+# Results of the agent's --benchmark mode that score 10/10
+BENCHMARK_REFERENCE = {
+    'bench_single_core': 1200,     # work units/s on one core
+    'bench_multi_core': 12000,     # work units/s across all cores
+    'bench_memory_gbps': 20,       # buffer copy bandwidth
+    'bench_seq_write_mbps': 2000,  # flushed sequential write
+    'bench_rand_write_iops': 5000  # flushed random 4 KiB writes
+}
+# Share of a component's score taken from measurements when they exist
+MEASURED_WEIGHT = 0.6
+# Measured CPU this far below its spec-sheet score points at throttling
+THROTTLE_GAP = 3
+
+
+def _as_list(value):
+    """PowerShell serialises single results as an object and several as an array"""
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _clamp(value, low=0.0, high=1.0):
+    return max(low, min(high, value))
+
+
+def _measurement(section, key):
+    value = section.get(key) if isinstance(section, dict) else None
+    return value if isinstance(value, (int, float)) and value > 0 else None
+
+
+def extract_features(full_data):
+    """Numeric features the rating is computed from, taken from SystemDataExtractor output"""
+    hardware = full_data.get('hardware', {})
+    cpu = hardware.get('cpu', {})
+    memory = hardware.get('memory', {})
+    storage = full_data.get('storage', {})
+    benchmark = full_data.get('benchmark', {})
+
+    vram = [gpu.get('AdapterRAMGB') or 0 for gpu in _as_list(hardware.get('graphics'))
+            if isinstance(gpu, dict)]
+    physical = [disk for disk in _as_list(storage.get('physical_disks')) if isinstance(disk, dict)]
+    has_ssd = any(
+        marker in ' '.join(str(disk.get(key, '')) for key in ('Model', 'InterfaceType', 'MediaType')).lower()
+        for disk in physical for marker in SSD_MARKERS
+    )
+    usages = [disk.get('usage_percent', 0) for disk in storage.get('logical_disks', [])]
+
+    return {
+        'cpu_cores': cpu.get('cores') or 0,
+        'cpu_threads': cpu.get('threads') or 0,
+        'cpu_clock_mhz': cpu.get('max_clock_speed') or 0,
+        'total_ram': memory.get('total_ram') or 0,
+        'gpu_vram': max(vram, default=0),
+        'has_ssd': has_ssd,
+        'has_disks': bool(physical),
+        'max_disk_usage': max(usages, default=0),
+        # None when the agent ran without --benchmark or a benchmark failed
+        'bench_single_core': _measurement(benchmark.get('cpu'), 'single_core_score'),
+        'bench_multi_core': _measurement(benchmark.get('cpu'), 'multi_core_score'),
+        'bench_memory_gbps': _measurement(benchmark.get('memory'), 'copy_gbps'),
+        'bench_seq_write_mbps': _measurement(benchmark.get('disk'), 'seq_write_mbps'),
+        'bench_rand_write_iops': _measurement(benchmark.get('disk'), 'rand_write_iops')
+    }
+
+
+def _ratio(features, key):
+    return _clamp(features[key] / BENCHMARK_REFERENCE[key])
+
+
+def measured_scores(features):
+    """0-10 score for each component the benchmark measured"""
+    def has(*keys):
+        return all(features.get(key) for key in keys)
+
+    scores = {}
+    if has('bench_single_core', 'bench_multi_core'):
+        scores['cpu'] = _ratio(features, 'bench_multi_core') * 6 + _ratio(features, 'bench_single_core') * 4
+    if has('bench_memory_gbps'):
+        scores['memory'] = _ratio(features, 'bench_memory_gbps') * 10
+    if has('bench_seq_write_mbps', 'bench_rand_write_iops'):
+        scores['storage'] = _ratio(features, 'bench_seq_write_mbps') * 5 + _ratio(features, 'bench_rand_write_iops') * 5
+    return scores
+
+
+def spec_scores(features):
+    """0-10 score for each component from the spec sheet alone"""
+    threads = features['cpu_threads'] or features['cpu_cores']
+    cpu = _clamp(threads / 16) * 6 + _clamp(features['cpu_clock_mhz'] / 4500) * 4
+
+    ram = features['total_ram']
+    memory = _clamp(math.log2(ram) / 5) * 10 if ram >= 1 else 0
+
+    graphics = _clamp(features['gpu_vram'] / 8) * 10
+
+    if features['has_ssd']:
+        storage = 10.0
+    elif features['has_disks']:
+        storage = 5.0
+    else:
+        # Disk type unknown (no PowerShell data); rate it neutrally
+        storage = 6.0
+
+    return {'cpu': cpu, 'memory': memory, 'graphics': graphics, 'storage': storage}
+
+
+def component_scores(features):
+    """0-10 score for each rated component, blending in benchmark results where measured"""
+    scores = spec_scores(features)
+    for name, measured in measured_scores(features).items():
+        scores[name] = (1 - MEASURED_WEIGHT) * scores[name] + MEASURED_WEIGHT * measured
+    if features['max_disk_usage'] > DISK_USAGE_CRITICAL:
+        scores['storage'] -= 2
+    return {name: round(max(score, 0), 1) for name, score in scores.items()}
+
+
+def grade_for(score):
+    for threshold, grade in GRADES:
+        if score >= threshold:
+            return grade
+    return GRADES[-1][1]
+
+
+def suggestions_for(features, components):
+    measured = measured_scores(features)
+    suggestions = []
+    if components['graphics'] < 5:
+        suggestions.append("Upgrade GPU for gaming")
+    if features['total_ram'] < 8:
+        suggestions.append("More RAM for heavy multitasking")
+    if components['cpu'] < 5:
+        suggestions.append("A CPU with more cores would speed up multi-threaded work")
+    # A drive that benchmarks fast is fine whatever its model string says
+    if features['has_disks'] and not features['has_ssd'] and measured.get('storage', 0) < 5:
+        suggestions.append("Switch the system drive to an SSD")
+    if features['max_disk_usage'] > DISK_USAGE_CRITICAL:
+        suggestions.append("Free up disk space; a drive is over 85% full")
+    if 'cpu' in measured and spec_scores(features)['cpu'] - measured['cpu'] > THROTTLE_GAP:
+        suggestions.append("The CPU benchmarks well below its specs; check cooling and power settings")
+    return suggestions
+
+
+def score_features(features):
+    components = component_scores(features)
+    score = round(sum(components[name] * weight for name, weight in WEIGHTS.items()), 1)
+    return {
+        'score': score,
+        'grade': grade_for(score),
+        'components': components,
+        'suggestions': suggestions_for(features, components),
+        'measured': sorted(measured_scores(features)),
+        'model_version': RATING_MODEL_VERSION
+    }
+
+
+def rate_system(full_data):
+    """Rate a system from SystemDataExtractor.get_full_data() output"""
+    return score_features(extract_features(full_data))
+
+
+def rate_many(views):
+    """Rate many SystemDataExtractor views, e.g. when rescoring the fleet.
+
+    Scoring is still per host, not column-wise: the backend has no numpy and
+    the rules above branch per feature. Hosts with identical features (the
+    same model of machine) are scored once and share the result, which must
+    therefore not be modified.
+    """
+    ratings = {}
+    results = []
+    for view in views:
+        features = extract_features(view)
+        key = tuple(sorted(features.items()))
+        if key not in ratings:
+            ratings[key] = score_features(features)
+        results.append(ratings[key])
+    return results
@@ -0,0 +1,43 @@
+import threading
+from collections import OrderedDict
+
+
+class RenderCache:
+    """Thread-safe LRU cache of rendered pages.
+
+    Keys are tuples of (template, host, snapshot version, template version), so
+    a new snapshot or an edited template simply misses and the stale entry ages
+    out of the LRU instead of needing explicit invalidation.
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+            return html
+
+    def put(self, key, html):
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stream(self, key, chunks):
+        """Yield rendered chunks as they arrive and cache the page once complete"""
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        # Only reached when the client consumed the whole page
+        self.put(key, ''.join(parts))
@@ -0,0 +1,68 @@
+import json
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from rating_engine import RATING_MODEL_VERSION, rate_many
+
+RESCORE_CHUNK_SIZE = 500
+# A running job that has not checkpointed for this long is presumed dead and may be taken over
+RESCORE_STALE_AFTER = 300
+
+
+def score_chunk(rows):
+    """Pool task: (host_id, version, view JSON) rows -> (host_id, version, score, grade, model_version)"""
+    ratings = rate_many([json.loads(view) for _, _, view in rows])
+    return [(host_id, version, rating['score'], rating['grade'], rating['model_version'])
+            for (host_id, version, _), rating in zip(rows, ratings)]
+
+
+class RescoreJob:
+    """Recompute every stored score made by an older RATING_MODEL_VERSION.
+
+    Hosts are read in host_id order one chunk at a time and scored by a
+    process pool, with a bounded number of chunks in flight. Chunks are
+    written back in order, each in one short transaction together with the
+    job's checkpoint, so a killed job resumes after its last written chunk.
+    """
+
+    def __init__(self, store, chunk_size=RESCORE_CHUNK_SIZE, workers=None):
+        self.store = store
+        self.chunk_size = chunk_size
+        self.workers = workers or max(1, (os.cpu_count() or 2) // 2)
+
+    def claim(self, restart=False):
+        """The job to run, or None while another one is in progress"""
+        return self.store.claim_rescore_job(RATING_MODEL_VERSION, RESCORE_STALE_AFTER, restart)
+
+    def run(self, job, progress=None):
+        """Run a claimed job to completion; ``progress`` is called with the job after each chunk"""
+        try:
+            # Spawned workers only import this module and the rating engine, never the Flask app
+            with ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                self._run(job, pool, progress)
+        except Exception as e:
+            self.store.finish_rescore_job(job['job_id'], 'failed', str(e))
+            raise
+        self.store.finish_rescore_job(job['job_id'], 'done')
+        return self.store.get_rescore_job(job['job_id'])
+
+    def _run(self, job, pool, progress):
+        after = job['last_host_id']
+        in_flight = deque()
+        while True:
+            # Keep every worker busy with one chunk queued behind it
+            while len(in_flight) < self.workers * 2:
+                rows = self.store.stale_score_chunk(job['model_version'], after, self.chunk_size)
+                if not rows:
+                    break
+                after = rows[-1][0]
+                in_flight.append((pool.submit(score_chunk, rows), after, len(rows)))
+            if not in_flight:
+                return
+
+            future, last_host_id, scanned = in_flight.popleft()
+            self.store.save_rescore_chunk(job['job_id'], future.result(), last_host_id, scanned)
+            if progress:
+                progress(self.store.get_rescore_job(job['job_id']))
@@ -0,0 +1,303 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # No flock/pwrite on Windows; the index is disabled there
+    fcntl = None
+
+SHARED_INDEX_AVAILABLE = fcntl is not None and hasattr(os, 'pwrite')
+
+# File layout:
+#   header  magic, generation, capacity, count, data_end, live_bytes, retired (padded to 64 bytes)
+#   slots   capacity x (key hash, record offset, record length, version), open addressing
+#   data    append-only records of (key length, key, section count, per-section
+#           (name length, JSON length, name), then the sections' JSON back to back)
+MAGIC = b'SSXIDX02'
+HEADER = struct.Struct('<8sQIIQQI')
+HEADER_SIZE = 64
+SLOT = struct.Struct('<QQI4xQ')
+KEY_LENGTH = struct.Struct('<H')
+SECTION_COUNT = struct.Struct('<H')
+SECTION_ENTRY = struct.Struct('<HI')
+GENERATION_OFFSET = 8
+RETIRED_OFFSET = HEADER.size - 4
+
+INITIAL_CAPACITY = 1024
+MAX_LOAD_FACTOR = 0.7
+# Rewrite the file once superseded records outweigh live ones by this much
+COMPACT_MIN_GARBAGE = 4 * 1024 * 1024
+READ_RETRIES = 100
+
+
+def _key_hash(key):
+    digest = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+    return digest or 1  # 0 marks an empty slot
+
+
+def _encode_view(view):
+    """Record body of ``view``: each section is serialised on its own so reads can skip the rest"""
+    names = [str(name).encode('utf-8') for name in view]
+    bodies = [json.dumps(value, separators=(',', ':'), default=str).encode('utf-8') for value in view.values()]
+    directory = b''.join(SECTION_ENTRY.pack(len(name), len(body)) + name for name, body in zip(names, bodies))
+    return SECTION_COUNT.pack(len(names)) + directory + b''.join(bodies)
+
+
+class SnapshotIndex:
+    """Latest extracted view per host in one memory-mapped file shared by all workers.
+
+    Readers map the file read-only, so every gunicorn worker shares the same
+    page-cache pages instead of holding its own copy. Writers serialise on an
+    flock, append the record, then update the slot between two increments of
+    the generation counter; readers retry while the counter is odd or moved.
+    Growing or compacting writes a new file, swaps it in with os.replace and
+    marks the old one retired so readers reopen it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.enabled = SHARED_INDEX_AVAILABLE
+        self._lock = threading.Lock()
+        self._fd = None
+        self._map = None
+        self._pid = None
+        if self.enabled:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._lock_fd = os.open(path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+            with self._exclusive():
+                if not os.path.exists(path):
+                    self._write_file(INITIAL_CAPACITY, [], 0)
+                else:
+                    with open(path, 'rb') as f:
+                        magic = f.read(len(MAGIC))
+                    if magic != MAGIC:  # Left by an older release; its views are re-read from the store
+                        self._write_file(INITIAL_CAPACITY, [], 0)
+
+    # ── Mapping ──────────────────────────────────────────────────────
+
+    def _open(self):
+        if self._map is not None:
+            self._map.close()
+            os.close(self._fd)
+        self._fd = os.open(self.path, os.O_RDWR)
+        self._map = mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ)
+        self._pid = os.getpid()
+
+    def _mapping(self):
+        """Map the current file, reopening it if a writer retired the one we hold"""
+        if self._map is None or self._pid != os.getpid() or self._retired():
+            self._open()
+
+    def _extend(self, needed):
+        """Remap the same file if it has grown past our mapping"""
+        if needed > len(self._map):
+            self._map.close()
+            self._map = mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ)
+
+    def _retired(self):
+        return struct.unpack_from('<I', self._map, RETIRED_OFFSET)[0] != 0
+
+    def _header(self):
+        _, generation, capacity, count, data_end, live_bytes, _ = HEADER.unpack_from(self._map, 0)
+        return generation, capacity, count, data_end, live_bytes
+
+    @contextmanager
+    def _exclusive(self):
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    # ── Slot table ───────────────────────────────────────────────────
+
+    def _probe(self, key, capacity):
+        """(slot number, slot fields) of ``key``, or of the empty slot where it would go"""
+        wanted = _key_hash(key)
+        number = wanted % capacity
+        for _ in range(capacity):
+            fields = SLOT.unpack_from(self._map, HEADER_SIZE + number * SLOT.size)
+            if fields[0] == 0:
+                return number, None
+            if fields[0] == wanted and self._record_key(fields[1]) == key:
+                return number, fields
+            number = (number + 1) % capacity
+        return None, None
+
+    def _record_key(self, offset):
+        self._extend(offset + KEY_LENGTH.size)
+        (length,) = KEY_LENGTH.unpack_from(self._map, offset)
+        start = offset + KEY_LENGTH.size
+        self._extend(start + length)
+        return self._map[start:start + length]
+
+    def _lookup(self, key):
+        """Consistent (offset, length, version) of ``key`` under the generation seqlock"""
+        for _ in range(READ_RETRIES):
+            self._mapping()
+            before = struct.unpack_from('<Q', self._map, GENERATION_OFFSET)[0]
+            if before & 1:
+                continue
+            _, capacity, _, _, _ = self._header()
+            try:
+                _, fields = self._probe(key, capacity)
+            except (struct.error, ValueError):
+                continue  # Torn read of a record being written
+            after = struct.unpack_from('<Q', self._map, GENERATION_OFFSET)[0]
+            if before == after and not self._retired():
+                return fields[1:] if fields else None
+        # Writers are hogging the counter; read under their lock instead
+        with self._exclusive():
+            self._mapping()
+            _, fields = self._probe(key, self._header()[1])
+            return fields[1:] if fields else None
+
+    # ── Public API ───────────────────────────────────────────────────
+
+    @property
+    def generation(self):
+        """Counter bumped twice by every publish; lets callers detect any change cheaply"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._mapping()
+            return struct.unpack_from('<Q', self._map, GENERATION_OFFSET)[0]
+
+    def version(self, host):
+        """Version of the view stored for ``host``, or None, without touching the record"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._lookup(host.encode('utf-8'))
+            return entry[2] if entry else None
+
+    def get(self, host, sections=None):
+        """(version, view) for ``host``, or None if it has not been published.
+
+        With ``sections``, only those sections of the view are decoded and returned.
+        """
+        if not self.enabled:
+            return None
+        key = host.encode('utf-8')
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                return None
+            offset, length, version = entry
+            self._extend(offset + length)
+            # Records are never rewritten in place, so the bytes stay valid after the lookup
+            position = offset + KEY_LENGTH.size + len(key)
+            (count,) = SECTION_COUNT.unpack_from(self._map, position)
+            position += SECTION_COUNT.size
+            directory = []
+            for _ in range(count):
+                name_length, body_length = SECTION_ENTRY.unpack_from(self._map, position)
+                position += SECTION_ENTRY.size
+                directory.append((self._map[position:position + name_length].decode('utf-8'), body_length))
+                position += name_length
+            raw = {}
+            for name, body_length in directory:
+                if sections is None or name in sections:
+                    raw[name] = self._map[position:position + body_length]
+                position += body_length
+        return version, {name: json.loads(body) for name, body in raw.items()}
+
+    def publish(self, host, version, view, if_newer=False):
+        """Make ``view`` the current entry of ``host`` for every worker.
+
+        With ``if_newer``, an entry already at ``version`` or later is kept; used
+        when back-filling from the store so a racing ingest is not overwritten.
+        """
+        if not self.enabled:
+            return
+        key = host.encode('utf-8')
+        record = KEY_LENGTH.pack(len(key)) + key + _encode_view(view)
+
+        with self._lock, self._exclusive():
+            self._mapping()
+            generation, capacity, count, data_end, live_bytes = self._header()
+            number, fields = self._probe(key, capacity)
+            if if_newer and fields is not None and fields[3] >= version:
+                return
+            garbage = data_end - self._data_start(capacity) - live_bytes
+            if number is None or (fields is None and count + 1 > capacity * MAX_LOAD_FACTOR) \
+                    or garbage > max(COMPACT_MIN_GARBAGE, live_bytes):
+                self._rebuild(capacity * 2 if count + 1 > capacity * MAX_LOAD_FACTOR else capacity)
+                generation, capacity, count, data_end, live_bytes = self._header()
+                number, fields = self._probe(key, capacity)
+
+            # Append first; the record is unreachable until the slot points at it
+            size = os.fstat(self._fd).st_size
+            if data_end + len(record) > size:
+                os.ftruncate(self._fd, max(size * 2, data_end + len(record)))
+            os.pwrite(self._fd, record, data_end)
+
+            if fields is None:
+                count += 1
+            else:
+                live_bytes -= fields[2]
+            live_bytes += len(record)
+
+            os.pwrite(self._fd, struct.pack('<Q', generation + 1), GENERATION_OFFSET)
+            os.pwrite(self._fd, SLOT.pack(_key_hash(key), data_end, len(record), version),
+                      HEADER_SIZE + number * SLOT.size)
+            os.pwrite(self._fd, HEADER.pack(MAGIC, generation + 2, capacity, count,
+                                            data_end + len(record), live_bytes, 0), 0)
+
+    def remove(self, hosts):
+        """Drop the entries of ``hosts``, e.g. hosts expired from the store; rewrites the whole index"""
+        if not self.enabled or not hosts:
+            return
+        with self._lock, self._exclusive():
+            self._mapping()
+            _, capacity, _, _, _ = self._header()
+            self._rebuild(capacity, {host.encode('utf-8') for host in hosts})
+
+    # ── Rebuild ──────────────────────────────────────────────────────
+
+    @staticmethod
+    def _data_start(capacity):
+        return HEADER_SIZE + capacity * SLOT.size
+
+    def _live_records(self, capacity):
+        for number in range(capacity):
+            key_hash, offset, length, version = SLOT.unpack_from(self._map, HEADER_SIZE + number * SLOT.size)
+            if key_hash:
+                self._extend(offset + length)
+                yield key_hash, self._map[offset:offset + length], version
+
+    def _write_file(self, capacity, records, generation):
+        """Write a fresh index holding ``records`` and swap it in atomically"""
+        table = bytearray(capacity * SLOT.size)
+        data = bytearray()
+        start = self._data_start(capacity)
+        for key_hash, record, version in records:
+            number = key_hash % capacity
+            while SLOT.unpack_from(table, number * SLOT.size)[0]:
+                number = (number + 1) % capacity
+            SLOT.pack_into(table, number * SLOT.size, key_hash, start + len(data), len(record), version)
+            data += record
+
+        header = HEADER.pack(MAGIC, generation, capacity, len(records), start + len(data), len(data), 0)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(header.ljust(HEADER_SIZE, b'\0'))
+            f.write(table)
+            f.write(data)
+        os.replace(temp_path, self.path)
+
+    def _rebuild(self, capacity, drop=()):
+        """Copy live records into a new file, dropping superseded ones and the keys in ``drop``;
+        caller holds the lock"""
+        generation, old_capacity, _, _, _ = self._header()
+        records = [(key_hash, record, version) for key_hash, record, version in self._live_records(old_capacity)
+                   if not drop or record[KEY_LENGTH.size:KEY_LENGTH.size + KEY_LENGTH.unpack_from(record)[0]] not in drop]
+        # Keep the counter moving forward so callers comparing generations see the change
+        self._write_file(capacity, records, generation + 2)
+        os.pwrite(self._fd, struct.pack('<I', 1), RETIRED_OFFSET)
+        self._open()
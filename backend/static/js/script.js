@@ -184,6 +184,74 @@
             document.body.classList.add('loaded');
         });
 
+        // Quick Scan: send what the browser can see to /api/scan and show the rating in place
+        function collectScanHints() {
+            const hints = {
+                hardwareConcurrency: navigator.hardwareConcurrency || '',
+                deviceMemory: navigator.deviceMemory || '',
+                userAgent: navigator.userAgent
+            };
+            try {
+                const gl = document.createElement('canvas').getContext('webgl');
+                const debugInfo = gl && gl.getExtension('WEBGL_debug_renderer_info');
+                if (debugInfo) {
+                    hints.webglRenderer = gl.getParameter(debugInfo.UNMASKED_RENDERER_WEBGL);
+                }
+            } catch (e) {
+                // WebGL unavailable; the GPU is rated as unknown
+            }
+            return hints;
+        }
+
+        function showScanResult(card, result) {
+            let box = card.querySelector('.scan-result');
+            if (!box) {
+                box = document.createElement('div');
+                box.className = 'scan-result';
+                card.appendChild(box);
+            }
+            const rating = result.rating;
+            const hints = result.hints;
+            // Hints echo what the browser reported (e.g. the GPU string), so they are set as text
+            const element = (tag, text, className) => {
+                const node = document.createElement(tag);
+                node.textContent = text;
+                if (className) {
+                    node.className = className;
+                }
+                return node;
+            };
+
+            const score = element('div', `${rating.score.toFixed(1)}/10 `, 'scan-score');
+            score.appendChild(element('span', rating.grade));
+            const memory = hints.device_memory ? `${hints.device_memory} GB+` : '? GB';
+            const summary = element('p', `${hints.cores || '?'} threads · ${memory} RAM · ${hints.gpu || 'Unknown GPU'}`);
+            const suggestions = document.createElement('ul');
+            rating.suggestions.forEach(suggestion => suggestions.appendChild(element('li', suggestion)));
+
+            box.replaceChildren(score, summary, suggestions,
+                element('p', 'Browser estimate. Run the Full Scan for exact results.', 'scan-note'));
+        }
+
+        document.querySelectorAll('a[href="/api/scan"]').forEach(link => {
+            link.addEventListener('click', function (e) {
+                e.preventDefault();
+                const card = this.closest('.scan-card');
+                const query = new URLSearchParams(collectScanHints());
+                this.textContent = 'Scanning...';
+                fetch(`/api/scan?${query}`)
+                    .then(response => {
+                        if (!response.ok) {
+                            throw new Error(`Scan failed (${response.status})`);
+                        }
+                        return response.json();
+                    })
+                    .then(result => showScanResult(card, result))
+                    .catch(error => console.error(error))
+                    .finally(() => { this.textContent = 'Scan Again'; });
+            });
+        });
+
         // Performance optimization: Lazy load images
         if ('IntersectionObserver' in window) {
             const imageObserver = new IntersectionObserver((entries, observer) => {
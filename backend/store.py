@@ -0,0 +1,672 @@
+import base64
+import heapq
+import itertools
+import json
+import os
+import re
+import sqlite3
+import threading
+import uuid
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hosts (
+    host_id TEXT PRIMARY KEY,
+    hostname TEXT NOT NULL DEFAULT '',
+    version INTEGER NOT NULL,
+    received_at TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    total_ram REAL NOT NULL DEFAULT 0,
+    cpu_cores INTEGER NOT NULL DEFAULT 0,
+    cpu_threads INTEGER NOT NULL DEFAULT 0,
+    cpu_model TEXT NOT NULL DEFAULT '',
+    gpu_model TEXT NOT NULL DEFAULT '',
+    os TEXT NOT NULL DEFAULT '',
+    max_disk_usage REAL NOT NULL DEFAULT 0,
+    score REAL NOT NULL DEFAULT 0,
+    grade TEXT NOT NULL DEFAULT '',
+    content_hash TEXT NOT NULL DEFAULT ''
+);
+
+CREATE TABLE IF NOT EXISTS host_snapshots (
+    host_id TEXT PRIMARY KEY REFERENCES hosts(host_id) ON DELETE CASCADE,
+    payload TEXT NOT NULL,
+    view TEXT NOT NULL
+);
+
+-- Idempotency keys sent by agents, so retried uploads are recognised
+CREATE TABLE IF NOT EXISTS ingest_keys (
+    idempotency_key TEXT PRIMARY KEY,
+    host_id TEXT NOT NULL,
+    received_at TEXT NOT NULL
+);
+
+-- Progress of bulk rescoring jobs, committed with each chunk of scores so a job can resume
+CREATE TABLE IF NOT EXISTS rescore_jobs (
+    job_id TEXT PRIMARY KEY,
+    model_version INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    last_host_id TEXT NOT NULL DEFAULT '',
+    total INTEGER NOT NULL DEFAULT 0,
+    scanned INTEGER NOT NULL DEFAULT 0,
+    rescored INTEGER NOT NULL DEFAULT 0,
+    started_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    finished_at TEXT,
+    error TEXT
+);
+
+-- Words of each host's CPU and GPU model, so model filters are index range scans
+CREATE TABLE IF NOT EXISTS host_model_terms (
+    field TEXT NOT NULL,
+    term TEXT NOT NULL,
+    host_id TEXT NOT NULL REFERENCES hosts(host_id) ON DELETE CASCADE,
+    PRIMARY KEY (field, term, host_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_host_model_terms_host ON host_model_terms (host_id);
+CREATE INDEX IF NOT EXISTS idx_hosts_total_ram ON hosts (total_ram, host_id);
+CREATE INDEX IF NOT EXISTS idx_hosts_cpu_cores ON hosts (cpu_cores, host_id);
+CREATE INDEX IF NOT EXISTS idx_hosts_cpu_threads ON hosts (cpu_threads, host_id);
+CREATE INDEX IF NOT EXISTS idx_hosts_max_disk_usage ON hosts (max_disk_usage, host_id);
+CREATE INDEX IF NOT EXISTS idx_hosts_score ON hosts (score, host_id);
+CREATE INDEX IF NOT EXISTS idx_hosts_os ON hosts (os, host_id);
+CREATE INDEX IF NOT EXISTS idx_hosts_hostname ON hosts (hostname, host_id);
+CREATE INDEX IF NOT EXISTS idx_hosts_last_seen ON hosts (last_seen, host_id);
+CREATE INDEX IF NOT EXISTS idx_ingest_keys_received_at ON ingest_keys (received_at);
+"""
+
+# Columns added after the first release: (table, column, definition)
+MIGRATIONS = [
+    ('hosts', 'content_hash', "TEXT NOT NULL DEFAULT ''"),
+    # RATING_MODEL_VERSION the stored score was computed with; 0 is unknown
+    ('hosts', 'score_version', "INTEGER NOT NULL DEFAULT 0"),
+]
+
+# Columns returned by searches, i.e. everything except the snapshot blobs
+SUMMARY_COLUMNS = [
+    'host_id', 'hostname', 'version', 'received_at', 'last_seen', 'total_ram', 'cpu_cores',
+    'cpu_threads', 'cpu_model', 'gpu_model', 'os', 'max_disk_usage', 'score', 'grade'
+]
+
+NUMERIC_FILTERS = {'total_ram', 'cpu_cores', 'cpu_threads', 'max_disk_usage', 'score', 'version'}
+# Case-insensitive substring matches; short aliases are accepted for the model columns
+TEXT_FILTERS = {'cpu_model': 'cpu_model', 'cpu': 'cpu_model', 'gpu_model': 'gpu_model',
+                'gpu': 'gpu_model', 'os': 'os', 'hostname': 'hostname'}
+# Matched word by word against host_model_terms instead: every word of the filter
+# must start a word of the model, e.g. ``cpu=i7`` or ``gpu=rtx 40``
+MODEL_FILTERS = {'cpu_model', 'gpu_model'}
+# Query arguments that are not filters
+PAGING_ARGS = {'sort', 'limit', 'cursor'}
+SORT_COLUMNS = {'host_id', 'hostname', 'last_seen', 'os', 'total_ram', 'cpu_cores', 'cpu_threads',
+                'max_disk_usage', 'score'}
+OPERATORS = {'lt': '<', 'lte': '<=', 'gt': '>', 'gte': '>=', 'eq': '='}
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+# Operating systems listed in fleet stats, most common first
+STATS_TOP_OS = 10
+
+
+def derive_index(view, rating):
+    """Indexed search columns for a host, taken from SystemDataExtractor output"""
+    system = view.get('system', {})
+    hardware = view.get('hardware', {})
+    cpu = hardware.get('cpu', {})
+    graphics = hardware.get('graphics') or []
+    if isinstance(graphics, dict):
+        graphics = [graphics]
+    usages = [disk.get('usage_percent', 0) for disk in view.get('storage', {}).get('logical_disks', [])]
+
+    return {
+        'hostname': system.get('hostname') or '',
+        'total_ram': hardware.get('memory', {}).get('total_ram') or 0,
+        'cpu_cores': cpu.get('cores') or 0,
+        'cpu_threads': cpu.get('threads') or 0,
+        'cpu_model': cpu.get('name') or '',
+        'gpu_model': '; '.join(str(gpu.get('Name', '')) for gpu in graphics if isinstance(gpu, dict)),
+        'os': (system.get('os') or '').strip(),
+        'max_disk_usage': max(usages, default=0),
+        'score': rating.get('score', 0),
+        'grade': rating.get('grade', ''),
+        'score_version': rating.get('model_version', 0)
+    }
+
+
+def model_terms(text):
+    """Lower-cased words of a model name, e.g. 'Core(TM) i7-12700' gives core, tm, i7 and 12700"""
+    return sorted(set(re.findall(r'[^\W_]+', text.lower())))
+
+
+def _prefix_end(term):
+    """Smallest string after every string starting with ``term``"""
+    return term[:-1] + chr(ord(term[-1]) + 1)
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != 2 or not all(map(_cursor_value, values)):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _cursor_value(value):
+    """True for what an encoded sort key can hold and SQLite can bind"""
+    if isinstance(value, int):
+        return -2 ** 63 <= value < 2 ** 63
+    return value is None or isinstance(value, (str, float))
+
+
+def parse_search_args(args, extra=()):
+    """Turn query arguments into (filters, sort, limit, cursor).
+
+    Numeric filters take an optional operator prefix, e.g. ``total_ram=lt:8`` or
+    ``max_disk_usage=gt:85``; text filters match case-insensitive substrings.
+    Arguments named in ``extra`` are left to the caller. Raises ValueError on
+    anything malformed, including unknown arguments.
+    """
+    filters = []
+    for name, value in args.items():
+        if name in PAGING_ARGS or name in extra:
+            continue
+        if name in NUMERIC_FILTERS:
+            operator, _, number = value.rpartition(':')
+            operator = operator or 'eq'
+            if operator not in OPERATORS:
+                raise ValueError(f"Unknown operator '{operator}' for {name}")
+            try:
+                filters.append((name, OPERATORS[operator], float(number)))
+            except ValueError:
+                raise ValueError(f"{name} must be numeric")
+        elif TEXT_FILTERS.get(name) in MODEL_FILTERS:
+            if not model_terms(value):
+                raise ValueError(f"{name} must contain a letter or digit")
+            filters.append((TEXT_FILTERS[name], 'TERMS', value))
+        elif name in TEXT_FILTERS:
+            filters.append((TEXT_FILTERS[name], 'LIKE', value))
+        else:
+            valid = ', '.join(sorted(NUMERIC_FILTERS | set(TEXT_FILTERS) | PAGING_ARGS | set(extra)))
+            raise ValueError(f"Unknown filter '{name}'; valid filters are {valid}")
+
+    sort = args.get('sort', 'host_id')
+    if sort.lstrip('-') not in SORT_COLUMNS:
+        raise ValueError(f"Cannot sort by '{sort.lstrip('-')}'")
+
+    try:
+        limit = int(args.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    cursor = args.get('cursor')
+    return filters, sort, limit, decode_cursor(cursor) if cursor else None
+
+
+def sort_key(sort):
+    """Python key matching the store's ORDER BY for ``sort``, for merging sorted rows"""
+    column = sort.lstrip('-')
+    return lambda row: (row[column], row['host_id'])
+
+
+def paginate(rows, sort, limit):
+    """(first ``limit`` rows, cursor of the next page) from up to ``limit + 1`` sorted rows"""
+    results = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(list(sort_key(sort)(results[-1])))
+    return results, next_cursor
+
+
+def merge_stats(partials):
+    """Fleet stats from per-database partials, e.g. one per shard"""
+    hosts = sum(partial['hosts'] for partial in partials)
+    grades, systems = Counter(), Counter()
+    for partial in partials:
+        grades.update(partial['grades'])
+        systems.update(partial['os'])
+    scores = [partial for partial in partials if partial['hosts']]
+    return {
+        'hosts': hosts,
+        'average_score': round(sum(partial['score_sum'] for partial in partials) / hosts, 2) if hosts else None,
+        'min_score': min((partial['min_score'] for partial in scores), default=None),
+        'max_score': max((partial['max_score'] for partial in scores), default=None),
+        'total_ram': sum(partial['total_ram'] for partial in partials),
+        'grades': dict(grades),
+        'os': dict(systems.most_common(STATS_TOP_OS))
+    }
+
+
+def build_where(filters):
+    clauses, params = [], []
+    for column, operator, value in filters:
+        if operator == 'TERMS':
+            for term in model_terms(value):
+                clauses.append("hosts.host_id IN (SELECT host_id FROM host_model_terms "
+                               "WHERE field = ? AND term >= ? AND term < ?)")
+                params.extend([column, term, _prefix_end(term)])
+        elif operator == 'LIKE':
+            escaped = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            clauses.append(f"{column} LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+        else:
+            clauses.append(f"{column} {operator} ?")
+            params.append(value)
+    return clauses, params
+
+
+class SnapshotStore:
+    """SQLite store of the latest snapshot per host plus indexed search columns"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+            for table, column, definition in MIGRATIONS:
+                existing = {row['name'] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            if conn.execute("SELECT 1 FROM host_model_terms LIMIT 1").fetchone() is None:
+                # Stores created before model terms were indexed
+                for row in conn.execute("SELECT host_id, cpu_model, gpu_model FROM hosts").fetchall():
+                    self._index_terms(conn, row['host_id'], row)
+
+    def connection(self):
+        # sqlite3 connections must stay on the thread that opened them
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            # Only takes effect on a new file; lets maintenance return free pages a batch at a time
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def save_snapshot(self, host_id, payload, view, rating, received_at=None, content_hash='',
+                      idempotency_key=None):
+        """Upsert the latest snapshot of a host and return its new version"""
+        received_at = received_at or datetime.now().isoformat()
+        columns = derive_index(view, rating)
+        columns['content_hash'] = content_hash
+        names = list(columns)
+        with self.connection() as conn:
+            conn.execute(
+                f"""INSERT INTO hosts (host_id, version, received_at, last_seen, {', '.join(names)})
+                    VALUES (?, 1, ?, ?, {', '.join('?' for _ in names)})
+                    ON CONFLICT(host_id) DO UPDATE SET
+                        version = hosts.version + 1,
+                        received_at = excluded.received_at,
+                        last_seen = excluded.last_seen,
+                        {', '.join(f'{name} = excluded.{name}' for name in names)}""",
+                [host_id, received_at, received_at, *columns.values()]
+            )
+            row = conn.execute("SELECT version FROM hosts WHERE host_id = ?", (host_id,)).fetchone()
+            self._index_terms(conn, host_id, columns)
+            conn.execute(
+                """INSERT INTO host_snapshots (host_id, payload, view) VALUES (?, ?, ?)
+                   ON CONFLICT(host_id) DO UPDATE SET payload = excluded.payload, view = excluded.view""",
+                (host_id, json.dumps(payload), json.dumps(view))
+            )
+            if idempotency_key:
+                self._record_key(conn, idempotency_key, host_id, received_at)
+        return row['version']
+
+    def _index_terms(self, conn, host_id, columns):
+        conn.execute("DELETE FROM host_model_terms WHERE host_id = ?", (host_id,))
+        conn.executemany(
+            "INSERT INTO host_model_terms (field, term, host_id) VALUES (?, ?, ?)",
+            [(field, term, host_id) for field in sorted(MODEL_FILTERS) for term in model_terms(columns[field])]
+        )
+
+    def _record_key(self, conn, idempotency_key, host_id, received_at):
+        conn.execute(
+            "INSERT OR IGNORE INTO ingest_keys (idempotency_key, host_id, received_at) VALUES (?, ?, ?)",
+            (idempotency_key, host_id, received_at)
+        )
+
+    def touch(self, host_id, seen_at=None, idempotency_key=None):
+        """Mark a host as seen without rewriting its snapshot; returns its current version"""
+        seen_at = seen_at or datetime.now().isoformat()
+        with self.connection() as conn:
+            conn.execute("UPDATE hosts SET last_seen = ? WHERE host_id = ?", (seen_at, host_id))
+            if idempotency_key:
+                self._record_key(conn, idempotency_key, host_id, seen_at)
+        return self.get_version(host_id)
+
+    def has_ingest_key(self, host_id, idempotency_key):
+        """Whether ``host_id`` already had an upload ingested under this idempotency key"""
+        return self.connection().execute(
+            "SELECT 1 FROM ingest_keys WHERE idempotency_key = ? AND host_id = ?", (idempotency_key, host_id)
+        ).fetchone() is not None
+
+    def get_content_hash(self, host_id):
+        row = self.connection().execute(
+            "SELECT content_hash FROM hosts WHERE host_id = ?", (host_id,)
+        ).fetchone()
+        return row['content_hash'] if row else None
+
+    def get_version(self, host_id):
+        row = self.connection().execute(
+            "SELECT version FROM hosts WHERE host_id = ?", (host_id,)
+        ).fetchone()
+        return row['version'] if row else None
+
+    def get_payload(self, host_id):
+        row = self.connection().execute(
+            "SELECT payload FROM host_snapshots WHERE host_id = ?", (host_id,)
+        ).fetchone()
+        return json.loads(row['payload']) if row else None
+
+    def get_view(self, host_id):
+        row = self.connection().execute(
+            "SELECT view FROM host_snapshots WHERE host_id = ?", (host_id,)
+        ).fetchone()
+        return json.loads(row['view']) if row else None
+
+    def get_versioned_view(self, host_id):
+        """(version, view) read in one statement, so the two always match"""
+        row = self.connection().execute(
+            "SELECT hosts.version, host_snapshots.view FROM hosts "
+            "JOIN host_snapshots ON host_snapshots.host_id = hosts.host_id WHERE hosts.host_id = ?",
+            (host_id,)
+        ).fetchone()
+        return (row['version'], json.loads(row['view'])) if row else None
+
+    def _page(self, columns, filters, sort, limit, cursor, join=''):
+        descending = sort.startswith('-')
+        column = sort.lstrip('-')
+        clauses, params = build_where(filters)
+
+        if cursor is not None:
+            # Row-value comparison walks the (column, host_id) index from the cursor
+            clauses.append(f"(hosts.{column}, hosts.host_id) {'<' if descending else '>'} (?, ?)")
+            params.extend(cursor)
+
+        direction = 'DESC' if descending else 'ASC'
+        order = f"hosts.host_id {direction}"
+        if column != 'host_id':
+            order = f"hosts.{column} {direction}, {order}"
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        return self.connection().execute(
+            f"SELECT {', '.join(columns)} FROM hosts {join} {where} ORDER BY {order} LIMIT ?",
+            [*params, limit]
+        ).fetchall()
+
+    def search(self, filters, sort='host_id', limit=DEFAULT_LIMIT, cursor=None):
+        """Keyset-paginated host search; returns (rows, next_cursor)"""
+        columns = [f"hosts.{name}" for name in SUMMARY_COLUMNS]
+        rows = self._page(columns, filters, sort, limit + 1, cursor)
+        return paginate([dict(row) for row in rows], sort, limit)
+
+    def fleet_stats(self, filters):
+        """Aggregates over every host matching ``filters``"""
+        return merge_stats([self._stats_partial(filters)])
+
+    def _stats_partial(self, filters):
+        clauses, params = build_where(filters)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        conn = self.connection()
+        row = conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(score), 0), MIN(score), MAX(score), COALESCE(SUM(total_ram), 0) "
+            f"FROM hosts {where}", params
+        ).fetchone()
+        grades = conn.execute(f"SELECT grade, COUNT(*) FROM hosts {where} GROUP BY grade", params).fetchall()
+        systems = conn.execute(f"SELECT os, COUNT(*) FROM hosts {where} GROUP BY os", params).fetchall()
+        return {'hosts': row[0], 'score_sum': row[1], 'min_score': row[2], 'max_score': row[3],
+                'total_ram': row[4], 'grades': dict(grades), 'os': dict(systems)}
+
+    def iter_views(self, filters, sort='host_id', chunk_size=1000):
+        """Yield (summary, view) for every matching host, one keyset page at a time.
+
+        Each page is a short read, so a long export never pins a WAL snapshot
+        and never holds more than ``chunk_size`` rows in memory.
+        """
+        columns = [f"hosts.{name}" for name in SUMMARY_COLUMNS] + ['host_snapshots.view']
+        join = "JOIN host_snapshots ON host_snapshots.host_id = hosts.host_id"
+        cursor = None
+        while True:
+            rows = self._page(columns, filters, sort, chunk_size, cursor, join)
+            for row in rows:
+                summary = dict(row)
+                view = json.loads(summary.pop('view'))
+                yield summary, view
+            if len(rows) < chunk_size:
+                return
+            cursor = [rows[-1][sort.lstrip('-')], rows[-1]['host_id']]
+
+    def connections(self):
+        return [self.connection()]
+
+    def delete_stale_hosts(self, before, limit):
+        """Delete up to ``limit`` hosts not seen since ``before``; returns their ids"""
+        conn = self.connection()
+        with conn:
+            host_ids = [row['host_id'] for row in conn.execute(
+                "SELECT host_id FROM hosts WHERE last_seen < ? ORDER BY last_seen LIMIT ?", (before, limit))]
+            # Snapshots go with their host through ON DELETE CASCADE
+            conn.executemany("DELETE FROM hosts WHERE host_id = ?", [(host_id,) for host_id in host_ids])
+        return host_ids
+
+    def prune_ingest_keys(self, before, limit):
+        """Forget up to ``limit`` idempotency keys received before ``before``; returns how many"""
+        with self.connection() as conn:
+            return conn.execute(
+                "DELETE FROM ingest_keys WHERE rowid IN "
+                "(SELECT rowid FROM ingest_keys WHERE received_at < ? LIMIT ?)", (before, limit)
+            ).rowcount
+
+    def stale_score_chunk(self, model_version, after_host_id, limit):
+        """Next ``limit`` hosts after ``after_host_id`` scored by an older model.
+
+        Rows are (host_id, version, view JSON); the view is left encoded for the scoring workers.
+        """
+        return [tuple(row) for row in self.connection().execute(
+            "SELECT hosts.host_id, hosts.version, host_snapshots.view FROM hosts "
+            "JOIN host_snapshots ON host_snapshots.host_id = hosts.host_id "
+            "WHERE hosts.host_id > ? AND hosts.score_version < ? ORDER BY hosts.host_id LIMIT ?",
+            (after_host_id, model_version, limit)
+        )]
+
+    def get_rescore_job(self, job_id=None):
+        """A rescoring job by id, or the most recently started one"""
+        if job_id:
+            row = self.connection().execute("SELECT * FROM rescore_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        else:
+            row = self.connection().execute(
+                "SELECT * FROM rescore_jobs ORDER BY started_at DESC LIMIT 1").fetchone()
+        return dict(row) if row else None
+
+    def claim_rescore_job(self, model_version, stale_after, restart=False):
+        """Start or resume the rescoring job for ``model_version``.
+
+        Returns None while another job is running and has reported progress
+        within ``stale_after`` seconds. An unfinished job for the same model is
+        resumed from its checkpoint unless ``restart`` is set.
+        """
+        now = datetime.now()
+        conn = self.connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            latest = conn.execute("SELECT * FROM rescore_jobs ORDER BY started_at DESC LIMIT 1").fetchone()
+            if latest and latest['status'] == 'running' and \
+                    latest['updated_at'] > (now - timedelta(seconds=stale_after)).isoformat():
+                return None
+            if latest and latest['status'] != 'done' and latest['model_version'] == model_version and not restart:
+                conn.execute("UPDATE rescore_jobs SET status = 'running', updated_at = ?, error = NULL "
+                             "WHERE job_id = ?", (now.isoformat(), latest['job_id']))
+                job_id = latest['job_id']
+            else:
+                job_id = uuid.uuid4().hex
+                total = conn.execute("SELECT COUNT(*) FROM hosts WHERE score_version < ?",
+                                     (model_version,)).fetchone()[0]
+                conn.execute(
+                    "INSERT INTO rescore_jobs (job_id, model_version, status, total, started_at, updated_at) "
+                    "VALUES (?, ?, 'running', ?, ?, ?)",
+                    (job_id, model_version, total, now.isoformat(), now.isoformat())
+                )
+        return self.get_rescore_job(job_id)
+
+    def _update_scores(self, conn, scores):
+        return conn.executemany(
+            "UPDATE hosts SET score = ?, grade = ?, score_version = ? WHERE host_id = ? AND version = ?",
+            [(score, grade, model_version, host_id, version)
+             for host_id, version, score, grade, model_version in scores]
+        ).rowcount
+
+    def _checkpoint_rescore(self, conn, job_id, last_host_id, scanned, rescored):
+        conn.execute(
+            "UPDATE rescore_jobs SET last_host_id = ?, scanned = scanned + ?, rescored = rescored + ?, "
+            "updated_at = ? WHERE job_id = ?",
+            (last_host_id, scanned, rescored, datetime.now().isoformat(), job_id)
+        )
+
+    def save_rescore_chunk(self, job_id, scores, last_host_id, scanned):
+        """Write one chunk of (host_id, version, score, grade, model_version) and its checkpoint together.
+
+        A host re-uploaded since its view was read keeps the score computed on ingest.
+        """
+        conn = self.connection()
+        with conn:
+            updated = self._update_scores(conn, scores)
+            self._checkpoint_rescore(conn, job_id, last_host_id, scanned, updated)
+        return updated
+
+    def finish_rescore_job(self, job_id, status, error=None):
+        now = datetime.now().isoformat()
+        with self.connection() as conn:
+            conn.execute("UPDATE rescore_jobs SET status = ?, error = ?, updated_at = ?, finished_at = ? "
+                         "WHERE job_id = ?", (status, error, now, now, job_id))
+
+
+class ShardedSnapshotStore:
+    """SnapshotStore split over ``shards`` SQLite files by a hash of host_id.
+
+    Each shard has its own write lock, so uploads from different hosts commit
+    in parallel. Per-host calls go to one shard; fleet-wide queries run on
+    every shard and merge the sorted results. Rescoring jobs are tracked in
+    shard 0. Changing the shard count needs fresh files, e.g. rebuilt from
+    the archive with ``flask rebuild-store``.
+    """
+
+    def __init__(self, path, shards):
+        root, extension = os.path.splitext(path)
+        self.shards = [SnapshotStore(f"{root}-{index}-of-{shards}{extension}") for index in range(shards)]
+        self.jobs = self.shards[0]
+
+    def shard_index(self, host_id):
+        # crc32 is stable across processes, unlike hash()
+        return zlib.crc32(host_id.encode('utf-8')) % len(self.shards)
+
+    def shard_for(self, host_id):
+        return self.shards[self.shard_index(host_id)]
+
+    def save_snapshot(self, host_id, *args, **kwargs):
+        return self.shard_for(host_id).save_snapshot(host_id, *args, **kwargs)
+
+    def touch(self, host_id, *args, **kwargs):
+        return self.shard_for(host_id).touch(host_id, *args, **kwargs)
+
+    def has_ingest_key(self, host_id, idempotency_key):
+        # Keys are recorded in the shard of the host they were sent for
+        return self.shard_for(host_id).has_ingest_key(host_id, idempotency_key)
+
+    def get_content_hash(self, host_id):
+        return self.shard_for(host_id).get_content_hash(host_id)
+
+    def get_version(self, host_id):
+        return self.shard_for(host_id).get_version(host_id)
+
+    def get_payload(self, host_id):
+        return self.shard_for(host_id).get_payload(host_id)
+
+    def get_view(self, host_id):
+        return self.shard_for(host_id).get_view(host_id)
+
+    def get_versioned_view(self, host_id):
+        return self.shard_for(host_id).get_versioned_view(host_id)
+
+    def search(self, filters, sort='host_id', limit=DEFAULT_LIMIT, cursor=None):
+        """Keyset-paginated host search; returns (rows, next_cursor)"""
+        # The cursor is a position in the global order, so each shard can apply it unchanged
+        columns = [f"hosts.{name}" for name in SUMMARY_COLUMNS]
+        pages = [[dict(row) for row in shard._page(columns, filters, sort, limit + 1, cursor)]
+                 for shard in self.shards]
+        merged = heapq.merge(*pages, key=sort_key(sort), reverse=sort.startswith('-'))
+        return paginate(list(itertools.islice(merged, limit + 1)), sort, limit)
+
+    def fleet_stats(self, filters):
+        return merge_stats([shard._stats_partial(filters) for shard in self.shards])
+
+    def iter_views(self, filters, sort='host_id', chunk_size=1000):
+        """Yield (summary, view) for every matching host, in order across all shards"""
+        streams = [shard.iter_views(filters, sort, chunk_size) for shard in self.shards]
+        key = sort_key(sort)
+        return heapq.merge(*streams, key=lambda item: key(item[0]), reverse=sort.startswith('-'))
+
+    def connections(self):
+        return [shard.connection() for shard in self.shards]
+
+    def delete_stale_hosts(self, before, limit):
+        return [host_id for shard in self.shards for host_id in shard.delete_stale_hosts(before, limit)]
+
+    def prune_ingest_keys(self, before, limit):
+        return sum(shard.prune_ingest_keys(before, limit) for shard in self.shards)
+
+    def stale_score_chunk(self, model_version, after_host_id, limit):
+        chunks = [shard.stale_score_chunk(model_version, after_host_id, limit) for shard in self.shards]
+        return list(itertools.islice(heapq.merge(*chunks), limit))
+
+    def get_rescore_job(self, job_id=None):
+        return self.jobs.get_rescore_job(job_id)
+
+    def claim_rescore_job(self, model_version, stale_after, restart=False):
+        # Every shard is counted, not just the one tracking the job
+        job = self.jobs.claim_rescore_job(model_version, stale_after, restart)
+        if job and job['scanned'] == 0:
+            total = sum(shard.connection().execute(
+                "SELECT COUNT(*) FROM hosts WHERE score_version < ?", (model_version,)).fetchone()[0]
+                for shard in self.shards)
+            with self.jobs.connection() as conn:
+                conn.execute("UPDATE rescore_jobs SET total = ? WHERE job_id = ?", (total, job['job_id']))
+            job['total'] = total
+        return job
+
+    def save_rescore_chunk(self, job_id, scores, last_host_id, scanned):
+        """Write a chunk's scores shard by shard, then the checkpoint.
+
+        Not atomic across shards: after a crash the chunk is scored again,
+        and hosts already written are skipped as no longer stale.
+        """
+        by_shard = {}
+        for row in scores:
+            by_shard.setdefault(self.shard_index(row[0]), []).append(row)
+        updated = 0
+        for index, rows in by_shard.items():
+            shard = self.shards[index]
+            with shard.connection() as conn:
+                updated += shard._update_scores(conn, rows)
+        with self.jobs.connection() as conn:
+            self.jobs._checkpoint_rescore(conn, job_id, last_host_id, scanned, updated)
+        return updated
+
+    def finish_rescore_job(self, job_id, status, error=None):
+        self.jobs.finish_rescore_job(job_id, status, error)
+
+
+def open_store(path, shards=1):
+    """The snapshot store at ``path``; more than one shard splits it into one file per shard"""
+    if shards > 1:
+        return ShardedSnapshotStore(path, shards)
+    return SnapshotStore(path)
@@ -0,0 +1,64 @@
+import pytest
+
+import admission
+from admission import ConcurrencyLimiter, RateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(admission.time, 'time', lambda: now[0])
+    return now
+
+
+def test_bucket_allows_a_burst_then_asks_to_wait(tmp_path, clock):
+    limiter = RateLimiter(str(tmp_path / 'buckets.db'), rate=2, burst=3)
+
+    assert [limiter.acquire('h1') for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire('h1') == pytest.approx(0.5)
+    assert limiter.acquire('h2') == 0
+
+    clock[0] += 1
+    assert limiter.acquire('h1') == 0
+    assert limiter.acquire('h1', cost=5) > 0
+
+
+def test_buckets_are_shared_between_processes(tmp_path, clock):
+    path = str(tmp_path / 'buckets.db')
+    first, second = RateLimiter(path, rate=1, burst=2), RateLimiter(path, rate=1, burst=2)
+
+    assert first.acquire('h1') == 0 and second.acquire('h1') == 0
+    assert first.acquire('h1') > 0
+
+
+def test_idle_buckets_are_pruned(tmp_path, clock):
+    limiter = RateLimiter(str(tmp_path / 'buckets.db'), rate=1, burst=2)
+    limiter.acquire('h1')
+
+    clock[0] += 10
+    limiter.prune()
+    assert limiter.connection().execute("SELECT COUNT(*) FROM buckets").fetchone()[0] == 0
+
+
+@pytest.mark.skipif(admission.fcntl is None, reason="Slots are per process without flock")
+def test_slots_are_shared_through_file_locks(tmp_path):
+    # Two limiters over one directory stand in for two worker processes
+    first = ConcurrencyLimiter(str(tmp_path), 'read', 2, queue_timeout=0)
+    second = ConcurrencyLimiter(str(tmp_path), 'read', 2, queue_timeout=0)
+
+    held = [first.acquire(), second.acquire()]
+    assert sorted(held) == [0, 1]
+    assert first.acquire() is None and second.acquire() is None
+
+    first.release(held[0])
+    assert second.acquire() == held[0]
+
+
+def test_a_full_pool_turns_requests_away_after_the_queue_timeout(tmp_path):
+    limiter = ConcurrencyLimiter(str(tmp_path), 'export', 1, queue_timeout=0.1)
+    index = limiter.acquire()
+
+    assert limiter.acquire() is None
+    limiter.release(index)
+    assert limiter.acquire() == index
+    assert 1 <= limiter.retry_after <= 3
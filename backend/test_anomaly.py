@@ -0,0 +1,48 @@
+import pytest
+
+from anomaly import AnomalyDetector
+
+
+def _view(cpu_usage, gpus=('NVIDIA GeForce RTX 3060',)):
+    return {'hardware': {'cpu': {'usage': cpu_usage, 'name': 'AMD Ryzen 5 5600X'},
+                         'memory': {'total_ram': 16, 'usage_percent': 40},
+                         'graphics': [{'Name': name} for name in gpus]}}
+
+
+@pytest.fixture
+def detector(tmp_path):
+    return AnomalyDetector(str(tmp_path / 'anomaly.db'))
+
+
+def test_steady_samples_build_the_baseline(detector):
+    for i, usage in enumerate([10, 12, 10, 12, 10, 12]):
+        assert detector.observe('h1', _view(usage), i) == []
+
+    baseline = detector.baseline('h1')['cpu_usage']
+    assert baseline['observations'] == 6
+    assert 10 < baseline['mean'] < 12 and 0 < baseline['std'] < 2
+
+
+def test_deviation_is_flagged_after_warmup(detector):
+    for i in range(detector.warmup):
+        detector.observe('h1', _view(10), i)
+
+    found = detector.observe('h1', _view(95), 99)
+
+    assert [(a['metric'], a['kind'], a['direction']) for a in found] == [('cpu_usage', 'deviation', 'rise')]
+    assert detector.recent('h1')[0]['value'] == 95
+
+
+def test_small_moves_of_a_flat_metric_are_not_flagged(detector):
+    for i in range(detector.warmup):
+        detector.observe('h1', _view(10), i)
+    assert detector.observe('h1', _view(20), 99) == []
+
+
+def test_component_changes_are_reported(detector):
+    detector.observe('h1', _view(10), 0)
+
+    found = detector.observe('h1', _view(10, gpus=('NVIDIA GeForce RTX 4070',)), 1)
+
+    assert found == [{'metric': 'gpus', 'kind': 'component_change',
+                      'removed': ['NVIDIA GeForce RTX 3060'], 'added': ['NVIDIA GeForce RTX 4070']}]
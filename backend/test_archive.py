@@ -0,0 +1,80 @@
+import os
+
+from archive import SnapshotArchive
+
+DAY = 86400
+
+
+def _archive(tmp_path, days, hosts=('a', 'b')):
+    """One sealed segment per day, each holding one snapshot per host"""
+    archive = SnapshotArchive(str(tmp_path / 'archive'))
+    for day in range(days):
+        for host in hosts:
+            archive.append(host, {'host': host, 'day': day}, timestamp=day * DAY + 1)
+        archive.rollover()
+    return archive
+
+
+def _segment_files(archive):
+    return sorted(name for name in os.listdir(archive.directory) if name.startswith('segment-'))
+
+
+def test_get_and_history_span_sealed_and_active_segments(tmp_path):
+    archive = _archive(tmp_path, 3)
+    archive.append('a', {'host': 'a', 'day': 3}, timestamp=3 * DAY + 1)
+
+    assert archive.get('a') == (3 * DAY + 1, {'host': 'a', 'day': 3})
+    assert archive.get('a', at=1.5 * DAY) == (DAY + 1, {'host': 'a', 'day': 1})
+    assert archive.get('missing') is None
+    assert archive.history('b') == [1, DAY + 1, 2 * DAY + 1]
+    assert [payload['day'] for _, _, payload in archive.replay(since=DAY)] == [1, 1, 2, 2, 3]
+
+
+def test_compact_leaves_unexpired_segments_alone(tmp_path):
+    archive = _archive(tmp_path, 3)
+    before = _segment_files(archive)
+
+    assert archive.compact(0) == {'segments_before': 3, 'segments_after': 3, 'records_dropped': 0}
+    assert _segment_files(archive) == before
+
+
+def test_compact_drops_expired_segments_and_keeps_the_rest(tmp_path):
+    archive = _archive(tmp_path, 4)
+    kept = [meta['id'] for meta in archive.manifest()['sealed']][2:]
+
+    result = archive.compact(2 * DAY)
+
+    assert result == {'segments_before': 4, 'segments_after': 2, 'records_dropped': 4}
+    assert [meta['id'] for meta in archive.manifest()['sealed']] == kept
+    assert archive.history('a') == [2 * DAY + 1, 3 * DAY + 1]
+    assert archive.stats()['records'] == 4
+
+
+def test_compact_rewrites_partly_expired_segments_in_log_order(tmp_path):
+    archive = SnapshotArchive(str(tmp_path / 'archive'))
+    archive.append('a', {'n': 0}, timestamp=1)
+    archive.append('a', {'n': 1}, timestamp=DAY + 1)
+    archive.rollover()
+    archive.append('a', {'n': 2}, timestamp=2 * DAY + 1)
+    archive.rollover()
+
+    result = archive.compact(DAY)
+
+    assert result['records_dropped'] == 1
+    assert [payload['n'] for _, _, payload in archive.replay()] == [1, 2]
+    assert archive.get('a', at=DAY + 1) == (DAY + 1, {'n': 1})
+    assert not any(name.endswith('.tmp') for name in os.listdir(archive.directory))
+
+
+def test_recovery_drops_a_torn_tail(tmp_path):
+    directory = str(tmp_path / 'archive')
+    archive = SnapshotArchive(directory)
+    archive.append('a', {'n': 1}, timestamp=1)
+    with open(archive._log_path(archive.manifest()['active']), 'ab') as f:
+        f.write(b'\x00' * 7)
+
+    reopened = SnapshotArchive(directory)
+
+    assert [payload for _, _, payload in reopened.replay()] == [{'n': 1}]
+    reopened.append('a', {'n': 2}, timestamp=2)
+    assert reopened.get('a') == (2, {'n': 2})
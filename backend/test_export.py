@@ -0,0 +1,65 @@
+import csv
+import io
+import json
+
+import pytest
+
+from export import COLUMN_NAMES, PARQUET_AVAILABLE, flatten, stream_export
+
+
+def _record(host_id, hostname='pc-1', cpu='AMD Ryzen 5 5600X'):
+    summary = {'host_id': host_id, 'hostname': hostname, 'last_seen': '2026-01-01T00:00:00', 'version': 3,
+               'gpu_model': 'NVIDIA GeForce RTX 3060', 'max_disk_usage': 40.0, 'score': 71.5, 'grade': 'B'}
+    view = {'system': {'os': 'Windows 11'},
+            'hardware': {'cpu': {'name': cpu, 'cores': '6', 'usage': 'n/a'}, 'graphics': {'Name': 'RTX 3060'}},
+            'storage': {'logical_disks': [{'total_size': 500, 'used': 200, 'free': 300}]}}
+    return summary, view
+
+
+def _csv(records):
+    return list(csv.DictReader(io.StringIO(''.join(stream_export(records, 'csv')))))
+
+
+def test_rows_follow_the_column_types():
+    row = flatten(*_record('h1'))
+
+    assert list(row) == COLUMN_NAMES
+    assert row['cpu_cores'] == 6 and row['cpu_usage'] is None
+    assert row['gpu_count'] == 1 and row['disk_total_gb'] == 500
+    assert row['bench_cpu_single'] is None
+
+
+@pytest.mark.parametrize('hostname', ['=HYPERLINK("http://x","y")', '+1+1', '-2+3', '@SUM(A1)', '\tcmd', '\rcmd'])
+def test_csv_cells_that_would_be_formulas_are_quoted(hostname):
+    [row] = _csv([_record('h1', hostname=hostname)])
+
+    assert row['hostname'] == "'" + hostname
+    assert row['score'] == '71.5'
+
+
+def test_csv_leaves_plain_text_and_numbers_alone():
+    [row] = _csv([_record('h1', hostname='pc-1', cpu='Intel Core i5')])
+    assert row['hostname'] == 'pc-1' and row['cpu_name'] == 'Intel Core i5'
+
+
+def test_csv_streams_in_chunks(monkeypatch):
+    monkeypatch.setattr('export.CSV_FLUSH_ROWS', 2)
+    chunks = list(stream_export((_record(f"h{i}") for i in range(5)), 'csv'))
+
+    assert len(chunks) == 3
+    assert [row['host_id'] for row in csv.DictReader(io.StringIO(''.join(chunks)))] == [f"h{i}" for i in range(5)]
+
+
+def test_ndjson_keeps_values_as_is():
+    lines = ''.join(stream_export([_record('h1', hostname='=1+1')], 'ndjson')).splitlines()
+    assert json.loads(lines[0])['hostname'] == '=1+1'
+
+
+@pytest.mark.skipif(not PARQUET_AVAILABLE, reason="Needs pyarrow")
+def test_parquet_round_trips():
+    import pyarrow.parquet as pq
+
+    data = b''.join(stream_export((_record(f"h{i}") for i in range(3)), 'parquet'))
+    table = pq.read_table(io.BytesIO(data))
+    assert table.column_names == COLUMN_NAMES
+    assert table.column('host_id').to_pylist() == ['h0', 'h1', 'h2']
@@ -0,0 +1,53 @@
+import json
+import threading
+import time
+
+from live import BroadcastHub, diff_sections
+
+
+def _events(frames):
+    for frame in frames:
+        if frame.startswith('id: '):
+            yield json.loads(frame.split('data: ', 1)[1])
+
+
+def test_removed_keys_are_listed_apart_from_null_values():
+    old = {'hardware': {'cpu': 'Ryzen', 'gpu': 'RTX', 'fan': 900}, 'storage': {'disks': 1}}
+    new = {'hardware': {'cpu': 'Ryzen', 'gpu': None}, 'storage': {'disks': 2}}
+
+    changed, removed = diff_sections(old, new)
+
+    assert changed == {'hardware': {'gpu': None}, 'storage': {'disks': 2}}
+    assert removed == {'hardware': ['fan']}
+
+
+def test_refresh_due_waits_for_the_stamp_to_move():
+    hub = BroadcastHub()
+    frames = hub.stream('h1', heartbeat=60)
+    next(frames)  # Subscribes
+
+    assert hub.refresh_due('h1', 0, stamp=2)
+    assert not hub.refresh_due('h1', 0, stamp=2)
+    assert hub.refresh_due('h1', 0, stamp=4)
+    assert not hub.refresh_due('h2', 0, stamp=6)
+    frames.close()
+
+
+def test_snapshots_stored_elsewhere_arrive_within_the_poll_interval():
+    hub = BroadcastHub()
+    stored = {'view': {'system': {'n': 1, 'gone': True}}}
+
+    def refresh(host):
+        hub.publish(host, stored['view'])
+
+    events = _events(hub.stream('h1', heartbeat=60, refresh=refresh, poll=0.05))
+    assert next(events)['changed'] == {'system': {'n': 1, 'gone': True}}
+
+    # Another worker stores a newer snapshot; nothing is published to this hub directly
+    threading.Timer(0.1, stored.update, [{'view': {'system': {'n': 2}}}]).start()
+    started = time.monotonic()
+    event = next(events)
+
+    assert event == {'host': 'h1', 'changed': {'system': {'n': 2}}, 'removed': {'system': ['gone']}}
+    assert time.monotonic() - started < 5
+    events.close()
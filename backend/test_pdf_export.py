@@ -0,0 +1,119 @@
+import os
+import signal
+import time
+import zipfile
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from pdf_export import PdfExportJobs
+from rating_engine import rate_system
+
+
+def _record(host_id, cpu='Ryzen 5'):
+    view = {'system': {'hostname': f"pc-{host_id}", 'host_id': host_id},
+            'hardware': {'cpu': {'name': cpu}}}
+    return host_id, f"pc-{host_id}", view, rate_system(view)
+
+
+def _wait(jobs, job_id, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = jobs.status(job_id)
+        if status['status'] != 'running':
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} still running")
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    jobs = PdfExportJobs(str(tmp_path / 'exports'), max_workers=1)
+    yield jobs
+    if jobs._pool is not None:
+        jobs._pool.shutdown(cancel_futures=True)
+
+
+def test_bulk_job_is_zipped_by_the_feeder(jobs):
+    job_id = jobs.submit(_record(f"h{i}") for i in range(3))
+
+    status = _wait(jobs, job_id)
+
+    assert status['status'] == 'done' and status['completed'] == status['total'] == 3
+    path, download_name = jobs.result(job_id)
+    assert download_name == f"reports-{job_id[:8]}.zip"
+    with zipfile.ZipFile(path) as zf:
+        assert sorted(zf.namelist()) == ['report-h0.pdf', 'report-h1.pdf', 'report-h2.pdf']
+
+
+def test_single_host_job_serves_the_pdf(jobs):
+    job_id = jobs.submit([_record('h1')])
+
+    assert _wait(jobs, job_id)['status'] == 'done'
+    path, download_name = jobs.result(job_id)
+    assert download_name == 'report-pc-h1.pdf'
+    with open(path, 'rb') as f:
+        assert f.read(5) == b'%PDF-'
+
+
+def test_unfinished_or_unknown_jobs_have_no_result(jobs):
+    assert jobs.status('missing') is None
+    assert jobs.result('missing') is None
+
+    def slow_records():
+        time.sleep(0.5)
+        yield _record('h1')
+    job_id = jobs.submit(slow_records())
+    assert jobs.status(job_id)['status'] == 'running'
+    assert jobs.result(job_id) is None
+    _wait(jobs, job_id)
+
+
+def test_feeding_errors_fail_the_job(jobs):
+    def broken_records():
+        yield _record('h1')
+        raise RuntimeError("store went away")
+
+    status = _wait(jobs, jobs.submit(broken_records()))
+
+    assert status['status'] == 'failed'
+    assert 'store went away' in status['error']
+    assert jobs.result(status['job_id']) is None
+
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGKILL'), reason="Needs SIGKILL")
+def test_a_pool_whose_workers_died_idle_is_replaced(jobs):
+    assert _wait(jobs, jobs.submit([_record('warm')]))['status'] == 'done'
+    for process in list(jobs.pool._processes.values()):
+        os.kill(process.pid, signal.SIGKILL)
+
+    assert _wait(jobs, jobs.submit([_record(f"h{i}", cpu='Core i5') for i in range(2)]))['status'] == 'done'
+
+
+def test_renders_lost_with_their_worker_fail_the_job(jobs, monkeypatch):
+    broken = jobs.pool
+
+    def render(view, rating, path):
+        future = Future()
+        future.set_exception(BrokenProcessPool("A child process terminated abruptly"))
+        return future, broken
+    monkeypatch.setattr(jobs, '_render', render)
+
+    status = _wait(jobs, jobs.submit([_record(f"h{i}") for i in range(2)]))
+
+    assert status['status'] == 'failed' and status['failed'] == ['h0', 'h1']
+    assert jobs._pool is None
+    monkeypatch.undo()
+    assert _wait(jobs, jobs.submit([_record(f"h{i}") for i in range(2)]))['status'] == 'done'
+
+
+def test_abandoned_jobs_are_reported_failed(jobs, monkeypatch):
+    job_id = jobs.submit([_record('h1')])
+    _wait(jobs, job_id)
+    manifest = jobs.load(job_id)
+    jobs._save({**manifest, 'feeding': True})
+    monkeypatch.setattr(time, 'time', lambda: manifest['updated_at'] + 3600)
+
+    status = jobs.status(job_id)
+    assert status['status'] == 'failed' and 'stopped' in status['error']
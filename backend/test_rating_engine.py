@@ -0,0 +1,21 @@
+from rating_engine import rate_many, rate_system
+
+
+def _view(cores=8, ram=16, disk='Samsung SSD 980'):
+    return {'hardware': {'cpu': {'cores': cores, 'threads': cores * 2, 'max_clock_speed': 4000},
+                         'memory': {'total_ram': ram},
+                         'graphics': [{'AdapterRAMGB': 8}]},
+            'storage': {'physical_disks': [{'Model': disk}], 'logical_disks': [{'usage_percent': 40}]}}
+
+
+def test_rate_many_matches_rating_each_view():
+    views = [_view(), _view(cores=4, ram=8), _view(disk='WDC WD10EZEX'), _view()]
+
+    assert rate_many(views) == [rate_system(view) for view in views]
+
+
+def test_identical_machines_share_one_rating():
+    first, second, other = rate_many([_view(), _view(), _view(ram=4)])
+
+    assert first is second
+    assert other is not first and 'More RAM for heavy multitasking' in other['suggestions']
@@ -0,0 +1,80 @@
+import pytest
+
+import snapshot_index
+from snapshot_index import SHARED_INDEX_AVAILABLE, SnapshotIndex
+
+pytestmark = pytest.mark.skipif(not SHARED_INDEX_AVAILABLE, reason="The shared index needs flock and pwrite")
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'index.bin')
+
+
+def test_publish_and_get(path):
+    index = SnapshotIndex(path)
+    assert index.get('a') is None
+
+    index.publish('a', 1, {'cpu': 'one'})
+    index.publish('a', 2, {'cpu': 'two'})
+
+    assert index.get('a') == (2, {'cpu': 'two'})
+    assert index.version('a') == 2
+    assert index.generation % 2 == 0
+
+
+def test_publish_if_newer_keeps_a_newer_entry(path):
+    index = SnapshotIndex(path)
+    index.publish('latest', 20, {'n': 'newer'})
+
+    index.publish('latest', 10, {'n': 'older'}, if_newer=True)
+    assert index.get('latest') == (20, {'n': 'newer'})
+
+    index.publish('latest', 30, {'n': 'newest'}, if_newer=True)
+    assert index.get('latest') == (30, {'n': 'newest'})
+
+
+def test_publishes_are_seen_by_other_handles(path):
+    # One handle per worker process, all mapping the same file
+    writer, reader = SnapshotIndex(path), SnapshotIndex(path)
+    writer.publish('a', 1, {'n': 1})
+    assert reader.get('a') == (1, {'n': 1})
+
+    generation = reader.generation
+    writer.publish('a', 2, {'n': 2})
+    assert reader.generation == generation + 2
+    assert reader.get('a') == (2, {'n': 2})
+
+
+def test_growth_and_removal_swap_in_a_new_file(path, monkeypatch):
+    monkeypatch.setattr(snapshot_index, 'INITIAL_CAPACITY', 4)
+    writer, reader = SnapshotIndex(path), SnapshotIndex(path)
+    reader.get('h0')
+
+    for i in range(20):
+        writer.publish(f"h{i}", i, {'n': i})
+    assert [reader.get(f"h{i}") for i in range(20)] == [(i, {'n': i}) for i in range(20)]
+
+    writer.remove(['h3', 'h7'])
+    assert reader.get('h3') is None and reader.get('h7') is None
+    assert reader.get('h8') == (8, {'n': 8})
+
+
+def test_get_decodes_only_the_requested_sections(path):
+    index = SnapshotIndex(path)
+    view = {'system': {'hostname': 'pc-1'}, 'hardware': {'cpu': {'name': 'Ryzen'}}, 'processes': [1, 2]}
+    index.publish('a', 1, view)
+
+    assert index.get('a', ['hardware']) == (1, {'hardware': {'cpu': {'name': 'Ryzen'}}})
+    assert index.get('a', ['system', 'missing']) == (1, {'system': {'hostname': 'pc-1'}})
+    assert index.get('a') == (1, view)
+
+
+def test_an_index_in_an_older_format_is_started_afresh(path):
+    with open(path, 'wb') as f:
+        f.write(b'SSXIDX01'.ljust(4096, b'\0'))
+
+    index = SnapshotIndex(path)
+    assert index.get('a') is None
+    index.publish('a', 1, {'n': 1})
+    assert index.get('a') == (1, {'n': 1})
@@ -0,0 +1,128 @@
+import pytest
+
+from store import ShardedSnapshotStore, SnapshotStore, decode_cursor, encode_cursor, parse_search_args
+
+
+def _view(host_id, cpu='Intel(R) Core(TM) i7-12700K', gpu='NVIDIA GeForce RTX 4070', ram=16):
+    return {
+        'system': {'host_id': host_id, 'hostname': f"pc-{host_id}", 'os': 'Windows 11'},
+        'hardware': {'cpu': {'name': cpu, 'cores': 8, 'threads': 16}, 'memory': {'total_ram': ram},
+                     'graphics': [{'Name': gpu}]},
+        'storage': {'logical_disks': [{'usage_percent': 40}]}
+    }
+
+
+def _save(store, host_id, score=50, **kwargs):
+    store.save_snapshot(host_id, {'host_id': host_id}, _view(host_id, **kwargs), {'score': score, 'grade': 'C'})
+
+
+def _search(store, **args):
+    filters, sort, limit, cursor = parse_search_args({k: str(v) for k, v in args.items()})
+    return store.search(filters, sort, limit, cursor)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SnapshotStore(str(tmp_path / 'hosts.db'))
+
+
+def test_cursor_pages_cover_every_host_once(store):
+    for i in range(7):
+        _save(store, f"h{i}", score=i % 3)
+
+    seen, cursor = [], None
+    while True:
+        args = {'sort': '-score', 'limit': 3, **({'cursor': cursor} if cursor else {})}
+        hosts, cursor = _search(store, **args)
+        seen.extend(host['host_id'] for host in hosts)
+        if cursor is None:
+            break
+
+    # Descending score, ties broken by descending host_id
+    assert seen == ['h5', 'h2', 'h4', 'h1', 'h6', 'h3', 'h0']
+
+
+def test_model_filters_match_word_prefixes(store):
+    _save(store, 'intel', cpu='Intel(R) Core(TM) i7-12700K', gpu='NVIDIA GeForce RTX 4070')
+    _save(store, 'amd', cpu='AMD Ryzen 7 7800X3D', gpu='AMD Radeon RX 7900 XTX')
+
+    assert [host['host_id'] for host in _search(store, cpu='i7-127')[0]] == ['intel']
+    assert [host['host_id'] for host in _search(store, gpu='radeon 79')[0]] == ['amd']
+    assert _search(store, cpu='ryzen 9')[0] == []
+
+    # A re-upload replaces the host's words
+    _save(store, 'amd', cpu='AMD Ryzen 9 7950X')
+    assert [host['host_id'] for host in _search(store, cpu='ryzen 9')[0]] == ['amd']
+    assert store.fleet_stats(parse_search_args({'gpu_model': 'rtx'})[0])['hosts'] == 2
+
+
+def test_model_terms_are_backfilled_for_older_stores(tmp_path):
+    path = str(tmp_path / 'hosts.db')
+    old = SnapshotStore(path)
+    _save(old, 'h1', cpu='AMD Ryzen 5 5600X')
+    with old.connection() as conn:
+        conn.execute("DELETE FROM host_model_terms")
+
+    assert [host['host_id'] for host in _search(SnapshotStore(path), cpu='ryzen')[0]] == ['h1']
+
+
+def test_unknown_and_malformed_arguments_are_rejected():
+    with pytest.raises(ValueError, match="Unknown filter 'max_ram'.*total_ram"):
+        parse_search_args({'max_ram': '8'})
+    with pytest.raises(ValueError, match="Unknown operator"):
+        parse_search_args({'total_ram': 'between:8'})
+    with pytest.raises(ValueError, match="Cannot sort"):
+        parse_search_args({'sort': 'payload'})
+    with pytest.raises(ValueError, match="letter or digit"):
+        parse_search_args({'cpu': '--'})
+    assert parse_search_args({'format': 'csv'}, extra=('format',))[0] == []
+
+
+@pytest.mark.parametrize('cursor', ['not base64!', encode_cursor([1]), encode_cursor([[1], 'h']),
+                                    encode_cursor([2 ** 70, 'h'])])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+
+@pytest.fixture
+def sharded(tmp_path):
+    return ShardedSnapshotStore(str(tmp_path / 'hosts.db'), 3)
+
+
+def test_sharded_store_routes_each_host_to_one_shard(sharded):
+    for i in range(12):
+        _save(sharded, f"h{i}", score=i)
+
+    for i in range(12):
+        holders = [shard for shard in sharded.shards if shard.get_version(f"h{i}") is not None]
+        assert holders == [sharded.shard_for(f"h{i}")]
+    assert sharded.get_view('h5')['system']['host_id'] == 'h5'
+    assert len({index for index in map(sharded.shard_index, (f"h{i}" for i in range(12)))}) == 3
+
+
+def test_sharded_ingest_keys_live_with_their_host(sharded):
+    sharded.save_snapshot('h1', {}, _view('h1'), {'score': 1}, idempotency_key='k1')
+    sharded.touch('h2', idempotency_key='k2')
+
+    assert sharded.has_ingest_key('h1', 'k1')
+    assert not sharded.has_ingest_key('h1', 'k2')
+    assert [shard.has_ingest_key('h1', 'k1') for shard in sharded.shards].count(True) == 1
+
+
+def test_sharded_search_merges_shards_in_global_order(sharded):
+    for i in range(10):
+        _save(sharded, f"h{i}", score=i % 4, cpu='AMD Ryzen 5' if i % 2 else 'Intel Core i5')
+
+    seen, cursor = [], None
+    while True:
+        hosts, cursor = _search(sharded, sort='score', limit=4, **({'cursor': cursor} if cursor else {}))
+        seen.extend((host['score'], host['host_id']) for host in hosts)
+        if cursor is None:
+            break
+    assert seen == sorted((i % 4, f"h{i}") for i in range(10))
+
+    ryzen = [host['host_id'] for host in _search(sharded, cpu='ryzen', limit=50)[0]]
+    assert ryzen == sorted(f"h{i}" for i in range(1, 10, 2))
+    stats = sharded.fleet_stats(parse_search_args({'cpu': 'intel'})[0])
+    assert stats['hosts'] == 5 and stats['max_score'] == 2
@@ -0,0 +1,67 @@
+import datetime
+
+import pytest
+from flask import Flask, jsonify, request
+from werkzeug.exceptions import BadRequest
+
+import wire
+from wire import MSGPACK_AVAILABLE, MSGPACK_MIMETYPE, NegotiatingJSONProvider, decode_body
+
+pytestmark = pytest.mark.skipif(not MSGPACK_AVAILABLE, reason="Needs msgpack")
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.json = NegotiatingJSONProvider(app)
+
+    @app.route('/echo', methods=['POST'])
+    def echo():
+        try:
+            return jsonify({'body': decode_body(request), 'at': datetime.date(2026, 1, 2)})
+        except BadRequest as e:
+            return jsonify({'error': e.description}), 400
+
+    return app.test_client()
+
+
+def test_msgpack_is_served_only_when_preferred(client):
+    body = {'cpu': 'Ryzen'}
+
+    as_json = client.post('/echo', json=body)
+    assert as_json.mimetype == 'application/json' and as_json.get_json()['body'] == body
+    assert 'Accept' in as_json.vary
+
+    assert client.post('/echo', json=body, headers={'Accept': '*/*'}).mimetype == 'application/json'
+    as_msgpack = client.post('/echo', json=body, headers={'Accept': 'application/x-msgpack, application/json;q=0.5'})
+    assert as_msgpack.mimetype == MSGPACK_MIMETYPE
+    assert wire.msgpack.unpackb(as_msgpack.data) == {'body': body, 'at': 'Fri, 02 Jan 2026 00:00:00 GMT'}
+
+
+def test_msgpack_bodies_are_decoded(client):
+    body = {'hardware': {'cpu': {'cores': 6}}, 'tags': ['a', 'b'], 'ids': {1: 'integer key'}}
+
+    response = client.post('/echo', data=wire.msgpack.packb(body), content_type='application/vnd.msgpack')
+
+    assert response.get_json()['body'] == {'hardware': {'cpu': {'cores': 6}}, 'tags': ['a', 'b'], 'ids': {'1': 'integer key'}}
+
+
+def test_json_is_accepted_without_a_content_type(client):
+    assert client.post('/echo', data='{"n": 1}').get_json()['body'] == {'n': 1}
+
+
+@pytest.mark.parametrize('data', [b'\xc1', wire.msgpack.packb({'a': 1})[:-1] if MSGPACK_AVAILABLE else b'',
+                                  b'\x81\x91\x01\x02'])  # The last one is a map keyed by an array
+def test_malformed_msgpack_is_a_bad_request(client, data):
+    response = client.post('/echo', data=data, content_type=MSGPACK_MIMETYPE)
+
+    assert response.status_code == 400 and 'Invalid MessagePack' in response.get_json()['error']
+
+
+def test_msgpack_uploads_need_msgpack_installed(client, monkeypatch):
+    monkeypatch.setattr(wire, 'msgpack', None)
+    monkeypatch.setattr(wire, 'MSGPACK_AVAILABLE', False)
+
+    assert client.post('/echo', data=b'\x80', content_type=MSGPACK_MIMETYPE).status_code == 415
+    response = client.post('/echo', json={}, headers={'Accept': MSGPACK_MIMETYPE})
+    assert response.mimetype == 'application/json' and 'Accept' not in response.vary
@@ -0,0 +1,169 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+TRACE_SCHEMA = """
+-- One row per upload: the agent's stage timings, the backend's, and the agent's
+-- follow-up report of how long serializing and delivering the upload took
+CREATE TABLE IF NOT EXISTS traces (
+    trace_id TEXT PRIMARY KEY,
+    host_id TEXT NOT NULL,
+    received_at REAL NOT NULL,
+    status TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    server TEXT NOT NULL,
+    upload TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_traces_host ON traces (host_id, received_at);
+CREATE INDEX IF NOT EXISTS idx_traces_received_at ON traces (received_at);
+"""
+
+TRACE_HEADER = 'X-Trace-Id'
+# Agent-generated ids are accepted as-is when they look like one
+TRACE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def trace_id_for(data, header=None):
+    """The agent's trace id from the payload or header, or a new one for older agents"""
+    trace = data.get('trace') if isinstance(data, dict) else None
+    for candidate in (trace.get('trace_id') if isinstance(trace, dict) else None, header):
+        if isinstance(candidate, str) and TRACE_ID_PATTERN.match(candidate):
+            return candidate
+    return uuid.uuid4().hex
+
+
+def _timings(values):
+    """Only the numeric entries of an agent-reported timing dict"""
+    if not isinstance(values, dict):
+        return {}
+    return {str(name): value if isinstance(value, int) else round(value, 1) for name, value in values.items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)}
+
+
+class StageTimer:
+    """Wall time of the named stages of one request, in the order they ran"""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.stages[name] = round(self.stages.get(name, 0.0) + elapsed, 2)
+
+    def server_timing(self):
+        """Server-Timing header value, e.g. ``parse;dur=0.41, persist;dur=3.2``"""
+        return ', '.join(f"{name};dur={ms}" for name, ms in self.stages.items())
+
+
+class TraceStore:
+    """Per-upload stage timings from agent to storage, keyed by trace id"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(TRACE_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def record(self, trace_id, host_id, received_at, status, agent_trace, server_stages):
+        """Store one upload's timings.
+
+        A retried upload re-sends its trace id; the retry replaces the row unless
+        the first attempt was stored, whose full stage breakdown is kept.
+        """
+        agent_trace = agent_trace if isinstance(agent_trace, dict) else {}
+        agent = {'stages': _timings(agent_trace.get('stages'))}
+        if isinstance(agent_trace.get('started_at'), str):
+            agent['started_at'] = agent_trace['started_at'][:40]
+        self.connection().execute(
+            """INSERT INTO traces (trace_id, host_id, received_at, status, agent, server)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT(trace_id) DO UPDATE SET
+                   received_at = excluded.received_at, status = excluded.status,
+                   agent = excluded.agent, server = excluded.server
+               WHERE traces.status != 'stored'""",
+            (trace_id, host_id, received_at, status, json.dumps(agent), json.dumps(server_stages))
+        )
+
+    def record_upload(self, trace_id, upload):
+        """Attach the agent's delivery timings; False if the trace is unknown"""
+        report = _timings(upload)
+        if isinstance(upload.get('format'), str):
+            report['format'] = upload['format'][:20]
+        return self.connection().execute(
+            "UPDATE traces SET upload = ? WHERE trace_id = ?", (json.dumps(report), trace_id)
+        ).rowcount > 0
+
+    @staticmethod
+    def _row(row):
+        agent, server = json.loads(row['agent']), json.loads(row['server'])
+        upload = json.loads(row['upload']) if row['upload'] else {}
+        server_ms = round(sum(server.values()), 1)
+        upload_ms = upload.get('upload_ms')
+        return {
+            'trace_id': row['trace_id'], 'host_id': row['host_id'], 'received_at': row['received_at'],
+            'status': row['status'], 'agent': agent, 'upload': upload or None, 'server': server,
+            # Where the time went, end to end; the agent's upload time includes the
+            # backend's, so the rest of it is network and queueing
+            'breakdown': {
+                'collection_ms': agent.get('stages', {}).get('collection_ms'),
+                'serialize_ms': upload.get('serialize_ms'),
+                'transfer_ms': round(max(upload_ms - server_ms, 0.0), 1) if upload_ms is not None else None,
+                'server_ms': server_ms
+            }
+        }
+
+    def get(self, trace_id):
+        row = self.connection().execute("SELECT * FROM traces WHERE trace_id = ?", (trace_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def recent(self, host_id=None, since=None, limit=DEFAULT_LIMIT):
+        """Newest traces first, for one host or the whole fleet"""
+        clauses, params = [], []
+        if host_id is not None:
+            clauses.append("host_id = ?")
+            params.append(host_id)
+        if since is not None:
+            clauses.append("received_at >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self.connection().execute(
+            f"SELECT * FROM traces {where} ORDER BY received_at DESC LIMIT ?",
+            [*params, max(1, min(limit, MAX_LIMIT))]
+        ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def prune(self, before, limit):
+        """Delete up to ``limit`` traces received before ``before``; returns how many"""
+        return self.connection().execute(
+            "DELETE FROM traces WHERE rowid IN (SELECT rowid FROM traces WHERE received_at < ? LIMIT ?)",
+            (before, limit)
+        ).rowcount
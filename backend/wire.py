@@ -0,0 +1,63 @@
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import BadRequest, UnsupportedMediaType
+
+try:
+    import msgpack
+except ImportError:  # JSON only; clients asking for MessagePack get JSON, uploads in it get 415
+    msgpack = None
+
+MSGPACK_AVAILABLE = msgpack is not None
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+# Names clients use for MessagePack in the wild
+MSGPACK_MIMETYPES = {MSGPACK_MIMETYPE, 'application/x-msgpack', 'application/vnd.msgpack'}
+
+
+def is_msgpack(mimetype):
+    return (mimetype or '').lower() in MSGPACK_MIMETYPES
+
+
+def wants_msgpack():
+    """True when the client ranks MessagePack above JSON; JSON wins ties and */*"""
+    if not MSGPACK_AVAILABLE:
+        return False
+    offered = ['application/json', *sorted(MSGPACK_MIMETYPES)]
+    return is_msgpack(request.accept_mimetypes.best_match(offered))
+
+
+def decode_body(req):
+    """Request body as Python objects, from MessagePack or JSON by Content-Type.
+
+    Raises UnsupportedMediaType (415) for MessagePack without msgpack installed
+    and BadRequest for a malformed body.
+    """
+    if is_msgpack(req.mimetype):
+        if not MSGPACK_AVAILABLE:
+            raise UnsupportedMediaType("MessagePack is not supported by this server; send JSON")
+        try:
+            return msgpack.unpackb(req.get_data(), raw=False, strict_map_key=False)
+        # msgpack's unpack errors derive from ValueError; an unhashable map key raises TypeError
+        except (ValueError, TypeError) as e:
+            raise BadRequest(f"Invalid MessagePack body: {e or type(e).__name__}")
+    # Agents have always been accepted without a JSON Content-Type
+    return req.get_json(force=True)
+
+
+class NegotiatingJSONProvider(DefaultJSONProvider):
+    """jsonify() that answers in MessagePack when the client's Accept header prefers it.
+
+    The body is serialized once, straight to the negotiated format.
+    """
+
+    def response(self, *args, **kwargs):
+        if not wants_msgpack():
+            response = super().response(*args, **kwargs)
+        else:
+            obj = self._prepare_response_obj(args, kwargs)
+            body = msgpack.packb(obj, default=self.default, use_bin_type=True)
+            response = self._app.response_class(body, mimetype=MSGPACK_MIMETYPE)
+        # Caches must key on Accept once the body depends on it
+        if MSGPACK_AVAILABLE:
+            response.vary.add('Accept')
+        return response